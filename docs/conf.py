@@ -11,6 +11,11 @@ version = release.partition("-")[0]
 language = "en"
 default_role = "any"
 
+nitpick_ignore = [
+    # Private, but the type of ObjectLocator.select
+    ("py:class", "virtue._select.Selection"),
+]
+
 extensions = [
     "sphinx.ext.autodoc",
     "sphinx.ext.autosectionlabel",
@@ -2,6 +2,6 @@
 The virtuous test runner.
 """
 
-from virtue import _cli
+from virtue import _client
 
-_cli.main()  # type: ignore[misc]
+_client.main()
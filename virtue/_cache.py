@@ -0,0 +1,496 @@
+"""
+State kept on disk between runs (by default within ``.virtue_cache/``).
+"""
+
+from __future__ import annotations
+
+from contextlib import suppress
+from pathlib import Path
+import json
+import os
+import sys
+import warnings
+
+from attrs import define, field
+
+from virtue.loaders import LazyAttributeLoader
+
+#: The default directory in which to keep state between runs
+DEFAULT_DIRECTORY = ".virtue_cache"
+
+
+def _stat(path):
+    """
+    A cheap fingerprint of a file's contents, or None if it's missing.
+    """
+    try:
+        stat = os.stat(path)  # noqa: PTH116
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def read_json(path, default):
+    """
+    Read some JSON from a file, or return a default if it's missing or bad.
+    """
+    try:
+        with Path(path).open() as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return default
+
+
+def make_directory(path):
+    """
+    Create a cache directory, if it doesn't already exist.
+
+    New ones are ignored by git, since nothing within them belongs in a
+    repository.
+    """
+    path = Path(path)
+    if path.is_dir():
+        return
+    path.mkdir(parents=True, exist_ok=True)
+    (path / ".gitignore").write_text("# Created by virtue automatically.\n*\n")
+
+
+def write_json(path, contents):
+    """
+    Atomically write some JSON to a file, creating its directory if needed.
+
+    Nothing here is essential, so if the file can't be written (say, in a
+    read-only checkout), I just warn.
+    """
+    path = Path(path)
+    temporary = path.with_name(f".{path.name}.{os.getpid()}")
+    try:
+        make_directory(path.parent)
+        with temporary.open("w") as file:
+            json.dump(contents, file, separators=(",", ":"))
+        temporary.replace(path)
+    except OSError as error:
+        with suppress(OSError):
+            temporary.unlink()
+        warnings.warn(
+            f"Couldn't write to the cache: {error}",
+            RuntimeWarning,
+            stacklevel=3,
+        )
+
+
+def dependencies_of(loaders, root):
+    """
+    The source files of the bases of the given loaders' test classes.
+
+    Only classes from within the given top-level package are considered.
+    """
+    for loader in loaders:
+        for cls in loader.cls.__mro__:
+            top, _, _ = cls.__module__.partition(".")
+            if top != root:
+                continue
+            path = getattr(sys.modules.get(cls.__module__), "__file__", None)
+            if path is not None:
+                yield path
+
+
+@define
+class DiscoveryCache:
+    """
+    Remember which tests were located in each module of a package.
+
+    Tests are remembered for as long as neither their module nor any module
+    their classes inherit from changes.
+
+    Arguments:
+
+        path (str):
+
+            the file to store the cache in
+
+        fingerprint (str):
+
+            identifies the configuration of the locator using the cache.
+            A cache written with a different fingerprint is ignored.
+
+    """
+
+    path: str = field(converter=str)
+    fingerprint: str = field(default="")
+
+    _modules: dict | None = field(default=None, repr=False)
+    _dirty: bool = field(default=False, repr=False)
+
+    @classmethod
+    def in_directory(cls, directory=DEFAULT_DIRECTORY, **kwargs):
+        """
+        Create a discovery cache within the given cache directory.
+        """
+        return cls(path=Path(directory) / "discovery.json", **kwargs)
+
+    def _entries(self):
+        if self._modules is None:
+            contents = read_json(self.path, default={})
+            if contents.get("fingerprint") == self.fingerprint:
+                self._modules = contents.get("modules", {})
+            else:
+                self._modules = {}
+        return self._modules
+
+    def get(self, name, path):
+        """
+        Retrieve the (lazy) loaders for the tests in the given module.
+
+        Returns None if the module (or one of its dependencies) has changed
+        since its tests were stored, or if they never were.
+        """
+        entry = self._entries().get(name)
+        if entry is None or entry["path"] != path:
+            return None
+        for dependency, stat in entry["files"].items():
+            if _stat(dependency) != stat:
+                return None
+        return [
+            LazyAttributeLoader(module=module, cls=cls, attribute=attribute)
+            for module, cls, attribute in entry["tests"]
+        ]
+
+    def set(self, name, path, loaders, dependencies=()):
+        """
+        Store the tests located in the given module.
+
+        Arguments:
+
+            name (str):
+
+                the fully qualified name of the module
+
+            path (str):
+
+                the path to the module's source file
+
+            loaders (collections.abc.Iterable):
+
+                loaders for each test located in the module
+
+            dependencies (collections.abc.Iterable):
+
+                the paths of any other files which, if changed, may change
+                which tests are in this module
+
+        """
+        files = {each: _stat(each) for each in {path, *dependencies}}
+        tests = []
+        for loader in loaders:
+            if isinstance(loader, LazyAttributeLoader):
+                module, cls = loader.module, loader.cls
+            else:
+                module, cls = loader.cls.__module__, loader.cls.__qualname__
+            tests.append([module, cls, loader.attribute])
+        self._entries()[name] = dict(path=path, files=files, tests=tests)
+        self._dirty = True
+
+    def forget_missing(self):
+        """
+        Forget any modules which no longer exist.
+        """
+        entries = self._entries()
+        for name, entry in list(entries.items()):
+            if _stat(entry["path"]) is None:
+                del entries[name]
+                self._dirty = True
+
+    def save(self):
+        """
+        Write the cache to disk, if anything in it changed.
+        """
+        if not self._dirty:
+            return
+        contents = dict(fingerprint=self.fingerprint, modules=self._entries())
+        write_json(self.path, contents)
+        self._dirty = False
+
+
+@define
+class Durations:
+    """
+    Remember how long each test (and each fixture) took the last time it ran.
+
+    Arguments:
+
+        path (str):
+
+            the file to store durations in
+
+    """
+
+    path: str = field(converter=str)
+
+    _contents: dict | None = field(default=None, repr=False)
+    _dirty: bool = field(default=False, repr=False)
+
+    @classmethod
+    def in_directory(cls, directory=DEFAULT_DIRECTORY, **kwargs):
+        """
+        Remember durations within the given cache directory.
+        """
+        return cls(path=Path(directory) / "durations.json", **kwargs)
+
+    def _entries(self, kind):
+        if self._contents is None:
+            contents = read_json(self.path, default={})
+            self._contents = {
+                each: contents.get(each, {}) for each in ("tests", "fixtures")
+            }
+        return self._contents[kind]
+
+    def get(self, id, default=None):
+        """
+        How long the test with the given ID took, in seconds, if known.
+        """
+        return self._entries("tests").get(id, default)
+
+    def known(self):
+        """
+        The durations of every test whose duration is known.
+        """
+        return self._entries("tests").values()
+
+    def record(self, id, elapsed):
+        """
+        Remember how long the test with the given ID took, in seconds.
+        """
+        self._entries("tests")[id] = elapsed
+        self._dirty = True
+
+    def fixture(self, name):
+        """
+        How long the named module or class took to set up, if known.
+        """
+        return self._entries("fixtures").get(name)
+
+    def record_fixture(self, name, elapsed):
+        """
+        Remember how long the named module or class took to set up.
+        """
+        self._entries("fixtures")[name] = elapsed
+        self._dirty = True
+
+    def save(self):
+        """
+        Write the durations to disk, if any were recorded.
+        """
+        if not self._dirty:
+            return
+        write_json(self.path, self._contents)
+        self._dirty = False
+
+
+@define
+class LastFailed:
+    """
+    Remember which tests failed (or errored) the last time they ran.
+
+    Besides test IDs, the names of classes and modules whose fixtures
+    failed (such that none of their tests ran) are remembered too.
+
+    Arguments:
+
+        path (str):
+
+            the file to store failures in
+
+    """
+
+    path: str = field(converter=str)
+
+    _names: set | None = field(default=None, repr=False)
+    _dirty: bool = field(default=False, repr=False)
+
+    @classmethod
+    def in_directory(cls, directory=DEFAULT_DIRECTORY, **kwargs):
+        """
+        Remember failures within the given cache directory.
+        """
+        return cls(path=Path(directory) / "lastfailed.json", **kwargs)
+
+    def _entries(self):
+        if self._names is None:
+            self._names = set(read_json(self.path, default=[]))
+        return self._names
+
+    def __bool__(self):
+        return bool(self._entries())
+
+    def failed(self, id):
+        """
+        Whether the test with the given ID (or its class or module) failed.
+        """
+        names = self._entries()
+        if not names:
+            return False
+        while id:
+            if id in names:
+                return True
+            id, _, _ = id.rpartition(".")
+        return False
+
+    def add(self, name):
+        """
+        Remember that the given test (or class or module) failed.
+        """
+        self._entries().add(name)
+        self._dirty = True
+
+    def passed(self, id):
+        """
+        Forget any failure of the test with the given ID, or its parents.
+        """
+        names = self._entries()
+        while id:
+            if id in names:
+                names.discard(id)
+                self._dirty = True
+            id, _, _ = id.rpartition(".")
+
+    def save(self):
+        """
+        Write the failures to disk, if they changed.
+        """
+        if not self._dirty:
+            return
+        write_json(self.path, sorted(self._entries()))
+        self._dirty = False
+
+
+@define
+class Impact:
+    """
+    Remember which functions each test called the last time it ran.
+
+    Besides tests, the functions called by the fixtures of classes and
+    modules (and by importing modules) are remembered under their names.
+
+    Arguments:
+
+        path (str):
+
+            the file to store the functions in
+
+    """
+
+    path: str = field(converter=str)
+
+    _called: dict | None = field(default=None, repr=False)
+    _recorded: set = field(factory=set, repr=False)
+    _dirty: bool = field(default=False, repr=False)
+
+    @classmethod
+    def in_directory(cls, directory=DEFAULT_DIRECTORY, **kwargs):
+        """
+        Remember called functions within the given cache directory.
+        """
+        return cls(path=Path(directory) / "impact.json", **kwargs)
+
+    def _entries(self):
+        if self._called is None:
+            contents = read_json(self.path, default={})
+            functions = [tuple(each) for each in contents.get("functions", [])]
+            self._called = {
+                name: {functions[index] for index in indices}
+                for name, indices in contents.get("tests", {}).items()
+            }
+        return self._called
+
+    def record(self, name, functions):
+        """
+        Remember that the named test (or class or module) called functions.
+
+        Each function is a (path, first line, last line) tuple. Functions
+        recorded for a name earlier in the same run are added to, while
+        those recorded in an earlier run are replaced.
+        """
+        entries = self._entries()
+        functions = {tuple(each) for each in functions}
+        if name in self._recorded:
+            entries[name] |= functions
+        else:
+            entries[name] = functions
+            self._recorded.add(name)
+        self._dirty = True
+
+    def affected(self, changes):
+        """
+        Decide which tests may be affected by some changes.
+
+        Arguments:
+
+            changes (dict):
+
+                the changed lines in each changed file, or None for files
+                which changed entirely
+
+        Returns:
+
+            a predicate which, given a test ID, says whether the test may be
+            affected. Tests are, unless they were recorded and neither they
+            nor their class or module called any changed function. Changes
+            outside of any function which was called (e.g. at the top level
+            of a module) affect every test which called anything in their
+            file, and changes to files in which nothing was ever called
+            affect every test.
+
+        """
+        entries = self._entries()
+        by_path = {}
+        for functions in entries.values():
+            for function in functions:
+                by_path.setdefault(function[0], set()).add(function)
+
+        hit, whole = set(), set()
+        for path, lines in changes.items():
+            known = by_path.get(path)
+            if not known:
+                return lambda _: True
+            if lines is None:
+                whole.add(path)
+                continue
+            for line in lines:
+                within = {each for each in known if each[1] <= line <= each[2]}
+                if within:
+                    hit |= within
+                else:
+                    whole.add(path)
+
+        names = {
+            name
+            for name, functions in entries.items()
+            if any(each in hit or each[0] in whole for each in functions)
+        }
+
+        def affected(id):
+            if id not in entries:
+                return True
+            while id:
+                if id in names:
+                    return True
+                id, _, _ = id.rpartition(".")
+            return False
+
+        return affected
+
+    def save(self):
+        """
+        Write the called functions to disk, if any were recorded.
+        """
+        if not self._dirty:
+            return
+        indices, tests = {}, {}
+        for name, functions in sorted(self._entries().items()):
+            tests[name] = [
+                indices.setdefault(each, len(indices))
+                for each in sorted(functions)
+            ]
+        write_json(self.path, dict(functions=list(indices), tests=tests))
+        self._dirty = False
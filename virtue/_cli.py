@@ -1,4 +1,7 @@
+from contextlib import suppress
+from pathlib import Path
 from textwrap import dedent
+import sys
 
 try:
     from pkgutil import resolve_name
@@ -10,8 +13,11 @@ except ImportError:
 import click
 import twisted.trial.reporter
 
+from virtue import _cache, _client, _history, _server, _shard, _watch
+from virtue._select import Selection
+from virtue.locators import ObjectLocator
 from virtue.reporters import ComponentizedReporter
-from virtue.runner import run
+from virtue.runner import collect as _collect, run
 
 
 class _Reporter(click.ParamType):
@@ -43,7 +49,173 @@ class _Reporter(click.ParamType):
         return Reporter()
 
 
+class _Selection(click.ParamType):
+    name = "expression"
+
+    def convert(self, value, param, ctx):
+        if not isinstance(value, str):
+            return value
+
+        try:
+            return Selection.parse(value)
+        except ValueError as err:
+            raise click.BadParameter(str(err)) from err
+
+
+class _Shard(click.ParamType):
+    name = "I/N"
+
+    def convert(self, value, param, ctx):
+        if not isinstance(value, str):
+            return value
+
+        try:
+            return _shard.parse(value)
+        except ValueError as err:
+            raise click.BadParameter(str(err)) from err
+
+
+def _megabytes(context, parameter, value):
+    """
+    Convert a number of megabytes to bytes.
+    """
+    return None if value is None else value * 2**20
+
+
+def _names_in(file):
+    """
+    The test names in a file, one per line, ignoring blanks and comments.
+    """
+    for line in file:
+        name = line.strip()
+        if name and not name.startswith("#"):
+            yield name
+
+
+class _Main(click.Command):
+    """
+    The main command, which runs tests, but which has subcommands too.
+
+    Subcommands are only recognized as the very first argument, and take
+    precedence over tests with the same name.
+    """
+
+    def __init__(self, *args, subcommands=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.subcommands = {each.name: each for each in subcommands}
+
+    def main(self, args=None, prog_name=None, **kwargs):
+        args = sys.argv[1:] if args is None else list(args)
+        subcommand = self.subcommands.get(args[0]) if args else None
+        if subcommand is None:
+            return super().main(args, prog_name, **kwargs)
+        prog_name = f"{prog_name or 'virtue'} {subcommand.name}"
+        return subcommand.main(args[1:], prog_name, **kwargs)
+
+
+@click.command(context_settings=dict(help_option_names=["-h", "--help"]))  # type: ignore[arg-type]
+@click.argument(
+    "report",
+    type=click.Choice(["slowest", "slowing", "flaky"]),
+    required=False,
+)
+@click.option(
+    "--cache-dir",
+    default=_cache.DEFAULT_DIRECTORY,
+    show_default=True,
+    type=click.Path(file_okay=False),
+    help="the directory in which history was recorded.",
+)
+@click.option(
+    "--runs",
+    default=20,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="how many of the latest runs to consider.",
+)
+@click.option(
+    "--limit",
+    default=10,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="how many tests to show in each report.",
+)
+@click.pass_context
+def history(context, report, cache_dir, runs, limit):
+    """
+    Report on the history of past runs recorded with `virtue --history`.
+
+    Shows the slowest tests, the tests which are getting slower, and the
+    tests which are flaky, or just the given one of those reports.
+    """
+    store = _history.History.in_directory(cache_dir)
+    if not Path(store.path).exists():
+        context.fail(f"No history has been recorded in {cache_dir}.")
+
+    reports = (
+        [report] if report is not None else ["slowest", "slowing", "flaky"]
+    )
+    for each in reports:
+        rows = getattr(store, each)(runs=runs, limit=limit)
+        click.echo(_REPORTS[each])
+        for row in rows:
+            click.echo(_format_history(each, *row))
+        if not rows:
+            click.echo("  (none)")
+    store.close()
+
+
+_REPORTS = {
+    "slowest": "Slowest tests (total, setUp, tearDown):",
+    "slowing": "Tests getting slower (before, after):",
+    "flaky": "Flaky tests (failure rate):",
+}
+
+
+def _format_history(report, name, *values):
+    if report == "flaky":
+        (rate,) = values
+        return f"  {rate:7.1%}  {name}"
+    times = "  ".join(f"{value or 0:8.3f}s" for value in values)
+    return f"  {times}  {name}"
+
+
 @click.command(context_settings=dict(help_option_names=["-h", "--help"]))  # type: ignore[arg-type]
+@click.option(
+    "--socket",
+    "path",
+    default=_client.socket_path,
+    show_default=_client.DEFAULT_SOCKET,
+    type=click.Path(dir_okay=False),
+    help=(
+        "the Unix socket to listen on, which defaults to the value of "
+        "the VIRTUE_SERVER environment variable if it's set."
+    ),
+)
+@click.pass_context
+def serve(context, path):
+    """
+    Serve test runs from an interpreter which has already imported virtue.
+
+    Each run of `virtue` from this directory (or wherever the
+    VIRTUE_SERVER environment variable points at the same socket) is
+    forwarded to this server, which runs it in a fresh child process, so
+    that only the tests themselves need to be imported, until stopped.
+    """
+    click.echo(f"Serving test runs on {path}.", err=True)
+    try:
+        _server.serve(path=path, main=main)
+    except OSError as error:
+        context.fail(str(error))
+    except KeyboardInterrupt:
+        pass
+
+
+@click.command(
+    cls=_Main,
+    subcommands=[history, serve],
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
 @click.version_option(prog_name="virtue")
 @click.option(
     "--reporter",
@@ -68,14 +240,372 @@ class _Reporter(click.ParamType):
         "repeated to stop after that many non-successes."
     ),
 )
+@click.option(
+    "-j",
+    "--jobs",
+    default=1,
+    type=click.IntRange(min=1),
+    help="run tests across this many worker processes.",
+)
+@click.option(
+    "--subinterpreters",
+    is_flag=True,
+    help=(
+        "run tests across worker subinterpreters (on Python 3.13 and later) "
+        "rather than processes, falling back to processes for tests which "
+        "need extension modules that don't support them, or when given a "
+        "timeout."
+    ),
+)
+@click.option(
+    "--threads",
+    default=1,
+    type=click.IntRange(min=1),
+    help=(
+        "run tests across this many threads, on free-threaded builds of "
+        "Python (and otherwise one at a time). Test classes with a true "
+        "thread_unsafe attribute are run on their own."
+    ),
+)
+@click.option(
+    "--recycle-after",
+    default=None,
+    type=click.IntRange(min=1),
+    metavar="MODULES",
+    help=(
+        "replace each worker process with a fresh one before it runs tests "
+        "from more than this many modules. Tests are then always run in "
+        "worker processes, even without --jobs."
+    ),
+)
+@click.option(
+    "--max-rss",
+    default=None,
+    type=click.IntRange(min=1),
+    callback=_megabytes,
+    metavar="MB",
+    help=(
+        "replace each worker process with a fresh one once it uses more "
+        "than this much memory. Tests are then always run in worker "
+        "processes, even without --jobs."
+    ),
+)
+@click.option(
+    "--memory-limit",
+    default=None,
+    type=click.IntRange(min=1),
+    callback=_megabytes,
+    metavar="MB",
+    help=(
+        "limit each worker process' address space to this much memory. "
+        "Tests are then always run in worker processes, even without --jobs."
+    ),
+)
+@click.option(
+    "--fork",
+    is_flag=True,
+    help=(
+        "run each test in a child process of its own, forked once its "
+        "module and class fixtures are set up, so that whatever it changes "
+        "is gone once it's done."
+    ),
+)
+@click.option(
+    "--concurrency",
+    default=1,
+    type=click.IntRange(min=1),
+    help=(
+        "run this many tests at once from test classes with a true "
+        "concurrent attribute, on a shared event loop (awaiting their "
+        "coroutines). Needs Python 3.11 or later."
+    ),
+)
+@click.option(
+    "--timeout",
+    default=None,
+    type=click.FloatRange(min=0, min_open=True),
+    metavar="SECONDS",
+    help=(
+        "interrupt any test which runs for longer than this, reporting it "
+        "as an error along with what every thread was doing. Tests (or "
+        "their classes) with a timeout attribute are given that long "
+        "instead."
+    ),
+)
+@click.option(
+    "-k",
+    "--select",
+    default=None,
+    type=_Selection(),
+    help=(
+        "only run tests whose IDs match this expression, made up of words "
+        "combined with and, or, not and parentheses. Words with glob "
+        "wildcards (*?[) must match the whole test ID, while other words "
+        "need only appear somewhere within it."
+    ),
+)
+@click.option(
+    "--shard",
+    default=None,
+    type=_Shard(),
+    help=(
+        "only run the I-th of N shards of the tests, e.g. to split them "
+        "across machines. Shards are balanced by how many tests each has, "
+        "unless given --shard-durations."
+    ),
+)
+@click.option(
+    "--shard-durations",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+    help=(
+        "a file of test durations from a past run (e.g. durations.json "
+        "from a cache directory), shared by every shard, used to balance "
+        "shards by how long they take."
+    ),
+)
+@click.option(
+    "--discovery-jobs",
+    default=1,
+    type=click.IntRange(min=1),
+    help=(
+        "import the test modules found in packages across this many worker "
+        "processes while looking for tests."
+    ),
+)
+@click.option(
+    "--static",
+    is_flag=True,
+    help=(
+        "locate tests in packages by parsing test modules rather than "
+        "importing them, importing them only once their tests are run."
+    ),
+)
+@click.option(
+    "--exclude",
+    multiple=True,
+    metavar="GLOB",
+    help=(
+        "skip modules or packages whose fully qualified names match this "
+        "pattern when looking for tests in a package. May be repeated."
+    ),
+)
+@click.option(
+    "--include",
+    multiple=True,
+    metavar="GLOB",
+    help=(
+        "only look for tests in modules or packages whose fully qualified "
+        "names match this pattern when looking for tests in a package. "
+        "May be repeated."
+    ),
+)
+@click.option(
+    "--cache-discovery",
+    is_flag=True,
+    help=(
+        "remember which tests were located in each module of a package, "
+        "skipping modules which haven't changed on later runs."
+    ),
+)
+@click.option(
+    "--cache-dir",
+    default=_cache.DEFAULT_DIRECTORY,
+    show_default=True,
+    type=click.Path(file_okay=False),
+    help=(
+        "the directory in which to keep state between runs, such as how "
+        "long each test took. It's only used if it exists already, if it's "
+        "given explicitly or if an option which needs it is."
+    ),
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="don't read or write any state kept between runs.",
+)
+@click.option(
+    "--history",
+    "record_history",
+    is_flag=True,
+    help=(
+        "record each test's outcome and duration in a database in the "
+        "cache directory, which `virtue history` reports on."
+    ),
+)
+@click.option(
+    "--failed-first",
+    is_flag=True,
+    help=(
+        "run the tests which failed (or errored) the last time they ran "
+        "before any others."
+    ),
+)
+@click.option(
+    "--last-failed",
+    is_flag=True,
+    help=(
+        "run only the tests which failed (or errored) the last time they "
+        "ran, or every test if none did."
+    ),
+)
+@click.option(
+    "--record-impact",
+    is_flag=True,
+    help=(
+        "note down which functions each test calls, in the cache directory, "
+        "for use by --affected-by in later runs."
+    ),
+)
+@click.option(
+    "--affected-by",
+    type=click.File(),
+    metavar="DIFF",
+    help=(
+        "a unified diff (e.g. from git diff), or a list of changed files, "
+        "one per line, from a file (or - for stdin). Only the tests which "
+        "the changes may affect are run, going by the functions they "
+        "called when last run with --record-impact. Tests which have "
+        "never been recorded are always run."
+    ),
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help=(
+        "after running the tests, keep watching for changes to Python files "
+        "in the current directory, and run the tests from changed modules "
+        "(or modules which import from them) again, without restarting."
+    ),
+)
+@click.option(
+    "--collect",
+    is_flag=True,
+    help="list the tests which would be run, without running them.",
+)
+@click.option(
+    "--tests-from",
+    type=click.File(),
+    help=(
+        "a file (or - for stdin) containing additional tests to run, "
+        "one per line."
+    ),
+)
 @click.argument("tests", nargs=-1)
 @click.pass_context
-def main(context, **kwargs):
+def main(
+    context,
+    *,
+    select,
+    shard,
+    shard_durations,
+    discovery_jobs,
+    static,
+    exclude,
+    include,
+    cache_discovery,
+    cache_dir,
+    no_cache,
+    record_history,
+    affected_by,
+    watch,
+    collect,
+    tests_from,
+    **kwargs,
+):
     """
     `virtue` discovers and runs tests found in the given objects.
 
     Provide it with one or more tests (packages, modules or objects) to run.
 
+    Run `virtue history --help` for reporting on the history of past runs,
+    or `virtue serve --help` for running tests from a warm interpreter.
+
     """
-    result = run(**kwargs)
+    processes = (
+        kwargs["jobs"] > 1
+        or kwargs["fork"]
+        or any(
+            kwargs[each] is not None
+            for each in ("recycle_after", "max_rss", "memory_limit")
+        )
+    )
+    if processes and kwargs["threads"] > 1:
+        raise click.BadOptionUsage(
+            "threads",
+            "--threads can't be combined with worker processes.",
+        )
+    if tests_from is not None:
+        kwargs["tests"] = [*kwargs["tests"], *_names_in(tests_from)]
+
+    needing_cache = [
+        option
+        for option, given in [
+            ("--cache-discovery", cache_discovery),
+            ("--history", record_history),
+            ("--failed-first", kwargs["failed_first"]),
+            ("--last-failed", kwargs["last_failed"]),
+            ("--record-impact", kwargs["record_impact"]),
+            ("--affected-by", affected_by is not None),
+        ]
+        if given
+    ]
+    if no_cache:
+        if needing_cache:
+            raise click.BadOptionUsage(
+                "no_cache",
+                f"--no-cache can't be combined with {needing_cache[0]}.",
+            )
+        cache_dir = None
+    elif not (
+        needing_cache
+        or Path(cache_dir).is_dir()
+        or context.get_parameter_source("cache_dir")
+        is not click.core.ParameterSource.DEFAULT
+    ):
+        cache_dir = None
+
+    locator = ObjectLocator(
+        static=static,
+        jobs=discovery_jobs,
+        select=select,
+        exclude=exclude,
+        include=include,
+        cache=cache_dir if cache_discovery else None,
+    )
+    if collect:
+        found = False
+        for loader in _collect(
+            tests=kwargs["tests"],
+            locator=locator,
+            shard=shard,
+            shard_durations=shard_durations,
+            cache=cache_dir,
+            affected_by=affected_by,
+        ):
+            click.echo(loader.id)
+            found = True
+        context.exit(not found)
+
+    options = dict(
+        locator=locator,
+        shard=shard,
+        shard_durations=shard_durations,
+        cache=cache_dir,
+        history=record_history,
+    )
+    result = run(affected_by=affected_by, **options, **kwargs)
+    if watch:
+        tests, reporter = kwargs.pop("tests"), kwargs.pop("reporter")
+        with suppress(KeyboardInterrupt):
+            for changed in _watch.watch([Path.cwd()]):
+                forgotten, unknown = _watch.forget(changed)
+                rerun = _watch.affected(tests, forgotten, unknown)
+                if rerun:
+                    result = run(
+                        tests=rerun,
+                        reporter=type(reporter)(),
+                        **options,
+                        **kwargs,
+                    )
     context.exit(not result.testsRun or not result.wasSuccessful())
@@ -0,0 +1,105 @@
+"""
+A thin client, which runs tests in a ``virtue serve`` server if one is up.
+
+Nothing outside of the standard library is imported here unless there's no
+server to forward a run to, so that forwarding one is quick.
+"""
+
+import json
+import os
+import signal
+import socket
+import struct
+import sys
+
+#: Where a server listens, unless told otherwise. It's within the default
+#: cache directory (which isn't imported from ``virtue._cache``, as doing so
+#: would import attrs).
+DEFAULT_SOCKET = os.path.join(".virtue_cache", "server.sock")  # noqa: PTH118
+
+#: How numbers (lengths, process IDs and exit statuses) are sent
+INT = struct.Struct("!i")
+
+
+def socket_path():
+    """
+    The socket a server is listening on, if there is one.
+
+    It's taken from the ``VIRTUE_SERVER`` environment variable, if set.
+    """
+    return os.environ.get("VIRTUE_SERVER", DEFAULT_SOCKET)
+
+
+def receive_int(connection):
+    """
+    Receive a number, or None if the connection is closed first.
+    """
+    data = b""
+    while len(data) < INT.size:
+        chunk = connection.recv(INT.size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    (value,) = INT.unpack(data)
+    return value
+
+
+def forward(args, path=None):
+    """
+    Run ``virtue`` with the given arguments in a server.
+
+    The server is given our working directory, environment, `sys.path` and
+    standard streams, which it writes its output to directly.
+
+    Returns:
+
+        the run's exit status, or None if no server is listening
+
+    """
+    path = socket_path() if path is None else path
+    if not os.path.exists(path):  # noqa: PTH110
+        return None
+
+    connection = socket.socket(socket.AF_UNIX)
+    try:
+        connection.connect(path)
+    except OSError:
+        connection.close()
+        return None
+
+    with connection:
+        request = json.dumps(
+            dict(
+                args=args,
+                cwd=os.getcwd(),  # noqa: PTH109
+                path=sys.path,
+                environ=dict(os.environ),
+            ),
+        ).encode()
+        socket.send_fds(connection, [INT.pack(len(request))], [0, 1, 2])
+        connection.sendall(request)
+
+        pid = receive_int(connection)
+        while pid is not None:
+            try:
+                status = receive_int(connection)
+            except KeyboardInterrupt:
+                os.kill(pid, signal.SIGINT)
+            else:
+                return 1 if status is None else status
+        return 1
+
+
+def main():
+    """
+    Run ``virtue``, in a server if one is listening, otherwise right here.
+    """
+    args = sys.argv[1:]
+    if args[:1] != ["serve"]:
+        status = forward(args)
+        if status is not None:
+            sys.exit(status)
+
+    from virtue import _cli  # noqa: PLC0415
+
+    _cli.main()  # type: ignore[misc]
@@ -0,0 +1,268 @@
+"""
+Running asynchronous tests concurrently, on a shared event loop.
+
+`unittest.IsolatedAsyncioTestCase` runs each test on a loop of its own,
+one after another, even though most such tests spend their time waiting.
+Tests from classes with a true ``concurrent`` attribute are instead run
+alongside each other (a limited number at once) on one loop, each test's
+``setUp``, test method, ``tearDown`` and cleanups being awaited if they
+return coroutines (or Deferreds).
+
+What each test reports is held on to until it's done, and then reported
+in the order its class' tests were loaded in, so that reporters see the
+same thing they would had the tests been run one at a time.
+
+Trial's tests are fired by Twisted's reactor, so are only run concurrently
+when it's the asyncio one, whose loop they then share.
+
+This relies on `asyncio.Runner` and on how `unittest.TestCase.run` works
+internally, both as of Python 3.11, and so isn't available before that.
+"""
+
+from __future__ import annotations
+
+from functools import partial
+import asyncio
+import inspect
+import sys
+import time
+
+from twisted.internet.defer import Deferred
+
+try:
+    from unittest.case import _addSkip, _Outcome  # type: ignore[attr-defined]
+except ImportError:  # Python < 3.11
+    _addSkip = _Outcome = None
+
+
+def available():
+    """
+    Whether tests can be run concurrently here.
+    """
+    return _addSkip is not None and hasattr(asyncio, "Runner")
+
+
+def eligible(case):
+    """
+    Whether a test may be run concurrently with others from its class.
+
+    Trial's tests which are expected to fail (marked ``todo``) never are.
+    """
+    if not getattr(type(case), "concurrent", False):
+        return False
+    get_todo = getattr(case, "getTodo", None)
+    if get_todo is None:
+        return True
+    return get_todo() is None and _reactor_loop() is not None
+
+
+def _reactor_loop():
+    """
+    The event loop Twisted's reactor runs on, if it's the asyncio one.
+    """
+    reactor = sys.modules.get("twisted.internet.reactor")
+    return getattr(reactor, "_asyncioEventloop", None)
+
+
+class Batch:
+    """
+    Tests from one class, to be run concurrently, at most so many at once.
+
+    I stand in for them within a suite, which sets up their class (and
+    module) for me, as though I were one of them.
+    """
+
+    def __init__(self, cases, concurrency):
+        self.cases = cases
+        self._concurrency = concurrency
+
+    @property  # type: ignore[misc]
+    def __class__(self):
+        return type(self.cases[0])
+
+    def __repr__(self):
+        return f"<{self.id()} ({len(self.cases)} tests, concurrently)>"
+
+    def id(self):
+        """
+        The fully qualified name of my tests' class.
+        """
+        cls = type(self.cases[0])
+        return f"{cls.__module__}.{cls.__qualname__}"
+
+    def __call__(self, result):
+        return self.run(result)
+
+    def run(self, result):
+        """
+        Run my tests, reporting on each of them in turn as they finish.
+        """
+        loop = _reactor_loop()
+        if loop is None:
+            with asyncio.Runner() as runner:
+                runner.run(self._run(result))
+        else:
+            loop.run_until_complete(self._run(result))
+        return result
+
+    async def _run(self, result):
+        limit = asyncio.Semaphore(self._concurrency)
+
+        async def run(case, held):
+            async with limit:
+                if not result.shouldStop:
+                    await _run(case, held)
+
+        loop = asyncio.get_running_loop()
+        running = []
+        for case in self.cases:
+            held = _Held(result)
+            task = loop.create_task(
+                run(case, held),
+                context=getattr(case, "_asyncioTestContext", None),
+            )
+            running.append((task, held))
+        for task, held in running:
+            await task
+            held.release()
+
+
+class _Held:
+    """
+    A result which holds on to what it's told, to tell another one later.
+
+    It has (only) the methods the other result does.
+    """
+
+    def __init__(self, result):
+        self._result = result
+        self._calls = []
+
+    @property
+    def shouldStop(self):
+        return self._result.shouldStop
+
+    @property
+    def failfast(self):
+        return getattr(self._result, "failfast", False)
+
+    def __getattr__(self, name):
+        if callable(getattr(self._result, name, None)):
+            return partial(self._hold, name)
+        raise AttributeError(name)
+
+    def _hold(self, name, *args):
+        self._calls.append((name, args))
+
+    def release(self):
+        """
+        Tell the other result everything we were told.
+        """
+        calls, self._calls = self._calls, []
+        for name, args in calls:
+            getattr(self._result, name)(*args)
+
+
+async def _resolve(value):
+    """
+    Wait for a value to be ready, if it's something which can be waited on.
+    """
+    if isinstance(value, Deferred):
+        value = value.asFuture(asyncio.get_running_loop())
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+async def _phase(case, result, phase, *calls):
+    """
+    Call each of some parts of a test, telling the result how long it took.
+    """
+    started = time.perf_counter()
+    try:
+        for call in calls:
+            if call is not None:
+                await _resolve(call())
+    finally:
+        add_phase_duration = getattr(result, "addPhaseDuration", None)
+        if add_phase_duration is not None:
+            add_phase_duration(case, phase, time.perf_counter() - started)
+
+
+def _skip(case, method):
+    """
+    Whether (and why) a test is skipped.
+    """
+    get_skip = getattr(case, "getSkip", None)  # trial's, which also checks
+    if get_skip is not None:  # for the stdlib's markers
+        return get_skip()
+    for each in type(case), method:
+        if getattr(each, "__unittest_skip__", False):
+            return True, getattr(each, "__unittest_skip_why__", "")
+    return False, None
+
+
+async def _run(case, result):
+    """
+    Run a test, just as `unittest.TestCase.run` would, but awaiting it.
+    """
+    result.startTest(case)
+    try:
+        method = getattr(case, case._testMethodName)
+        skipped, why = _skip(case, method)
+        if skipped:
+            _addSkip(result, case, why)
+            return
+
+        expecting_failure = getattr(
+            case,
+            "__unittest_expecting_failure__",
+            False,
+        ) or getattr(method, "__unittest_expecting_failure__", False)
+        outcome = _Outcome(result)
+        started = time.perf_counter()
+        try:
+            case._outcome = outcome
+            with outcome.testPartExecutor(case):
+                await _phase(
+                    case,
+                    result,
+                    "setUp",
+                    case.setUp,
+                    getattr(case, "asyncSetUp", None),
+                )
+            if outcome.success:
+                outcome.expecting_failure = expecting_failure
+                with outcome.testPartExecutor(case):
+                    await _resolve(method())
+                outcome.expecting_failure = False
+                with outcome.testPartExecutor(case):
+                    await _phase(
+                        case,
+                        result,
+                        "tearDown",
+                        getattr(case, "asyncTearDown", None),
+                        case.tearDown,
+                    )
+            while case._cleanups:
+                function, args, kwargs = case._cleanups.pop()
+                with outcome.testPartExecutor(case):
+                    await _resolve(function(*args, **kwargs))
+
+            add_duration = getattr(case, "_addDuration", None)  # 3.12+
+            if add_duration is not None:
+                add_duration(result, time.perf_counter() - started)
+
+            if not outcome.success:
+                return
+            if not expecting_failure:
+                result.addSuccess(case)
+            elif outcome.expectedFailure:
+                case._addExpectedFailure(result, outcome.expectedFailure)
+            else:
+                case._addUnexpectedSuccess(result)
+        finally:
+            outcome.expectedFailure = None  # break the reference cycle
+            case._outcome = None
+    finally:
+        result.stopTest(case)
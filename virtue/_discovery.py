@@ -0,0 +1,125 @@
+"""
+Locating tests in the modules of a package across worker processes.
+
+Workers import the modules they're given and send back only the IDs of the
+tests in them, from which the parent creates lazy loaders, so that the
+parent itself never imports them.
+
+Tests are located here regardless of any selection expression, so that
+they can be cached, and are only then filtered.
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from importlib import import_module
+import sys
+
+from virtue._cache import dependencies_of
+from virtue.loaders import LazyAttributeLoader, ModuleLoader
+
+_locator = None
+
+
+def _initialize(locator):
+    global _locator  # noqa: PLW0603
+    _locator = locator
+
+
+def _importable(cls):
+    """
+    Whether a class can be found again by its module and qualified name.
+    """
+    module = sys.modules.get(cls.__module__)
+    try:
+        return reduce(getattr, cls.__qualname__.split("."), module) is cls
+    except AttributeError:
+        return False
+
+
+def _locate(name, root):
+    """
+    Locate the tests in the module with the given name, within a worker.
+
+    Returns None if the tests can't be sent back to the parent (in which
+    case it should locate them itself).
+    """
+    try:
+        module = import_module(name)
+        loaders = list(_locator._locate_in_module(module, selecting=False))
+    except Exception:  # noqa: BLE001
+        return None
+
+    tests = []
+    for loader in loaders:
+        if not _importable(loader.cls):
+            return None
+        tests.append(
+            (loader.cls.__module__, loader.cls.__qualname__, loader.attribute),
+        )
+    return tests, set(dependencies_of(loaders, root))
+
+
+def _must_import(loaders):
+    return len(loaders) == 1 and isinstance(loaders[0], ModuleLoader)
+
+
+def _locate_here(loaders, dependencies, root):
+    (loader,) = loaders
+    module = loader.module.load()
+    loaders = list(loader.locator._locate_in_module(module, selecting=False))
+    return loaders, {*dependencies, *dependencies_of(loaders, root)}
+
+
+def locate_serially(located, root):
+    """
+    Import and locate the tests in any modules which need it.
+
+    Takes (and yields) the modules, loaders and dependencies found by
+    `virtue.locators.ObjectLocator.locate_in_package`.
+    """
+    for module, loaders, dependencies in located:
+        if _must_import(loaders):
+            loaders, dependencies = _locate_here(loaders, dependencies, root)
+        yield module, loaders, dependencies
+
+
+def locate(located, locator, root, jobs):
+    """
+    Import and locate the tests in any modules which need it, in workers.
+
+    Results are yielded in the same order as `locate_serially` would.
+    """
+    executor = ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_initialize,
+        initargs=(locator,),
+    )
+    try:
+        pending = deque()
+        for module, loaders, dependencies in located:
+            future = None
+            if _must_import(loaders):
+                future = executor.submit(_locate, module.name, root)
+            pending.append((module, loaders, dependencies, future))
+
+        while pending:
+            module, loaders, dependencies, future = pending.popleft()
+            if future is not None:
+                result = future.result()
+                if result is None:
+                    loaders, dependencies = _locate_here(
+                        loaders,
+                        dependencies,
+                        root,
+                    )
+                else:
+                    tests, found = result
+                    loaders = [
+                        LazyAttributeLoader(module=m, cls=cls, attribute=a)
+                        for m, cls, a in tests
+                    ]
+                    dependencies = {*dependencies, *found}
+            yield module, loaders, dependencies
+    finally:
+        executor.shutdown(cancel_futures=True)
@@ -0,0 +1,128 @@
+"""
+Running each test in a forked child process of its own.
+
+Module and class fixtures are still set up (once) in the process running
+the suite, but each test is then run by a copy of it, so that whatever a
+test changes (global state, say) is gone once it's done, without paying
+for setting up its fixtures again.
+
+The garbage collector is frozen before forking, so that children collecting
+garbage don't touch (and so copy) objects they share with their parent.
+
+What a test reports is sent back to its parent as events, just as from a
+worker (see ``virtue._parallel``). A child which dies has its test reported
+as an error.
+"""
+
+from contextlib import suppress
+from unittest.suite import _ErrorHolder  # type: ignore[attr-defined]
+import gc
+import multiprocessing
+import os
+import signal
+import sys
+import traceback
+import warnings
+
+
+def available():
+    """
+    Whether tests can be forked off here.
+    """
+    return hasattr(os, "fork")
+
+
+def isolate(case):
+    """
+    Make a test run in a child process of its own, if it's a test that can.
+    """
+    if available() and hasattr(case, "_callTestMethod"):
+        run = case.run
+        case.run = lambda result=None: _run(case, run, result)
+
+
+def _run(case, run, result):
+    """
+    Run a test in a forked child process, reporting on it as it reports.
+    """
+    from virtue._parallel import (  # noqa: PLC0415 (it imports us, via loaders)
+        _portable_exc_info,
+        replay,
+    )
+
+    if result is None:  # no one to report to, so nothing to send back
+        return run(result)
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    receive, send = multiprocessing.Pipe(duplex=False)
+    pid = None
+    gc.freeze()
+    try:
+        with warnings.catch_warnings():
+            # Tests may have started threads, but they're left behind anyhow.
+            warnings.simplefilter("ignore", DeprecationWarning)
+            pid = os.fork()
+    finally:
+        if pid is None:  # we couldn't
+            receive.close()
+            send.close()
+        if pid != 0:  # the child's objects stay frozen
+            gc.unfreeze()
+    if pid == 0:
+        receive.close()
+        _child(case, run, send)
+    send.close()
+
+    events = []
+    try:
+        with receive:
+            while True:
+                try:
+                    kind, sent = receive.recv()
+                except EOFError:
+                    break
+                if kind == "events":
+                    events.extend(sent)
+        _, status = os.waitpid(pid, 0)
+    except BaseException:
+        with suppress(OSError):
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        raise
+
+    if not any(name == "stopTest" for name, *_ in events):
+        code = os.waitstatus_to_exitcode(status)
+        error = RuntimeError(
+            f"Test process exited unexpectedly (exit code {code}).",
+        )
+        exc_info = _portable_exc_info(case, (RuntimeError, error, None))
+        events += [
+            ("startTest", 0),
+            ("addError", 0, exc_info),
+            ("stopTest", 0),
+        ]
+    for name, ref, *args in events:
+        replay(result, name, case if ref == 0 else _ErrorHolder(ref), *args)
+    return result
+
+
+def _child(case, run, connection):
+    """
+    Run a test within a forked child, sending what it reports, then exit.
+    """
+    from virtue._parallel import _Collector  # noqa: PLC0415 (it imports us, via loaders)
+
+    status = 1
+    try:
+        collector = _Collector(send=connection.send)
+        collector.indices[id(case)] = 0
+        run(collector)
+        collector.flush()
+        status = 0
+    except BaseException:  # noqa: BLE001
+        traceback.print_exc()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(status)
@@ -0,0 +1,228 @@
+"""
+A history of past runs, kept in a SQLite database.
+
+Each test's outcome and duration (along with how much of it was spent in
+``setUp`` and ``tearDown``) is written as soon as it finishes, so that
+even a run which is killed part way through leaves behind what it saw.
+Test IDs are stored once each, and referred to by number elsewhere.
+"""
+
+from pathlib import Path
+import sqlite3
+import time
+
+from attrs import define, field
+
+from virtue._cache import DEFAULT_DIRECTORY, make_directory
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    finished REAL
+);
+CREATE TABLE IF NOT EXISTS tests (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS results (
+    run INTEGER NOT NULL REFERENCES runs,
+    test INTEGER NOT NULL REFERENCES tests,
+    outcome INTEGER NOT NULL,
+    duration REAL,
+    set_up REAL,
+    tear_down REAL
+);
+CREATE INDEX IF NOT EXISTS results_by_test ON results (test, run);
+"""
+
+_SLOWEST = """
+WITH recent AS (
+    SELECT * FROM results
+    WHERE run > (SELECT MAX(id) - ? FROM runs) AND duration IS NOT NULL
+)
+SELECT name, AVG(duration), AVG(set_up), AVG(tear_down)
+FROM recent JOIN tests ON tests.id = recent.test
+GROUP BY test ORDER BY AVG(duration) DESC LIMIT ?
+"""
+
+_SLOWING = """
+WITH recent AS (
+    SELECT run > (SELECT MAX(id) - ? FROM runs) AS newer, * FROM results
+    WHERE run > (SELECT MAX(id) - ? FROM runs) AND duration IS NOT NULL
+)
+SELECT
+    name,
+    AVG(CASE WHEN NOT newer THEN duration END) AS before,
+    AVG(CASE WHEN newer THEN duration END) AS after
+FROM recent JOIN tests ON tests.id = recent.test
+GROUP BY test HAVING after > before
+ORDER BY after / before DESC LIMIT ?
+"""
+
+_FLAKY = """
+WITH recent AS (
+    SELECT * FROM results
+    WHERE run > (SELECT MAX(id) - ? FROM runs) AND outcome != ?
+)
+SELECT name, AVG(outcome IN (?, ?)) AS rate
+FROM recent JOIN tests ON tests.id = recent.test
+GROUP BY test HAVING rate > 0 AND rate < 1
+ORDER BY ABS(rate - 0.5), name LIMIT ?
+"""
+
+#: Outcomes, in the order they're numbered in the database
+OUTCOMES = (
+    "success",
+    "failure",
+    "error",
+    "skip",
+    "expected failure",
+    "unexpected success",
+)
+_FAILED = tuple(OUTCOMES.index(each) for each in ("failure", "error"))
+_SKIPPED = OUTCOMES.index("skip")
+
+
+@define
+class History:
+    """
+    A database of the outcomes of past test runs.
+
+    Arguments:
+
+        path (str):
+
+            the file the database is in
+
+    """
+
+    path: str = field(converter=str)
+
+    _connection: sqlite3.Connection | None = field(default=None, repr=False)
+    _test_ids: dict = field(factory=dict, repr=False)
+
+    @classmethod
+    def in_directory(cls, directory=DEFAULT_DIRECTORY, **kwargs):
+        """
+        Keep history within the given cache directory.
+        """
+        return cls(path=Path(directory) / "history.sqlite3", **kwargs)
+
+    @property
+    def _db(self):
+        if self._connection is None:
+            make_directory(Path(self.path).parent)
+            connection = sqlite3.connect(self.path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def close(self):
+        """
+        Close the database, if it was opened.
+        """
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def start_run(self):
+        """
+        Record that a run started, returning its number.
+        """
+        with self._db as db:
+            cursor = db.execute(
+                "INSERT INTO runs (started) VALUES (?)",
+                (time.time(),),
+            )
+        return cursor.lastrowid
+
+    def finish_run(self, run):
+        """
+        Record that the given run finished.
+        """
+        with self._db as db:
+            db.execute(
+                "UPDATE runs SET finished = ? WHERE id = ?",
+                (time.time(), run),
+            )
+
+    def _test_id(self, name):
+        id = self._test_ids.get(name)
+        if id is None:
+            db = self._db
+            db.execute(
+                "INSERT OR IGNORE INTO tests (name) VALUES (?)",
+                (name,),
+            )
+            (id,) = db.execute(
+                "SELECT id FROM tests WHERE name = ?",
+                (name,),
+            ).fetchone()
+            self._test_ids[name] = id
+        return id
+
+    def record(
+        self,
+        run,
+        name,
+        outcome,
+        *,
+        duration=None,
+        set_up=None,
+        tear_down=None,
+    ):
+        """
+        Record the result of a test within the given run.
+
+        The outcome should be one of `OUTCOMES`.
+        """
+        with self._db as db:
+            db.execute(
+                "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    run,
+                    self._test_id(name),
+                    OUTCOMES.index(outcome),
+                    duration,
+                    set_up,
+                    tear_down,
+                ),
+            )
+
+    def slowest(self, runs=20, limit=10):
+        """
+        The tests which took longest on average over recent runs.
+
+        Returns each test's name along with its average duration, and the
+        average time spent in ``setUp`` and ``tearDown``.
+        """
+        return self._db.execute(_SLOWEST, (runs, limit)).fetchall()
+
+    def slowing(self, runs=20, limit=10):
+        """
+        The tests whose duration grew the most over recent runs.
+
+        Returns each test's name along with its average duration in the
+        older and newer halves of those runs, for tests which got slower.
+        """
+        return self._db.execute(
+            _SLOWING,
+            (runs // 2, runs, limit),
+        ).fetchall()
+
+    def flaky(self, runs=20, limit=10):
+        """
+        The tests which both passed and failed over recent runs.
+
+        Returns each test's name along with the fraction of the runs it ran
+        in (i.e. wasn't skipped in) that it failed in, for the tests which
+        failed least consistently (i.e. whose failure rate is closest to a
+        half) first.
+        """
+        return self._db.execute(
+            _FLAKY,
+            (runs, _SKIPPED, *_FAILED, limit),
+        ).fetchall()
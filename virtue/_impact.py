@@ -0,0 +1,230 @@
+"""
+Finding out which code each test runs, and which code a change touches.
+
+While tests run, every function which is called is noted down (on Python
+3.12 and later with `sys.monitoring`, which stops reporting code we'll never
+note down, and elsewhere with a profile hook), and attributed to the test
+(or class or module fixture) that called it. Functions are identified by the
+source file they're in along with the range of lines they span, so that the
+lines changed by a diff can be mapped onto them.
+
+Only functions within the current directory are noted, as that's where the
+code being changed lives, and none of our own (other than our tests), as they
+run around every test. Neither is code run in other processes (which tests
+may start), so such code is treated as never having been called.
+"""
+
+import inspect
+import os
+import re
+import sys
+import threading
+
+#: Our own modules, which run around every test rather than being run by any
+_OURS = os.path.dirname(__file__)  # noqa: PTH120
+
+#: The `sys.monitoring` tool IDs we try to use, i.e. those not reserved for
+#: debuggers, coverage tools, profilers or optimizers
+_TOOL_IDS = (3, 4)
+
+_HUNK = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+\d+(?:,(\d+))? @@")
+
+
+class Tracer:
+    """
+    Note down which functions are called, until the notes are taken.
+    """
+
+    def __init__(self, root=None):
+        root = os.path.abspath(os.getcwd() if root is None else root)  # noqa: PTH100, PTH109
+        self._root = os.path.join(root, "")  # noqa: PTH118
+        self._called = set()
+        self._described = {}
+        self._tool = None
+        self._previous = None
+
+    def start(self):
+        """
+        Start noting down calls.
+        """
+        monitoring = getattr(sys, "monitoring", None)
+        tool = next(
+            (
+                each
+                for each in _TOOL_IDS
+                if monitoring is not None and monitoring.get_tool(each) is None
+            ),
+            None,
+        )
+        if tool is None:
+            self._previous = sys.getprofile(), threading.getprofile()
+            sys.setprofile(self._profile)
+            threading.setprofile(self._profile)
+            return
+
+        monitoring.use_tool_id(tool, "virtue")
+        event = monitoring.events.PY_START
+        monitoring.register_callback(tool, event, self._started)
+        monitoring.set_events(tool, event)
+        self._tool = tool
+
+    def stop(self):
+        """
+        Stop noting down calls.
+        """
+        if self._tool is None:
+            if self._previous is not None:
+                profile, threads = self._previous
+                sys.setprofile(profile)
+                threading.setprofile(threads)  # type: ignore[arg-type]
+                self._previous = None
+            return
+
+        monitoring = sys.monitoring  # type: ignore[attr-defined]
+        monitoring.set_events(self._tool, 0)
+        monitoring.register_callback(
+            self._tool,
+            monitoring.events.PY_START,
+            None,
+        )
+        monitoring.free_tool_id(self._tool)
+        self._tool = None
+
+    def _started(self, code, offset):
+        # Disabling (only for our tool) is permanent short of restarting
+        # every tool's events, so it's only done for code no tracer notes.
+        if not code.co_flags & inspect.CO_NEWLOCALS or _is_ours(code):
+            return sys.monitoring.DISABLE  # type: ignore[attr-defined]
+        self._called.add(code)
+        return None
+
+    def _profile(self, frame, event, arg):
+        if event == "call":
+            self._called.add(frame.f_code)
+
+    def take(self):
+        """
+        The functions called since the last time they were taken.
+
+        Each is a (path, first line, last line) tuple, with a path relative
+        to the current directory.
+        """
+        called, self._called = self._called, set()
+        functions = {self._describe(code) for code in called}
+        functions.discard(None)
+        return sorted(functions)  # type: ignore[type-var]
+
+    def _describe(self, code):
+        try:
+            return self._described[code]
+        except KeyError:
+            pass
+
+        # Module and class bodies run just once, on import, so aren't noted.
+        described = None
+        path = code.co_filename
+        if (
+            code.co_flags & inspect.CO_NEWLOCALS
+            and path.startswith(self._root)
+            and not _is_ours(code)
+        ):
+            path = path[len(self._root) :].replace(os.sep, "/")
+            first = code.co_firstlineno
+            last = max(
+                (line for _, _, line in code.co_lines() if line is not None),
+                default=first,
+            )
+            described = path, first, last
+        self._described[code] = described
+        return described
+
+
+def _is_ours(code):
+    """
+    Whether the given code is from one of our own modules.
+    """
+    return os.path.dirname(code.co_filename) == _OURS  # noqa: PTH120
+
+
+def changes_in(lines):
+    """
+    Find what changed from the lines of a unified diff, or a list of files.
+
+    Returns the changed lines of each changed file, as they were numbered
+    before the change, or None for files which changed entirely (which is
+    every file in a list of them). Paths are relative to the current
+    directory, just as ``git diff`` gives them when run from the top of a
+    repository.
+
+    Lines added by the diff (other than in place of removed ones) are taken
+    to change the lines on either side of them.
+    """
+    lines = [line.rstrip("\r\n") for line in lines]
+    if not any(_HUNK.match(line) for line in lines):
+        return {
+            _relative(line.strip()): None
+            for line in lines
+            if line.strip() and not line.lstrip().startswith("#")
+        }
+
+    changes = {}
+    path = changed = None
+    old = removing = adding = 0
+    replacing = False
+    for line in lines:
+        if removing > 0 or adding > 0:
+            if line.startswith("-"):
+                if changed is not None:
+                    changed.add(old)
+                old += 1
+                removing -= 1
+                replacing = True
+            elif line.startswith("+"):
+                if changed is not None and not replacing:
+                    changed.update((old - 1, old))
+                adding -= 1
+            elif line.startswith(" ") or not line:
+                old += 1
+                removing -= 1
+                adding -= 1
+                replacing = False
+            continue
+
+        match = _HUNK.match(line)
+        if match is not None:
+            start, removing, adding = match.groups(default="1")
+            old, removing, adding = int(start), int(removing), int(adding)
+            if not removing:  # the lines were added after the start line
+                old += 1
+        elif line.startswith("--- "):
+            path = _diff_path(line[4:])
+        elif line.startswith("+++ "):
+            if path is None:  # a new file
+                changes[_diff_path(line[4:])] = changed = None
+            else:
+                changed = changes.setdefault(path, set())
+    return changes
+
+
+def _diff_path(text):
+    """
+    The path to the file on one side of a diff, or None if it's missing.
+    """
+    path, _, _ = text.partition("\t")
+    path = path.strip()
+    if path == "/dev/null":
+        return None
+    if path.startswith(("a/", "b/")):
+        path = path[2:]
+    return _relative(path)
+
+
+def _relative(path):
+    """
+    A path, made relative to the current directory if it's within it.
+    """
+    if os.path.isabs(path):  # noqa: PTH117
+        relative = os.path.relpath(path)
+        if not relative.startswith(os.pardir):
+            path = relative
+    return path.replace(os.sep, "/")
@@ -0,0 +1,1408 @@
+"""
+Running tests across a pool of workers (processes, subinterpreters or threads).
+
+Tests are grouped into units (by default, one unit per test class, so that
+class-level fixtures run once) which are handed out to workers as each
+becomes idle, longest first when it's known how long tests take, so that
+no worker is left running a long unit after the others are done. Workers
+run each unit with a collector which turns every reporter call into a
+picklable event, and send those back to the parent process, which replays
+them into the real reporter in the order the tests were located, so that
+output matches that of a serial run.
+
+Workers may instead be subinterpreters (see ``virtue._subinterpreters``),
+which send events back the same way. Units whose tests need an extension
+module which can't be imported within a subinterpreter are run by worker
+processes instead.
+
+Or they may be threads (see ``virtue._threads``), which also send events back
+the same way, so that the reporter is only ever called from one thread.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from contextlib import suppress
+from multiprocessing.connection import wait
+from traceback import format_exception
+from unittest.case import (  # type: ignore[attr-defined]
+    _SubTest,
+    _subtest_msg_sentinel,
+)
+from unittest.suite import _ErrorHolder  # type: ignore[attr-defined]
+import ast
+import itertools
+import math
+import multiprocessing
+import os
+import pickle
+import signal
+import sys
+import tempfile
+import threading
+import time
+import warnings
+
+from twisted.python.modules import getModule as get_module
+import attrs
+
+from virtue import _subinterpreters, _threads, _timeout
+from virtue.loaders import LazyAttributeLoader, StreamingSuite, load_to_run
+
+try:
+    import faulthandler
+except ImportError:  # within a subinterpreter, which never needs it
+    faulthandler = None  # type: ignore[assignment]
+
+try:
+    import resource
+except ImportError:  # on Windows
+    resource = None  # type: ignore[assignment]
+
+#: How long a class' fixture may take, relative to its tests, to split it up
+_CHEAP_FIXTURE = 0.1
+
+#: How long to give a stuck worker to dump its threads' stacks
+_DUMP_WAIT = 0.1
+
+#: The results which count towards stopping a run early
+_UNSUCCESSFUL = frozenset({"addError", "addFailure", "addUnexpectedSuccess"})
+
+
+class _RemoteExcInfo(tuple):  # noqa: SLOT001
+    """
+    An exc_info tuple for an exception which was raised in a worker.
+
+    Its traceback is gone, but it remembers how it was formatted.
+    """
+
+    formatted: str
+
+    def __new__(cls, exc_type, exc_value, formatted):
+        self = super().__new__(cls, (exc_type, exc_value, None))
+        self.formatted = formatted
+        return self
+
+
+@attrs.frozen
+class _Repr:
+    """
+    A stand-in for an object which could not be sent between processes.
+    """
+
+    text: str
+
+    def __repr__(self):
+        return self.text
+
+
+def _portable(value):
+    """
+    Return the value if it survives pickling, otherwise a stand-in for it.
+    """
+    try:
+        pickle.loads(pickle.dumps(value))  # noqa: S301
+    except Exception:  # noqa: BLE001
+        return _Repr(repr(value))
+    return value
+
+
+def _portable_exc_info(test, exc_info):
+    exc_type, exc_value, _ = exc_info
+    formatted = getattr(exc_info, "formatted", None)  # e.g. from a fork
+    if formatted is None:
+        formatted = "".join(format_exception(*exc_info))
+    try:
+        pickle.loads(pickle.dumps((exc_type, exc_value)))  # noqa: S301
+    except Exception:  # noqa: BLE001
+        failure = getattr(test, "failureException", AssertionError)
+        exc_type = failure if issubclass(exc_type, failure) else Exception
+        exc_value = exc_type(str(exc_value))
+    return exc_type, exc_value, formatted
+
+
+class _Collector:
+    """
+    A reporter which sends the results it sees off as picklable events.
+
+    Events are buffered and sent once per test (or immediately, for errors
+    which happen outside of any test, such as in class-level fixtures).
+
+    Tests are timed here too, for versions of `unittest` which don't
+    report how long they took, so that the parent always finds out.
+
+    If given a callable which says whether to stop, it's asked before
+    each test is run.
+    """
+
+    failfast = False
+
+    def __init__(self, send, timeout=None, stopping=None):
+        self.indices = {}
+        self._send = send
+        self._timeout = timeout
+        self._stopping = stopping
+        self._events = []
+        self._started = {}
+
+    @property
+    def shouldStop(self):
+        """
+        Whether to stop before running any further tests.
+        """
+        return self._stopping is not None and self._stopping()
+
+    def _ref(self, test):
+        index = self.indices.get(id(test))
+        return test.description if index is None else index
+
+    def _record(self, name, test, *args):
+        ref = self._ref(test)
+        self._events.append((name, ref, *args))
+        if isinstance(ref, str):
+            self.flush()
+
+    def flush(self):
+        """
+        Send any events which have not yet been sent.
+        """
+        if self._events:
+            self._send(("events", self._events))
+            self._events = []
+
+    def startTest(self, test):
+        self._started[id(test)] = time.perf_counter()
+        self._record("startTest", test)
+        seconds = _timeout.of(test, self._timeout)
+        if seconds is not None:  # so the parent knows when we're stuck
+            self._send(("started", (self._ref(test), seconds)))
+
+    def stopTest(self, test):
+        started = self._started.pop(id(test), None)
+        if started is not None:
+            self.addDuration(test, time.perf_counter() - started)
+        self._record("stopTest", test)
+        self.indices.pop(id(test), None)
+        self.flush()
+
+    def addError(self, test, exc_info):
+        self._record("addError", test, _portable_exc_info(test, exc_info))
+
+    def addFailure(self, test, exc_info):
+        self._record("addFailure", test, _portable_exc_info(test, exc_info))
+
+    def addSkip(self, test, reason):
+        self._record("addSkip", test, reason)
+
+    def addExpectedFailure(self, test, exc_info):
+        exc_info = _portable_exc_info(test, exc_info)
+        self._record("addExpectedFailure", test, exc_info)
+
+    def addUnexpectedSuccess(self, test):
+        self._record("addUnexpectedSuccess", test)
+
+    def addSuccess(self, test):
+        self._record("addSuccess", test)
+
+    def addDuration(self, test, elapsed):
+        self._started.pop(id(test), None)
+        self._record("addDuration", test, elapsed)
+
+    def addPhaseDuration(self, test, phase, elapsed):
+        self._record("addPhaseDuration", test, phase, elapsed)
+
+    def addFixtureDuration(self, name, elapsed):
+        self._send(("fixture", (name, elapsed)))
+
+    def addSubTest(self, test, subtest, outcome):
+        if subtest._message is _subtest_msg_sentinel:
+            message = ()
+        else:
+            message = (_portable(subtest._message),)
+        params = {k: _portable(v) for k, v in subtest.params.items()}
+        if outcome is not None:
+            outcome = _portable_exc_info(test, outcome)
+        self._record("addSubTest", test, message, params, outcome)
+
+
+class _TracingCollector(_Collector):
+    """
+    A collector which also sends which functions were called.
+    """
+
+    def addCalled(self, name, functions):
+        self._send(("called", (name, functions)))
+
+
+class _UnitSuite(StreamingSuite):
+    """
+    A suite which tells a collector the index of each test it loads.
+    """
+
+    def __init__(
+        self,
+        loaders,
+        collector,
+        timeout=None,
+        concurrency=1,
+        fork=False,
+    ):
+        super().__init__(
+            loaders=loaders,
+            timeout=timeout,
+            concurrency=concurrency,
+            fork=fork,
+        )
+        self._collector = collector
+
+    # Workers report errors for their whole unit instead (see _run_unit).
+    _report_unloadable = False
+
+    # The parent replaces workers whose tests are stuck instead.
+    _report_stuck = False
+
+    def _load(self):
+        # Tests are reported in the order they're loaded in, even those which
+        # are then run together (concurrently).
+        for index, case in enumerate(super()._load()):
+            self._collector.indices[id(case)] = index
+            yield case
+
+
+@attrs.frozen
+class _Options:
+    """
+    How workers should run their tests.
+    """
+
+    #: Whether to note down which functions each test calls
+    trace: bool = False
+
+    #: How long each test may take, by default
+    timeout: float | None = None
+
+    #: How tests' own processes should be started, if not how workers were
+    start_method: str | None = None
+
+    #: How many tests from concurrent classes to run at once
+    concurrency: int = 1
+
+    #: How much memory (in bytes) a worker process may have, if limited
+    memory_limit: int | None = None
+
+    #: Whether to run each test in a process forked off by the worker
+    fork: bool = False
+
+
+def _run_unit(unit, send, options=_Options(), stopping=None):
+    """
+    Run a unit of tests, sending events for each result.
+    """
+    Collector = _TracingCollector if options.trace else _Collector
+    collector = Collector(
+        send=send,
+        timeout=options.timeout,
+        stopping=stopping,
+    )
+    suite = _UnitSuite(
+        loaders=unit,
+        collector=collector,
+        timeout=options.timeout,
+        concurrency=options.concurrency,
+        fork=options.fork,
+    )
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        suite.run(collector)
+    collector.flush()
+
+
+def _work(connection, options=_Options(), dump=None):
+    """
+    Run units of tests sent by the parent until told to stop.
+
+    If given a path to dump to, what every thread is doing is written to it
+    whenever we're sent ``SIGUSR1``, so that the parent can find out why a
+    test got stuck.
+    """
+    if dump is not None and hasattr(signal, "SIGUSR1"):
+        file = open(dump, "w")  # noqa: PTH123, SIM115
+        faulthandler.register(signal.SIGUSR1, file=file, all_threads=True)
+    if options.start_method is not None:
+        multiprocessing.set_start_method(options.start_method, force=True)
+    if options.memory_limit is not None and resource is not None:
+        limit = options.memory_limit
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:  # we can't go any higher anyhow
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    while True:
+        try:
+            unit = connection.recv()
+        except EOFError:  # our parent is gone
+            break
+        if unit is None:
+            break
+        try:
+            _run_unit(unit=unit, send=connection.send, options=options)
+        except Exception as error:  # noqa: BLE001
+            connection.send(_unit_error(unit, error))
+        connection.send(("done", _rss()))
+
+
+def _rss():
+    """
+    How much memory (in bytes) this process is using, if we can tell.
+
+    Where there's no telling how much it's using right now, how much it has
+    used at most is the next best thing.
+    """
+    with suppress(OSError, ValueError), open("/proc/self/statm") as file:  # noqa: PTH123
+        return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _work_in_interpreter(connection, options=_Options()):
+    """
+    Run units of tests sent by the parent, from within a subinterpreter.
+
+    Each unit's events are held back until it's done, so that if any of its
+    tests do something which can't be done here (like importing certain
+    extension modules, or forking), nothing has been reported, and the
+    parent can have a process run it instead (without our running the rest
+    of it first).
+
+    A subinterpreter can't be interrupted in the midst of a test, so being
+    told to stop stops us before the next one.
+    """
+    stop = unsupported = False
+
+    def stopping():
+        nonlocal stop
+        stop = stop or connection.poll()
+        return stop or unsupported
+
+    def hold(message):
+        nonlocal unsupported
+        unsupported = unsupported or _unsupported(message)
+        held.append(message)
+
+    while not stop:
+        try:
+            unit = connection.recv()
+        except EOFError:  # our parent is gone
+            break
+        except ImportError as error:  # unpickling the unit imports its tests
+            if not _subinterpreters.unsupported(type(error), error):
+                raise
+            connection.send(("unsupported", None))
+            connection.send(("done", None))
+            continue
+        if unit is None:
+            break
+
+        held, unsupported = [], False
+        try:
+            _run_unit(
+                unit=unit,
+                send=hold,
+                options=options,
+                stopping=stopping,
+            )
+        except Exception as error:  # noqa: BLE001
+            hold(_unit_error(unit, error))
+        if unsupported:
+            held = [("unsupported", None)]
+        for message in held:
+            connection.send(message)
+        connection.send(("done", None))
+
+
+def _work_in_thread(connection, options=_Options()):
+    """
+    Run units of tests sent by the parent, from within a thread.
+
+    There's no interrupting a thread, so being told to stop stops us before
+    the next test.
+    """
+    with connection:
+        while True:
+            try:
+                unit = connection.recv()
+            except EOFError:  # our parent is gone
+                break
+            if unit is None:
+                break
+            try:
+                _run_unit(
+                    unit=unit,
+                    send=connection.send,
+                    options=options,
+                    stopping=connection.poll,
+                )
+            except Exception as error:  # noqa: BLE001
+                connection.send(_unit_error(unit, error))
+            connection.send(("done", None))
+
+
+def _unit_error(unit, error):
+    """
+    An event for an error which happened outside of any of a unit's tests.
+    """
+    exc_info = type(error), error, error.__traceback__
+    exc_info = _portable_exc_info(None, exc_info)
+    return "events", [("addError", _name(unit), exc_info)]
+
+
+def _unsupported(message):
+    """
+    Whether a message is about an extension not supported in subinterpreters.
+    """
+    kind, events = message
+    return kind == "events" and any(
+        name == "addError" and _subinterpreters.unsupported(*args[0][:2])
+        for name, _, *args in events
+    )
+
+
+def _name(unit):
+    """
+    A name for the given unit, suitable for reporting errors outside tests.
+    """
+    cls, _, _ = unit[0].id.rpartition(".")
+    return cls
+
+
+def _classes_of(loaders):
+    """
+    Group consecutive tests from the same class together.
+    """
+    unit, last = [], None
+    for loader in loaders:
+        cls, _, _ = loader.id.rpartition(".")
+        if unit and cls != last:
+            yield unit
+            unit = []
+        unit.append(loader)
+        last = cls
+    if unit:
+        yield unit
+
+
+def _module_of(loader):
+    if isinstance(loader, LazyAttributeLoader):
+        return loader.module
+    return loader.cls.__module__
+
+
+def _has_module_fixture(name, durations):
+    """
+    Whether the named module is known to have a module-level fixture.
+
+    It is if its source defines one, or if a past run timed setting it up.
+    Whether it's been imported yet isn't considered, so that tests are
+    grouped the same way however they were located (e.g. from a cache).
+    """
+    if durations is not None and durations.fixture(name) is not None:
+        return True
+    try:
+        path = get_module(name).filePath
+    except (KeyError, AttributeError):
+        return False
+    if path.splitext()[1] != ".py":
+        return False
+    try:
+        source = path.getContent()
+    except OSError:
+        return False
+    if b"setUpModule" not in source and b"tearDownModule" not in source:
+        return False
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return False
+    return any(_binds_module_fixture(node) for node in tree.body)
+
+
+def _binds_module_fixture(node):
+    """
+    Whether a top-level statement defines (or imports) a module fixture.
+    """
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        names = [node.name]
+    elif isinstance(node, (ast.Import, ast.ImportFrom)):
+        names = [alias.asname or alias.name for alias in node.names]
+    elif isinstance(node, ast.Assign):
+        names = [getattr(target, "id", None) for target in node.targets]
+    else:
+        return False
+    return not {"setUpModule", "tearDownModule"}.isdisjoint(names)
+
+
+def _estimator(durations):
+    """
+    Estimate how long the test from a loader will take, from past runs.
+
+    Tests which have never been timed are assumed to take as long as the
+    average one which has, or None if none has.
+    """
+    known = list(durations.known())
+    if not known:
+        return None
+    average = sum(known) / len(known)
+    return lambda loader: durations.get(loader.id, average)
+
+
+def _split(unit, durations, share):
+    """
+    Split up a class whose tests take longer than a worker's share of a run.
+
+    Only classes whose tests have all been timed, and whose fixture (if
+    any) takes little time compared with them, are split, as each piece
+    sets up the class again.
+    """
+    timed = [durations.get(loader.id) for loader in unit]
+    if None in timed:
+        return [unit]
+    total = sum(timed)
+    fixture = durations.fixture(_name(unit)) or 0
+    if total <= share or fixture > total * _CHEAP_FIXTURE:
+        return [unit]
+
+    pieces = min(len(unit), math.ceil(total / share))
+    split, piece, elapsed = [], [], 0
+    for loader, each in zip(unit, timed):
+        piece.append(loader)
+        elapsed += each
+        if (
+            len(split) < pieces - 1
+            and elapsed >= total * (len(split) + 1) / pieces
+        ):
+            split.append(piece)
+            piece = []
+    if piece:
+        split.append(piece)
+    return split
+
+
+def _units_of(loaders, durations=None, jobs=1):
+    """
+    Group the tests from the given loaders into units of work.
+
+    Consecutive tests from the same class end up in the same unit, as do
+    consecutive tests from a module with a module-level fixture, so that
+    each fixture is set up as few times as possible. Classes which past
+    runs show take longer than a worker's share of the run (compared with
+    which their fixture is cheap) are split up.
+    """
+    classes = _classes_of(loaders)
+    share = math.inf
+    if durations is not None and jobs > 1:
+        classes = list(classes)
+        estimate = _estimator(durations)
+        if estimate is not None:
+            total = sum(estimate(each) for unit in classes for each in unit)
+            share = total / jobs
+
+    for module, units in itertools.groupby(
+        classes,
+        key=lambda unit: _module_of(unit[0]),
+    ):
+        if _has_module_fixture(module, durations):
+            yield list(itertools.chain.from_iterable(units))
+        elif share == math.inf:
+            yield from units
+        else:
+            for unit in units:
+                yield from _split(unit, durations, share)
+
+
+def _longest_first(units, durations):
+    """
+    The indices of the given units, ordered by how long they'll likely take.
+
+    Units which seem to take equally long (e.g. because nothing has been
+    timed yet) stay in the order they were in.
+    """
+    estimate = _estimator(durations)
+    if estimate is None:
+        return list(range(len(units)))
+
+    def expected(index):
+        return sum(estimate(loader) for loader in units[index])
+
+    return sorted(range(len(units)), key=expected, reverse=True)
+
+
+@attrs.define
+class _Replayer:
+    """
+    Replay events into a reporter, in the order the units were located.
+
+    If given a limit, non-successes are counted as they arrive, from
+    whichever worker sends them, rather than as they're replayed. Once
+    there have been that many, the run stops: whatever had arrived is
+    replayed straight away, and nothing more is.
+    """
+
+    _units: list
+    _reporter: object
+    _limit: int | None = None
+
+    _events: dict = attrs.field(factory=dict)
+    _done: set = attrs.field(factory=set)
+    _cases: dict = attrs.field(factory=dict)
+    _current: int = 0
+    _seen: int = 0
+    _draining: bool = False
+    stopped: bool = False
+
+    @property
+    def finished(self):
+        """
+        Whether all units have been replayed (or the run was stopped).
+        """
+        return self.stopped or self._current == len(self._units)
+
+    def feed(self, index, events):
+        """
+        Accept some events from the unit at the given index.
+        """
+        if self.finished:
+            return
+        self._events.setdefault(index, deque()).extend(events)
+        if self._limit is not None:
+            self._seen += sum(name in _UNSUCCESSFUL for name, *_ in events)
+            if self._seen >= self._limit:
+                self._drain()
+                return
+        self._flush()
+
+    def _drain(self):
+        """
+        Replay every event which has arrived, then stop.
+
+        Workers only send a test's events once it's done, so each test which
+        is replayed ran to completion.
+        """
+        self._done.update(range(len(self._units)))
+        self._draining = True
+        self._flush()
+        self.stopped = True
+
+    def finish(self, index):
+        """
+        Mark the unit at the given index as having no further events.
+        """
+        self._done.add(index)
+        self._flush()
+
+    def _flush(self):
+        while not self.finished:
+            events = self._events.get(self._current, ())
+            while events:
+                if not self._replay(*events.popleft()):
+                    self.stopped = True
+                    return
+            if self._current not in self._done:
+                return
+            self._events.pop(self._current, None)
+            self._cases.clear()
+            self._current += 1
+
+    def _replay(self, name, ref, *args):
+        reporter = self._reporter
+        if (
+            name == "startTest"
+            and not self._draining
+            and getattr(reporter, "shouldStop", False)
+        ):
+            return False
+
+        if isinstance(ref, str):
+            test = _ErrorHolder(ref)
+        else:
+            test = self._cases.get(ref)
+            if test is None:
+                (test,) = load_to_run(self._units[self._current][ref])
+                self._cases[ref] = test
+        replay(reporter, name, test, *args)
+        return True
+
+
+def replay(reporter, name, test, *args):
+    """
+    Make a reporter call which a collector turned into an event.
+    """
+    if name in {"addError", "addFailure", "addExpectedFailure"}:
+        args = (_RemoteExcInfo(*args[0]),)
+    elif name == "addSubTest":
+        message, params, outcome = args
+        message = message[0] if message else _subtest_msg_sentinel
+        subtest = _SubTest(test, message, params)
+        if outcome is not None:
+            outcome = _RemoteExcInfo(*outcome)
+        args = subtest, outcome
+
+    method = getattr(reporter, name, None)
+    if method is not None:
+        method(test, *args)
+
+
+@attrs.define
+class _Worker:
+    """
+    A worker process, along with the unit of work it's currently running.
+    """
+
+    number: int
+    process: multiprocessing.process.BaseProcess
+    connection: multiprocessing.connection.Connection
+    dump: str | None = None
+    unit: int | None = None
+
+    #: The test it's running (if it may time out), and when it should end by
+    test: int | None = None
+    deadline: float = math.inf
+
+    #: The modules whose tests it's been sent
+    modules: set[str] = attrs.field(factory=set)
+
+    @classmethod
+    def start(cls, context, number, options=_Options(), directory=None):
+        """
+        Start a new worker process.
+
+        If given a directory, the worker dumps its threads' stacks within
+        it when asked to.
+        """
+        dump = None
+        if directory is not None:
+            dump = os.path.join(directory, f"worker-{number}")  # noqa: PTH118
+        connection, theirs = context.Pipe()
+        # Not daemonic, so that tests may themselves use multiprocessing.
+        process = context.Process(target=_work, args=(theirs, options, dump))
+        process.start()
+        theirs.close()
+        return cls(
+            number=number,
+            process=process,
+            connection=connection,
+            dump=dump,
+        )
+
+    def send(self, index, unit):
+        """
+        Ask the worker to run the given unit.
+        """
+        self.unit = index
+        self.modules.add(_module_of(unit[0]))
+        self.connection.send(unit)
+
+    def spent(self, unit, modules):
+        """
+        Whether the worker has run tests from as many modules as it may.
+
+        It has only if the unit is from yet another one.
+        """
+        return (
+            modules is not None
+            and len(self.modules) >= modules
+            and _module_of(unit[0]) not in self.modules
+        )
+
+    def started(self, test, seconds):
+        """
+        Note that the worker started a test which may take only so long.
+        """
+        self.test = test
+        self.deadline = time.monotonic() + seconds + _timeout.GRACE
+
+    def stopped(self):
+        """
+        Note that the worker isn't running a test which may time out.
+        """
+        self.test, self.deadline = None, math.inf
+
+    def stacks(self):
+        """
+        Ask the worker what each of its threads is doing, if it can say.
+        """
+        if self.dump is None or not hasattr(signal, "SIGUSR1"):
+            return ""
+        with suppress(OSError):
+            os.kill(self.process.pid, signal.SIGUSR1)
+            time.sleep(_DUMP_WAIT)
+            with open(self.dump) as file:  # noqa: PTH123
+                return file.read()
+        return ""
+
+    def stop(self):
+        """
+        Ask the worker to exit once it's done with what it's running.
+        """
+        with suppress(OSError):
+            self.connection.send(None)
+        self.process.join()
+        self.connection.close()
+
+    def kill(self):
+        """
+        Stop the worker immediately.
+        """
+        self.process.terminate()
+        self.process.join()
+        self.connection.close()
+
+    def exited(self):
+        """
+        Describe how the worker exited, once it has.
+        """
+        return (
+            f"Worker process exited unexpectedly "
+            f"(exit code {self.process.exitcode})."
+        )
+
+
+#: What each worker subinterpreter runs
+_IN_INTERPRETER = """
+from multiprocessing.connection import Connection
+
+with Connection(fd) as connection:
+    from virtue._parallel import _Options, _work_in_interpreter
+
+    _work_in_interpreter(connection, _Options(**options))
+"""
+
+
+@attrs.define
+class _InterpreterWorker:
+    """
+    A worker subinterpreter, along with the unit of work it's running.
+
+    There's no interrupting one in the midst of a test, so the tests it
+    runs are never timed out.
+    """
+
+    number: int
+    interpreter: _subinterpreters.Interpreter
+    connection: multiprocessing.connection.Connection
+    unit: int | None = None
+
+    test = None
+    deadline = math.inf
+
+    @classmethod
+    def start(cls, number, options=_Options()):
+        """
+        Start a new worker subinterpreter.
+        """
+        connection, theirs = multiprocessing.Pipe()
+        interpreter = _subinterpreters.Interpreter(
+            _IN_INTERPRETER,
+            fd=os.dup(theirs.fileno()),
+            options=attrs.asdict(options),
+        )
+        theirs.close()
+        return cls(
+            number=number,
+            interpreter=interpreter.start(),
+            connection=connection,
+        )
+
+    def send(self, index, unit):
+        """
+        Ask the worker to run the given unit.
+        """
+        self.unit = index
+        self.connection.send(unit)
+
+    def started(self, test, seconds):
+        """
+        Ignore that the worker started a test which may take only so long.
+        """
+
+    def stopped(self):
+        """
+        Ignore that the worker isn't running a test which may time out.
+        """
+
+    def stacks(self):
+        """
+        There's no asking a subinterpreter what its threads are doing.
+        """
+        return ""
+
+    def stop(self):
+        """
+        Ask the worker to exit, before it starts another test.
+        """
+        with suppress(OSError):
+            self.connection.send(None)
+        self.interpreter.join()
+        self.connection.close()
+
+    kill = stop
+
+    def exited(self):
+        """
+        Describe how the worker exited, once it has.
+        """
+        failure = self.interpreter.failure or "(no error)"
+        return f"Worker subinterpreter exited unexpectedly.\n\n{failure}"
+
+
+@attrs.define
+class _ThreadWorker:
+    """
+    A worker thread, along with the unit of work it's currently running.
+
+    There's no interrupting one in the midst of a test, so the tests it
+    runs are never timed out.
+    """
+
+    number: int
+    thread: threading.Thread
+    connection: multiprocessing.connection.Connection
+    unit: int | None = None
+
+    test = None
+    deadline = math.inf
+
+    @classmethod
+    def start(cls, number, options=_Options()):
+        """
+        Start a new worker thread.
+        """
+        connection, theirs = multiprocessing.Pipe()
+        thread = threading.Thread(
+            target=_work_in_thread,
+            args=(theirs, options),
+            name=f"virtue-worker-{number}",
+            daemon=True,
+        )
+        thread.start()
+        return cls(number=number, thread=thread, connection=connection)
+
+    def send(self, index, unit):
+        """
+        Ask the worker to run the given unit.
+        """
+        self.unit = index
+        self.connection.send(unit)
+
+    def started(self, test, seconds):
+        """
+        Ignore that the worker started a test which may take only so long.
+        """
+
+    def stopped(self):
+        """
+        Ignore that the worker isn't running a test which may time out.
+        """
+
+    def stacks(self):
+        """
+        There are no stacks worth showing, as the worker is never stuck.
+        """
+        return ""
+
+    def stop(self):
+        """
+        Ask the worker to exit, before it starts another test.
+        """
+        with suppress(OSError):
+            self.connection.send(None)
+        self.thread.join()
+        self.connection.close()
+
+    kill = stop
+
+    def exited(self):
+        """
+        Describe how the worker exited, once it has.
+        """
+        return "Worker thread exited unexpectedly."
+
+
+def _thread_safe(unit):
+    """
+    Whether the tests in a unit may run alongside others in threads.
+
+    Tests with a time limit can't be interrupted within a thread other than
+    the main one, so they're treated as though they weren't.
+    """
+    for loader in unit:
+        try:
+            cases = load_to_run(loader)
+        except Exception:  # noqa: BLE001, S112
+            continue  # its worker will report why
+        for case in cases:
+            if not _threads.safe(case.__class__) or _timeout.of(case):
+                return False
+    return True
+
+
+def run(
+    loaders,
+    reporter,
+    jobs,
+    *,
+    durations=None,
+    first=frozenset(),
+    timeout=None,
+    stop_after=None,
+    subinterpreters=False,
+    threads=False,
+    concurrency=1,
+    recycle_after=None,
+    max_rss=None,
+    memory_limit=None,
+    fork=False,
+):
+    """
+    Run the tests from the given loaders across a pool of worker processes.
+
+    Each loader should load a single test. If given, the durations (a
+    ``virtue._cache.Durations``) of past runs are used to start the units
+    which will take longest first, and to decide which classes to split.
+    Units with any of the tests whose IDs are in ``first`` are started
+    before any others.
+
+    Tests which take longer than the timeout (or their own ``timeout``)
+    error. If one can't even be interrupted, its worker is replaced (once
+    it's had a grace period), and the rest of its unit is run by another.
+
+    If given, once there have been ``stop_after`` non-successes (across all
+    workers, in whatever order they happen), the run stops. No further units
+    are started, workers are stopped in the midst of whatever they're
+    running, and only the tests which finished before then are reported.
+
+    If asked to (and subinterpreters are available), workers are
+    subinterpreters rather than processes, other than for units which
+    need extension modules that can't be imported within one (which are
+    left to processes, as are all units from the same module thereafter).
+    There's no interrupting a test within a subinterpreter, so with a
+    timeout, processes are always used, and when stopping early, tests
+    already running in a subinterpreter first finish.
+
+    If asked to, workers are instead threads (whether or not the GIL
+    prevents them from running in parallel, so see ``virtue._threads``).
+    Units from classes which aren't thread-safe are run once no others are
+    running, one at a time, in this (the main) thread. So are those with
+    tests which may time out, as only the main thread can be interrupted.
+    When stopping early, tests already running in threads first finish.
+
+    Within each unit, tests from concurrent classes are run ``concurrency``
+    at a time (see ``virtue._concurrent``).
+
+    Worker processes may be replaced by fresh ones (so that whatever tests
+    leave behind doesn't build up) before they run tests from more than
+    ``recycle_after`` modules, or once they're using more than ``max_rss``
+    bytes of memory, and may be limited to ``memory_limit`` bytes of address
+    space. Workers are always processes when any of these are given.
+
+    A worker which dies takes the test it was running with it (which errors),
+    and the rest of its unit is run by another.
+
+    If asked to fork, workers run each test in a process of its own, forked
+    once the test's fixtures are set up (see ``virtue._fork``). Subinterpreters
+    can't fork, so leave such units to processes.
+
+    If the reporter has an ``addFixtureDuration`` method, it's told how
+    long each worker (identified by number) took to set up each fixture.
+    If it has an ``addCalled`` method, workers note down which functions
+    each test (and fixture) calls, and it's told.
+    """
+    units = list(_units_of(loaders, durations=durations, jobs=jobs))
+    replayer = _Replayer(units=units, reporter=reporter, limit=stop_after)
+    if durations is None:
+        order = list(range(len(units)))
+    else:
+        order = _longest_first(units, durations)
+    if first:
+        order.sort(
+            key=lambda index: all(
+                each.id not in first for each in units[index]
+            ),
+        )
+    pending = deque((index, units[index]) for index in order)
+    add_fixture_duration = getattr(reporter, "addFixtureDuration", None)
+    add_called = getattr(reporter, "addCalled", None)
+    options = _Options(
+        trace=add_called is not None,
+        timeout=timeout,
+        concurrency=concurrency,
+        memory_limit=memory_limit,
+        fork=fork,
+    )
+
+    recycled = any(
+        each is not None for each in (recycle_after, max_rss, memory_limit)
+    )
+    isolated = (
+        subinterpreters
+        and timeout is None
+        and not recycled
+        and _subinterpreters.available()
+    )
+    context = multiprocessing.get_context()
+    if isolated:  # forking while subinterpreters are running isn't safe
+        options = attrs.evolve(
+            options,
+            start_method=multiprocessing.get_start_method(),
+        )
+        context = multiprocessing.get_context("spawn")
+    numbers = itertools.count(1)
+    directory = tempfile.TemporaryDirectory()
+
+    # Units (and modules) which need a process rather than a subinterpreter
+    fallback = deque()
+    retry = set()
+    unsupported = set()
+
+    exclusive = deque()  # units which aren't thread-safe
+
+    finished = {}  # how many of each running unit's tests are done
+
+    # What's left of units whose worker died (or got stuck) partway through
+    # is run again under the same index, so that it's replayed in place.
+    # Workers number tests from the start of what they're sent, so each
+    # running unit's events are shifted by how much of it was already run.
+    sent = {}
+    offsets = {}
+
+    def feed(index, events):
+        offset = offsets.get(index, 0)
+        if offset:
+            events = [
+                (name, ref + offset if isinstance(ref, int) else ref, *args)
+                for name, ref, *args in events
+            ]
+        replayer.feed(index, events)
+
+    def resume(index, rest):
+        offsets[index] = len(units[index]) - len(rest)
+        pending.appendleft((index, rest))
+
+    def start(isolated=isolated):
+        if threads:
+            return _ThreadWorker.start(next(numbers), options=options)
+        if isolated:
+            return _InterpreterWorker.start(next(numbers), options=options)
+        return _Worker.start(
+            context,
+            next(numbers),
+            options=options,
+            directory=directory.name,
+        )
+
+    def assign(worker):
+        if replayer.finished:
+            return
+        if isinstance(worker, _Worker) and fallback:
+            hand(worker, *fallback.popleft())
+            return
+        while pending:
+            index, unit = pending.popleft()
+            if threads and not _thread_safe(unit):
+                exclusive.append((index, unit))
+                continue
+            if isinstance(worker, _Worker) or (
+                _module_of(unit[0]) not in unsupported
+            ):
+                hand(worker, index, unit)
+                return
+            fallback.append((index, unit))
+            fall_back()
+        while (
+            exclusive
+            and not replayer.finished
+            and all(each.unit is None for each in workers)
+        ):
+            run_here(*exclusive.popleft())
+
+    def hand(worker, index, unit):
+        if isinstance(worker, _Worker) and worker.spent(unit, recycle_after):
+            worker = recycle(worker)
+        finished[index] = 0
+        sent[index] = unit
+        worker.send(index, unit)
+
+    def recycle(worker):
+        workers.remove(worker)
+        worker.stop()
+        worker = start()
+        workers.append(worker)
+        return worker
+
+    def run_here(index, unit):
+        def send(message):
+            kind, events = message
+            if kind == "events":
+                feed(index, events)
+            elif kind == "fixture" and add_fixture_duration is not None:
+                add_fixture_duration(*events)
+            elif kind == "called":
+                add_called(*events)
+
+        try:
+            _run_unit(unit=unit, send=send, options=options)
+        except Exception as error:  # noqa: BLE001
+            send(_unit_error(unit, error))
+        replayer.finish(index)
+
+    def fall_back():
+        processes = [each for each in workers if isinstance(each, _Worker)]
+        for worker in processes:
+            if worker.unit is None and fallback:
+                assign(worker)
+        if fallback and len(processes) < jobs:
+            worker = start(isolated=False)
+            workers.append(worker)
+            assign(worker)
+
+    workers = [start() for _ in range(min(jobs, len(units)))]
+    try:
+        for worker in list(workers):
+            assign(worker)
+
+        while not replayer.finished:
+            deadline = min(worker.deadline for worker in workers)
+            ready = wait(
+                [worker.connection for worker in workers],
+                timeout=None
+                if deadline == math.inf
+                else max(deadline - time.monotonic(), 0),
+            )
+            for worker in list(workers):
+                if replayer.finished:
+                    break
+                if worker.connection not in ready:
+                    if worker.deadline > time.monotonic():
+                        continue
+                    workers.remove(worker)
+                    index = worker.unit
+                    error, rest = _stuck(worker, sent[index])
+                    feed(index, error)
+                    if rest:
+                        resume(index, rest)
+                    else:
+                        replayer.finish(index)
+                    worker = start()
+                    workers.append(worker)
+                    assign(worker)
+                    continue
+
+                index = worker.unit
+                try:
+                    kind, events = worker.connection.recv()
+                except EOFError:
+                    workers.remove(worker)
+                    unit = None if index is None else sent[index]
+                    error, rest = _crashed(worker, unit, finished.get(index))
+                    worker = start(isinstance(worker, _InterpreterWorker))
+                    workers.append(worker)
+                    if index is None:
+                        continue
+                    retry.discard(index)
+                    feed(index, error)
+                    if rest:
+                        finished.pop(index, None)
+                        resume(index, rest)
+                        assign(worker)
+                        continue
+                    kind, events = "done", None
+
+                if kind == "events":
+                    name, ref, *_ = events[-1]
+                    if name == "stopTest":
+                        worker.stopped()
+                    if name == "stopTest" and isinstance(ref, int):
+                        finished[index] = ref + 1
+                    feed(index, events)
+                    continue
+                if kind == "started":
+                    worker.started(*events)
+                    continue
+                if kind == "fixture":
+                    if add_fixture_duration is not None:
+                        add_fixture_duration(*events, worker=worker.number)
+                    continue
+                if kind == "called":
+                    add_called(*events)
+                    continue
+                if kind == "unsupported":
+                    retry.add(index)
+                    continue
+
+                worker.unit = None
+                worker.stopped()
+                finished.pop(index, None)
+                if index in retry:
+                    retry.discard(index)
+                    unsupported.add(_module_of(units[index][0]))
+                    fallback.append((index, sent[index]))
+                    fall_back()
+                else:
+                    replayer.finish(index)
+                if max_rss is not None and (events or 0) > max_rss:
+                    worker = recycle(worker)
+                assign(worker)
+    finally:
+        idle = replayer.finished and not replayer.stopped
+        for worker in workers:
+            if idle:
+                worker.stop()
+            else:
+                worker.kill()
+        directory.cleanup()
+
+
+def _stuck(worker, unit):
+    """
+    Give up on a worker which is stuck running a test.
+
+    Returns events reporting the test as having errored, along with the
+    tests from its unit which it hadn't yet run.
+    """
+    stacks = worker.stacks()
+    worker.kill()
+    test = worker.test
+    error = _timeout.TimedOut(
+        f"{unit[test].id} took too long, and could not be interrupted, so "
+        f"its worker was replaced.\n\n{stacks}",
+    )
+    exc_info = _timeout.TimedOut, error, "".join(format_exception(error))
+    events = [
+        ("startTest", test),
+        ("addError", test, exc_info),
+        ("stopTest", test),
+    ]
+    return events, unit[test + 1 :]
+
+
+def _crashed(worker, unit, finished):
+    """
+    Clean up after a worker which died.
+
+    Returns events reporting the test it was running as having errored (or
+    its unit, if it was between tests), along with the tests from its unit
+    which it hadn't yet run.
+    """
+    worker.kill()
+    error = RuntimeError(worker.exited())
+    exc_info = RuntimeError, error, "".join(format_exception(error))
+    if unit is None:
+        return [], []
+    if finished is None or finished >= len(unit):
+        return [("addError", _name(unit), exc_info)], []
+    events = [
+        ("startTest", finished),
+        ("addError", finished, exc_info),
+        ("stopTest", finished),
+    ]
+    return events, unit[finished + 1 :]
@@ -0,0 +1,164 @@
+"""
+Selecting tests by matching expressions against their IDs.
+
+An expression is made of words combined with ``and``, ``or``, ``not`` and
+parentheses. A word containing any of ``*?[`` is a glob which must match
+a test's whole ID. Any other word need only appear somewhere within it.
+
+Besides deciding whether individual tests are selected, expressions can
+often decide whether *every* or *no* test within a module or class is, so
+that those needn't be looked at (or imported) at all.
+"""
+
+from __future__ import annotations
+
+from fnmatch import fnmatchcase
+import re
+
+from attrs import frozen
+
+_TOKENS = re.compile(r"\(|\)|[^\s()]+")
+_WILDCARDS = re.compile(r"[*?[]")
+
+
+@frozen
+class _Word:
+    word: str
+
+    def matches(self, id):
+        if _WILDCARDS.search(self.word) is None:
+            return self.word in id
+        return fnmatchcase(id, self.word)
+
+    def within(self, prefix):
+        prefix = f"{prefix}."
+        if _WILDCARDS.search(self.word) is None:
+            return True if self.word in prefix else None
+
+        literal = _WILDCARDS.split(self.word, maxsplit=1)[0]
+        if not (prefix.startswith(literal) or literal.startswith(prefix)):
+            return False
+        if self.word.endswith("*") and fnmatchcase(prefix, self.word):
+            return True
+        return None
+
+
+@frozen
+class _Not:
+    expression: _Word | _Not | _And | _Or
+
+    def matches(self, id):
+        return not self.expression.matches(id)
+
+    def within(self, prefix):
+        within = self.expression.within(prefix)
+        return None if within is None else not within
+
+
+@frozen
+class _And:
+    left: _Word | _Not | _And | _Or
+    right: _Word | _Not | _And | _Or
+
+    def matches(self, id):
+        return self.left.matches(id) and self.right.matches(id)
+
+    def within(self, prefix):
+        left, right = self.left.within(prefix), self.right.within(prefix)
+        if left is False or right is False:
+            return False
+        if left and right:
+            return True
+        return None
+
+
+@frozen
+class _Or:
+    left: _Word | _Not | _And | _Or
+    right: _Word | _Not | _And | _Or
+
+    def matches(self, id):
+        return self.left.matches(id) or self.right.matches(id)
+
+    def within(self, prefix):
+        left, right = self.left.within(prefix), self.right.within(prefix)
+        if left or right:
+            return True
+        if left is False and right is False:
+            return False
+        return None
+
+
+@frozen
+class Selection:
+    """
+    A parsed selection expression.
+    """
+
+    source: str
+    _expression: _Word | _Not | _And | _Or
+
+    @classmethod
+    def parse(cls, source):
+        """
+        Parse an expression, raising `ValueError` if it's invalid.
+        """
+        tokens = _TOKENS.findall(source)
+        if not tokens:
+            raise ValueError("An empty selection expression selects nothing.")
+        expression, rest = _parse_or(tokens)
+        if rest:
+            raise ValueError(f"Unexpected {rest[0]!r} in {source!r}.")
+        return cls(source=source, expression=expression)
+
+    def matches(self, id):
+        """
+        Whether the test with the given ID is selected.
+        """
+        return self._expression.matches(id)
+
+    def within(self, prefix):
+        """
+        Whether the tests within the given module or class are selected.
+
+        Returns True or False if all or none of them are, respectively, or
+        None if it depends on the test.
+        """
+        return self._expression.within(prefix)
+
+
+def _parse_or(tokens):
+    left, tokens = _parse_and(tokens)
+    while tokens[:1] == ["or"]:
+        right, tokens = _parse_and(tokens[1:])
+        left = _Or(left, right)
+    return left, tokens
+
+
+def _parse_and(tokens):
+    left, tokens = _parse_not(tokens)
+    while tokens[:1] == ["and"]:
+        right, tokens = _parse_not(tokens[1:])
+        left = _And(left, right)
+    return left, tokens
+
+
+def _parse_not(tokens):
+    if tokens[:1] == ["not"]:
+        expression, tokens = _parse_not(tokens[1:])
+        return _Not(expression), tokens
+    return _parse_atom(tokens)
+
+
+def _parse_atom(tokens):
+    if not tokens:
+        raise ValueError("Unexpected end of selection expression.")
+    first, tokens = tokens[0], tokens[1:]
+    if first == "(":
+        expression, tokens = _parse_or(tokens)
+        if tokens[:1] != [")"]:
+            raise ValueError("Unbalanced parentheses in selection expression.")
+        return expression, tokens[1:]
+    if first in {")", "and", "or", "not"}:
+        raise ValueError(f"Unexpected {first!r} in selection expression.")
+    return _Word(first), tokens
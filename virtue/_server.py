@@ -0,0 +1,148 @@
+"""
+A server which runs tests in a warm interpreter, for ``virtue serve``.
+
+Everything a run needs is imported once, up front. Then, for each request
+from a client (see ``virtue._client``), a child process is forked which runs
+the command line in the client's working directory and environment, with
+the client's standard streams (which are sent over the socket) as its own,
+so that output goes straight to wherever the client's would have.
+
+Tests themselves are only ever imported by the children, so each run sees
+the latest version of them.
+"""
+
+from contextlib import suppress
+from pathlib import Path
+import errno
+import importlib
+import json
+import os
+import signal
+import socket
+import sys
+import traceback
+
+from virtue._client import INT
+
+
+def _listen(path):
+    """
+    Listen on a Unix socket, unless another server already is.
+    """
+    path = Path(path)
+    if path.exists():
+        probe = socket.socket(socket.AF_UNIX)
+        try:
+            probe.connect(str(path))
+        except OSError:
+            path.unlink()  # left behind by a server which is gone
+        else:
+            raise OSError(
+                errno.EADDRINUSE,
+                f"A server is already listening on {path}.",
+            )
+        finally:
+            probe.close()
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    listener = socket.socket(socket.AF_UNIX)
+    listener.bind(str(path))
+    listener.listen(16)
+    return listener
+
+
+def serve(path, main):
+    """
+    Run the given command line for each client of a socket, until stopped.
+
+    Arguments:
+
+        path (str):
+
+            where to listen for clients
+
+        main (click.Command):
+
+            the command to run for each client
+
+    """
+    # Hold off on being interrupted until we're sure to clean up the socket.
+    interrupt = {signal.SIGINT}
+    signal.pthread_sigmask(signal.SIG_BLOCK, interrupt)
+    try:
+        listener = _listen(path)
+    except BaseException:
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, interrupt)
+        raise
+    previous = signal.signal(signal.SIGCHLD, signal.SIG_IGN)  # reap children
+    try:
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, interrupt)
+        while True:
+            connection, _ = listener.accept()
+            with connection:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                if os.fork() == 0:
+                    _child(listener, connection, main)
+    finally:
+        signal.signal(signal.SIGCHLD, previous)
+        listener.close()
+        with suppress(OSError):
+            Path(path).unlink()
+
+
+def _child(listener, connection, main):
+    """
+    Handle a request in a forked child process, exiting once it's done.
+    """
+    status = 1
+    try:
+        listener.close()
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        status = _handle(connection, main)
+    except BaseException:  # noqa: BLE001
+        traceback.print_exc()
+    finally:
+        os._exit(status)
+
+
+def _handle(connection, main):
+    """
+    Run the command line a client asked for, returning its exit status.
+    """
+    message, fds, _, _ = socket.recv_fds(connection, INT.size, 3)
+    (length,) = INT.unpack(message)
+    data = b""
+    while len(data) < length:
+        chunk = connection.recv(length - len(data))
+        if not chunk:
+            return 1
+        data += chunk
+    request = json.loads(data)
+
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    os.chdir(request["cwd"])
+    os.environ.clear()
+    os.environ.update(request["environ"])
+    sys.path[:] = request["path"]
+    sys.argv[1:] = request["args"]
+    importlib.invalidate_caches()
+
+    connection.sendall(INT.pack(os.getpid()))
+    try:
+        main.main(args=request["args"], prog_name="virtue")
+    except SystemExit as exit:
+        status = exit.code
+    else:
+        status = 0
+    if status is None:
+        status = 0
+    elif not isinstance(status, int):
+        sys.stderr.write(f"{status}\n")
+        status = 1
+    sys.stdout.flush()
+    sys.stderr.flush()
+    connection.sendall(INT.pack(status))
+    return status
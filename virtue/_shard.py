@@ -0,0 +1,72 @@
+"""
+Splitting the tests in a run into shards, e.g. to run across machines.
+
+Each shard is picked deterministically from the same list of tests, so that
+separate invocations with the same tests (and timing file) agree on which
+shard each test belongs to without needing to communicate.
+"""
+
+import heapq
+
+from virtue import _parallel
+
+
+def parse(value):
+    """
+    Parse a shard in ``I/N`` form (the I-th of N, counting from 1).
+
+    Raises `ValueError` for anything else.
+    """
+    index, slash, count = value.partition("/")
+    if not slash or not index.isdigit() or not count.isdigit():
+        raise ValueError(f"{value!r} is not of the form I/N.")
+    index, count = int(index), int(count)
+    if not 1 <= index <= count:
+        raise ValueError(f"Shard {index} doesn't exist out of {count}.")
+    return index, count
+
+
+def _balance(units, count, cost):
+    """
+    Assign units to shards so that each has about as much to do as the others.
+
+    The costliest unit is assigned first (in name order, for equally costly
+    ones), each to whichever shard has (so far) the least to do.
+    """
+    costs = [cost(unit) for unit in units]
+    names = [_parallel._name(unit) for unit in units]
+    shards = [(0, shard) for shard in range(count)]
+    assigned = [0] * len(units)
+    for index in sorted(
+        range(len(units)),
+        key=lambda i: (-costs[i], names[i], i),
+    ):
+        total, shard = heapq.heappop(shards)
+        assigned[index] = shard
+        heapq.heappush(shards, (total + costs[index], shard))
+    return assigned
+
+
+def select(loaders, shard, durations=None):
+    """
+    Pick out the tests in the given shard from the given loaders.
+
+    Tests which share a class or module fixture stay in the same shard.
+    Shards are balanced using how long tests took in past runs if given
+    their durations (which should be the same for every shard), or
+    otherwise by how many tests each has.
+    """
+    index, count = shard
+    units = list(_parallel._units_of(loaders, durations=durations))
+    estimate = None if durations is None else _parallel._estimator(durations)
+    if estimate is None:
+        assigned = _balance(units, count, cost=len)
+    else:
+        assigned = _balance(
+            units,
+            count,
+            cost=lambda unit: sum(estimate(loader) for loader in unit),
+        )
+    for unit, each in zip(units, assigned):
+        if each == index - 1:
+            yield from unit
@@ -0,0 +1,556 @@
+"""
+Locating tests by parsing, rather than importing, the modules they live in.
+
+Test classes are recognized by following their bases -- through the
+module's own definitions, through imports of other local modules (those
+found alongside the top-level package, which are themselves parsed, not
+imported), and finally to classes from elsewhere (e.g. `unittest.TestCase`),
+which are imported. Nothing else a module imports from elsewhere is
+imported: such names are only ever compared by name, and so e.g. a test
+class re-exported from an installed library isn't found.
+
+Whenever a module does something which can't be understood without running
+it (creating classes dynamically, defining test methods conditionally,
+decorating classes with arbitrary decorators, etc.), it is reported as
+dynamic, and should be imported instead.
+"""
+
+from __future__ import annotations
+
+from unittest import TestCase
+import ast
+import builtins
+
+try:
+    from pkgutil import resolve_name
+except ImportError:
+    from pkgutil_resolve_name import (  # type: ignore[import-not-found, no-redef]
+        resolve_name,
+    )
+
+from attrs import define, field, frozen
+from twisted.python.modules import getModule as get_module
+
+from virtue.loaders import LazyAttributeLoader
+
+#: Class decorators which are known not to add or remove any methods.
+_HARMLESS_DECORATORS = {
+    f"{module}.{name}"
+    for module in ["unittest", "unittest.case"]
+    for name in ["expectedFailure", "skip", "skipIf", "skipUnless"]
+}
+
+#: Calls which (may) create classes or add attributes to them.
+_DYNAMIC_CALLS = {"setattr", "type", "types.new_class"}
+_DYNAMIC_CALLABLES = {"builtins.setattr", "builtins.type", "types.new_class"}
+
+
+class Dynamic(Exception):
+    """
+    A module does something which can't be understood without importing it.
+    """
+
+
+def _unknown(*args, **kwargs):
+    """
+    Stand in for a test method which hasn't been imported yet.
+    """
+
+
+def _dotted(node):
+    """
+    Turn a (possibly dotted) name expression into a string.
+    """
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        raise Dynamic(f"{ast.unparse(node)} is not a plain name")
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+def _is_main_guard(node):
+    test = node.test
+    return (
+        isinstance(test, ast.Compare)
+        and isinstance(test.left, ast.Name)
+        and test.left.id == "__name__"
+    )
+
+
+@frozen
+class _External:
+    """
+    An object from outside of the local modules, which hasn't been imported.
+    """
+
+    name: str
+
+    def load(self):
+        """
+        Import the object.
+        """
+        try:
+            return resolve_name(self.name)
+        except (ImportError, AttributeError, ValueError) as error:
+            raise Dynamic(f"Can't import {self.name}") from error
+
+
+@frozen
+class _Class:
+    """
+    A class which was parsed rather than imported.
+    """
+
+    module: str
+    qualname: str
+    bases: tuple
+    functions: frozenset[str]
+    others: frozenset[str]
+
+    #: Why the class can't be understood without importing it, if it can't
+    dynamic: str | None = None
+
+
+def _mro(cls):
+    """
+    Linearize the bases of a (parsed or imported) class.
+    """
+    if not isinstance(cls, _Class):
+        return list(cls.__mro__)
+
+    sequences = [_mro(base) for base in cls.bases] + [list(cls.bases)]
+    mro = [cls]
+    while True:
+        sequences = [sequence for sequence in sequences if sequence]
+        if not sequences:
+            return mro
+        for sequence in sequences:
+            head = sequence[0]
+            if not any(head in each[1:] for each in sequences):
+                break
+        else:
+            raise Dynamic(f"Inconsistent MRO for {cls.qualname}")
+        mro.append(head)
+        for sequence in sequences:
+            if sequence[0] == head:
+                del sequence[0]
+
+
+@define
+class _Module:
+    """
+    The top-level bindings of a parsed module.
+    """
+
+    name: str
+    path: str
+    package: str
+    bindings: dict = field(factory=dict)
+    calls: list = field(factory=list)
+
+    @classmethod
+    def parse(cls, name, path, source):
+        """
+        Parse the given module source.
+        """
+        is_package = path.endswith("__init__.py")
+        package = name if is_package else name.rpartition(".")[0]
+        module = cls(name=name, path=path, package=package)
+        module._bind_all(ast.parse(source).body, nested=False)
+        return module
+
+    def _bind_all(self, statements, nested):
+        for node in statements:
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.asname is None:
+                        top, _, _ = alias.name.partition(".")
+                        self._bind(top, ("import", top), nested)
+                    else:
+                        binding = "import", alias.name
+                        self._bind(alias.asname, binding, nested)
+            elif isinstance(node, ast.ImportFrom):
+                base = self._absolute(node)
+                for alias in node.names:
+                    if alias.name == "*":
+                        raise Dynamic(f"{self.name} uses a star import")
+                    target = f"{base}.{alias.name}"
+                    binding = "import", target
+                    self._bind(alias.asname or alias.name, binding, nested)
+            elif isinstance(node, ast.ClassDef):
+                if nested:
+                    raise Dynamic(f"{node.name} is defined conditionally")
+                self._bind(node.name, ("class", node), nested)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                self._bind(node.name, ("function", node), nested)
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+                self._bind_assignment(node, nested)
+            elif isinstance(node, ast.Expr):
+                self.calls.append((node.value, None))
+            elif isinstance(node, ast.If) and _is_main_guard(node):
+                continue
+            elif isinstance(node, (ast.If, ast.For, ast.While, ast.With)):
+                self._bind_all(node.body, nested=True)
+                self._bind_all(getattr(node, "orelse", []), nested=True)
+            elif isinstance(node, ast.Try):
+                self._bind_all(node.body, nested=True)
+                for handler in node.handlers:
+                    self._bind_all(handler.body, nested=True)
+                self._bind_all(node.orelse, nested=True)
+                self._bind_all(node.finalbody, nested=True)
+            elif isinstance(node, ast.Match):
+                raise Dynamic(f"{self.name} has a module-level match")
+
+    def _bind(self, name, binding, nested):
+        if nested:
+            self.bindings.setdefault(name, binding)
+        else:
+            self.bindings[name] = binding
+
+    def _bind_assignment(self, node, nested):
+        value = node.value
+        if value is None:
+            return
+        targets = (
+            node.targets if isinstance(node, ast.Assign) else [node.target]
+        )
+        for target in targets:
+            if not isinstance(target, ast.Name):
+                self.calls.append((value, None))
+                continue
+            self.calls.append((value, target.id))
+            try:
+                binding = "alias", _dotted(value)
+            except Dynamic:
+                binding = "value", None
+            self._bind(target.id, binding, nested=nested)
+
+    def _absolute(self, node):
+        if not node.level:
+            return node.module
+        parts = self.package.split(".")
+        if node.level > 1:
+            parts = parts[: -(node.level - 1)]
+        if node.module:
+            parts.append(node.module)
+        return ".".join(parts)
+
+
+def _may_be_class(name):
+    return name is not None and name[:1].isupper()
+
+
+def _creates_classes(function):
+    for node in ast.walk(function):
+        if isinstance(node, ast.ClassDef):
+            return True
+        if isinstance(node, ast.Call):
+            try:
+                name = _dotted(node.func)
+            except Dynamic:
+                continue
+            if name in _DYNAMIC_CALLS:
+                return True
+    return False
+
+
+@define
+class Analyzer:
+    """
+    Locate tests in modules by parsing them.
+
+    Arguments:
+
+        root (str):
+
+            the name of the top-level package whose modules should be
+            parsed, along with any others found in the same directory.
+            Objects from anywhere else are imported only when they're the
+            bases of classes.
+
+        is_test_method (collections.abc.Callable):
+
+            decide whether a method name is a test method. Since methods
+            are not imported, it is called with a placeholder value.
+
+    """
+
+    root: str = field()
+    is_test_method = field(repr=False)
+
+    #: The paths of the modules each located module's test classes span
+    dependencies: dict = field(factory=dict, repr=False)
+
+    _modules: dict = field(factory=dict, repr=False)
+    _dynamic: dict = field(factory=dict, repr=False)
+    _classes: dict = field(factory=dict, repr=False)
+    _local: dict = field(factory=dict, repr=False)
+
+    def locate_in_module(self, name, path):
+        """
+        Locate the tests in the module with the given name and path.
+
+        Raises `Dynamic` if the module can't be understood without being
+        imported.
+        """
+        module = self._module(name, path=path)
+        loaders, dependencies = [], set()
+        for attribute in sorted(module.bindings):
+            kind, _ = module.bindings[attribute]
+            if kind in {"class", "alias", "import"}:
+                cls = self._resolve(module, attribute)
+                if self._is_test_class(cls):
+                    loaders.extend(self._locate_in_class(cls, dependencies))
+        self.dependencies[name] = dependencies
+        return loaders
+
+    def _locate_in_class(self, cls, dependencies):
+        seen, tests = set(), []
+        for each in _mro(cls):
+            if isinstance(each, _Class):
+                dependencies.add(self._modules[each.module].path)
+                if each.dynamic is not None:
+                    raise Dynamic(each.dynamic)
+                names = each.functions
+                for name in each.others - names - seen:
+                    if self.is_test_method(name, _unknown):
+                        raise Dynamic(f"{each.qualname}.{name} is assigned")
+                seen.update(each.others - names)
+                members = ((name, _unknown) for name in names)
+            else:
+                members = (
+                    (name, getattr(each, name, None)) for name in vars(each)
+                )
+            for name, value in members:
+                if name in seen:
+                    continue
+                seen.add(name)
+                if self.is_test_method(name, value):
+                    tests.append(name)
+
+        if isinstance(cls, _Class):
+            module, qualname = cls.module, cls.qualname
+        else:
+            module, qualname = cls.__module__, cls.__qualname__
+        return [
+            LazyAttributeLoader(module=module, cls=qualname, attribute=name)
+            for name in sorted(tests)
+        ]
+
+    def _is_test_class(self, cls):
+        if isinstance(cls, _Class):
+            return any(self._is_test_class(base) for base in cls.bases)
+        return isinstance(cls, type) and issubclass(cls, TestCase)
+
+    def _module(self, name, path=None):
+        """
+        Parse the module with the given name, or return None if it's missing.
+        """
+        if name in self._dynamic:
+            raise self._dynamic[name]
+        module = self._modules.get(name)
+        if module is not None:
+            return module
+
+        if path is None:
+            try:
+                path = get_module(name).filePath.path
+            except KeyError:
+                return None
+
+        try:
+            module = self._modules[name] = self._parse(name, path)
+            for node, target in module.calls:
+                self._check_calls(module, node, target)
+        except Dynamic as error:
+            self._modules.pop(name, None)
+            self._dynamic[name] = error
+            raise
+        return module
+
+    def _parse(self, name, path):
+        if not path.endswith(".py"):
+            raise Dynamic(f"{name} is not Python source")
+        with open(path, "rb") as file:  # noqa: PTH123
+            source = file.read()
+        try:
+            return _Module.parse(name=name, path=path, source=source)
+        except SyntaxError as error:
+            raise Dynamic(f"{name} isn't valid syntax") from error
+
+    def _check_calls(self, module, node, target):
+        """
+        Complain about module-level calls which may create or modify classes.
+
+        Calls whose results are bound to capitalized names (i.e. which look
+        like they may be classes) are assumed to create classes unless
+        they're known not to. Calls to things which haven't been imported
+        may still be bound to constants (names in all capitals).
+        """
+        for each in ast.walk(node):
+            if not isinstance(each, ast.Call):
+                continue
+
+            for argument in each.args:
+                if isinstance(argument, ast.Name):
+                    binding = module.bindings.get(argument.id)
+                    if binding is not None and binding[0] == "class":
+                        raise Dynamic(f"{argument.id} is passed to a call")
+
+            try:
+                called = self._resolve(module, _dotted(each.func))
+            except Dynamic:
+                called = None
+
+            if isinstance(called, ast.AST):
+                if _creates_classes(called):
+                    raise Dynamic(f"{ast.unparse(each)} may create classes")
+            elif isinstance(called, _External):
+                if called.name in _DYNAMIC_CALLABLES:
+                    raise Dynamic(f"{ast.unparse(each)} may create classes")
+                if _may_be_class(target) and not target.isupper():
+                    raise Dynamic(f"{target} may be a class")
+            elif isinstance(called, _Class):
+                continue
+            elif _may_be_class(target):
+                raise Dynamic(f"{target} may be a class")
+
+    def _resolve(self, module, dotted):
+        """
+        Resolve a dotted name within the given module.
+        """
+        first, _, rest = dotted.partition(".")
+        binding = module.bindings.get(first)
+        if binding is None:
+            if hasattr(builtins, first):
+                return self._resolve_absolute(f"builtins.{dotted}")
+            raise Dynamic(f"Can't resolve {dotted} in {module.name}")
+
+        kind, value = binding
+        if kind == "class":
+            if rest:
+                raise Dynamic(f"{dotted} is a nested class")
+            return self._class(module, value)
+        elif kind == "import":
+            target = f"{value}.{rest}" if rest else value
+            return self._resolve_absolute(target)
+        elif kind == "alias":
+            target = f"{value}.{rest}" if rest else value
+            return self._resolve(module, target)
+        elif kind == "function" and not rest:
+            return value
+        raise Dynamic(f"{dotted} in {module.name} isn't a class")
+
+    def _resolve_absolute(self, dotted):
+        top, _, _ = dotted.partition(".")
+        if top == self.root:
+            return self._resolve_locally(dotted)
+        elif not self._is_local(top):
+            return _External(dotted)
+
+        # Other local packages are parsed where possible, but aren't ours to
+        # declare dynamic -- whatever isn't understood is imported instead.
+        try:
+            resolved = self._resolve_locally(dotted)
+        except Dynamic:
+            return _External(dotted)
+        if isinstance(resolved, _Class) and resolved.dynamic is not None:
+            return _External(dotted)
+        return resolved
+
+    def _is_local(self, top):
+        """
+        Whether the given top-level module lives alongside our root package.
+        """
+        if not self._local:
+            self._local[self.root] = self._path_entry(self.root)
+        if top not in self._local:
+            self._local[top] = self._path_entry(top)
+        entry = self._local[top]
+        return entry is not None and entry == self._local[self.root]
+
+    def _path_entry(self, name):
+        try:
+            return get_module(name).pathEntry.filePath
+        except (KeyError, AttributeError):
+            return None
+
+    def _resolve_locally(self, dotted):
+        parts = dotted.split(".")
+        for i in range(len(parts), 0, -1):
+            module = self._module(".".join(parts[:i]))
+            if module is None:
+                continue
+            rest = ".".join(parts[i:])
+            return self._resolve(module, rest) if rest else module
+        raise Dynamic(f"Can't find {dotted}")
+
+    def _class(self, module, node):
+        key = module.name, node.name
+        if key in self._classes:
+            cls = self._classes[key]
+            if cls is None:
+                raise Dynamic(f"{node.name} inherits from itself")
+            return cls
+
+        self._classes[key] = None  # guard against cycles
+        cls = self._classes[key] = self._parse_class(module, node)
+        return cls
+
+    def _parse_class(self, module, node):
+        bases = []
+        for base in node.bases:
+            if isinstance(base, ast.Subscript):
+                base = base.value
+            resolved = self._resolve(module, _dotted(base))
+            if isinstance(resolved, _External):
+                resolved = resolved.load()
+            bases.append(resolved)
+
+        functions, others, dynamic = set(), set(), None
+        if node.keywords:
+            dynamic = f"{node.name} has a metaclass or class keywords"
+
+        for each in node.body:
+            if isinstance(each, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                functions.add(each.name)
+            elif isinstance(each, ast.ClassDef):
+                others.add(each.name)
+            elif isinstance(each, (ast.Assign, ast.AnnAssign)):
+                targets = (
+                    each.targets
+                    if isinstance(each, ast.Assign)
+                    else [each.target]
+                )
+                for target in targets:
+                    if isinstance(target, ast.Name):
+                        others.add(target.id)
+                    else:
+                        dynamic = f"{node.name} has a complex assignment"
+            elif not isinstance(each, (ast.Expr, ast.Pass)):
+                dynamic = f"{node.name} has a dynamic body"
+
+        for decorator in node.decorator_list:
+            if isinstance(decorator, ast.Call):
+                decorator = decorator.func
+            try:
+                resolved = self._resolve(module, _dotted(decorator))
+            except Dynamic:
+                resolved = None
+            if not (
+                isinstance(resolved, _External)
+                and resolved.name in _HARMLESS_DECORATORS
+            ):
+                dynamic = f"{node.name} has a class decorator"
+
+        return _Class(
+            module=module.name,
+            qualname=node.name,
+            bases=tuple(bases) or (object,),
+            functions=frozenset(functions),
+            others=frozenset(others),
+            dynamic=dynamic,
+        )
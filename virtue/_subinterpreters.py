@@ -0,0 +1,94 @@
+"""
+Running code within subinterpreters, on versions of Python which have them.
+
+Each subinterpreter has its own modules and (as they're created isolated)
+its own GIL, so code within them runs in parallel, much as it would in
+separate processes, but without the cost of starting one (or of importing
+everything again in it, for modules which were imported before forking).
+
+Subinterpreters are only available on Python 3.13 and later, and only via
+a private module on 3.13 (which `concurrent.interpreters` wraps on 3.14).
+"""
+
+from __future__ import annotations
+
+import pickle
+import sys
+import threading
+
+try:
+    import _interpreters  # type: ignore[import-not-found]
+except ImportError:
+    _interpreters = None
+
+
+def available():
+    """
+    Whether subinterpreters are available here.
+    """
+    return _interpreters is not None
+
+
+class Unsupported(RuntimeError):
+    """
+    Something can't be done within a subinterpreter.
+    """
+
+
+def unsupported(exc_type, exc_value):
+    """
+    Whether an exception says something can't be done in a subinterpreter.
+
+    That's so for extension modules which don't support being imported in
+    one, for forking, and for anything which raises `Unsupported`.
+    """
+    if issubclass(exc_type, Unsupported):
+        return True
+    return issubclass(exc_type, (ImportError, RuntimeError)) and (
+        "subinterpreters" in str(exc_value)
+    )
+
+
+class Interpreter:
+    """
+    A subinterpreter, running a script in a thread of its own.
+
+    The script is run with our `sys.path` (so that it finds the same modules
+    we do), and with the given objects (which are pickled) as globals.
+    """
+
+    def __init__(self, script, **globals):
+        self.failure = None
+        self._id = _interpreters.create()
+        shared = {name: pickle.dumps(value) for name, value in globals.items()}
+        shared["path"] = pickle.dumps(sys.path)
+        prelude = "\n".join(
+            f"{name} = __import__('pickle').loads({name})" for name in shared
+        )
+        script = f"{prelude}\n__import__('sys').path[:] = path\n{script}"
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(script, shared),
+            daemon=True,
+        )
+
+    def start(self):
+        """
+        Start running the script.
+        """
+        self._thread.start()
+        return self
+
+    def _run(self, script, shared):
+        try:
+            failure = _interpreters.exec(self._id, script, shared)
+        finally:
+            _interpreters.destroy(self._id)
+        if failure is not None:
+            self.failure = failure.errdisplay
+
+    def join(self):
+        """
+        Wait for the script to finish.
+        """
+        self._thread.join()
@@ -0,0 +1,35 @@
+"""
+Running tests in threads, on free-threaded builds of Python.
+
+Threads share everything, including imported modules, so they're the
+cheapest sort of worker there is, but they only run in parallel without
+a GIL, so they're only used on builds of Python without one.
+"""
+
+import sys
+
+
+def available():
+    """
+    Whether tests can run in parallel threads here.
+
+    They can on free-threaded builds of Python, so long as warning filters
+    are kept per thread (which they are by default on such builds from 3.14
+    on), as they're changed while running tests.
+    """
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)
+    return not is_gil_enabled() and getattr(
+        sys.flags,
+        "context_aware_warnings",
+        False,
+    )
+
+
+def safe(cls):
+    """
+    Whether a test class' tests may run alongside those of others.
+
+    Classes whose tests may not (say, because they change global state)
+    should set a ``thread_unsafe`` attribute, and are then run on their own.
+    """
+    return not getattr(cls, "thread_unsafe", False)
@@ -0,0 +1,218 @@
+"""
+Limiting how long each test may take.
+
+A test which runs for too long is interrupted (with ``SIGALRM``) and fails
+with an error showing what every thread was doing at the time. Tests are
+only ever interrupted while they're within a part of the test itself (its
+``setUp``, test method, ``tearDown`` or cleanups), never while `unittest`
+is reporting on them.
+
+Should a test not be interruptible (say, because it's stuck in C code which
+never returns to the interpreter), a serial run reports it as an error
+somewhat later, finishes reporting on the run and exits, while parallel runs
+replace the stuck worker instead (see ``virtue._parallel``). As a last
+resort, should even that not be possible (because the stuck code never lets
+another thread run), `faulthandler` dumps every thread's stack and exits the
+process later still.
+
+Within a subinterpreter, neither is possible, so tests with a limit can't
+be run there at all.
+"""
+
+from contextlib import suppress
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+
+from virtue import _subinterpreters
+
+try:
+    import faulthandler
+except ImportError:  # e.g. within a subinterpreter, where there's no backstop
+    faulthandler = None  # type: ignore[assignment]
+
+#: How long past its limit a test which can't be interrupted is given
+#: before its process is given up on
+GRACE = 5.0
+
+#: How long to wait to interrupt a test which ran out of time while it was
+#: being reported on
+_RETRY = 0.01
+
+
+class TimedOut(Exception):
+    """
+    A test ran for longer than it was allowed to.
+    """
+
+
+def of(case, default=None):
+    """
+    How long a test may take, in seconds, or None if it has no limit.
+
+    Just as with `twisted.trial`, a ``timeout`` attribute on the test
+    method, or failing that on its class, overrides the default.
+    """
+    method = getattr(case, getattr(case, "_testMethodName", ""), None)
+    for each in method, type(case):
+        seconds = getattr(each, "timeout", None)
+        if isinstance(seconds, (int, float)):
+            return seconds
+    return default
+
+
+def stacks():
+    """
+    Format what every thread is currently doing.
+    """
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    current = threading.get_ident()
+    formatted = []
+    for ident, frame in sys._current_frames().items():
+        name = names.get(ident, f"0x{ident:x}")
+        which = " (current)" if ident == current else ""
+        formatted.append(f"Thread {name}{which} (most recent call last):\n")
+        formatted.extend(traceback.format_stack(frame))
+    return "".join(formatted)
+
+
+class _Limit:
+    """
+    Interrupt a test if it runs for longer than some number of seconds.
+    """
+
+    def __init__(self, case, seconds, backstop):
+        self._case = case
+        self._seconds = seconds
+        self._backstop = backstop
+        self._inside = False
+
+    def apply(self):
+        """
+        Make the test enforce its limit when it's run.
+        """
+        case = self._case
+        for attribute in (
+            "_callSetUp",
+            "_callTestMethod",
+            "_callTearDown",
+            "_callCleanup",
+        ):
+            call = getattr(case, attribute, None)
+            if call is not None:
+                setattr(case, attribute, self._part(call))
+        case.run = self._run(case.run)
+
+    def _part(self, call):
+        def part(*args, **kwargs):
+            self._inside = True
+            try:
+                return call(*args, **kwargs)
+            finally:
+                self._inside = False
+
+        return part
+
+    def _run(self, run):
+        def limited(result=None):
+            seconds = self._seconds
+            if faulthandler is not None:
+                faulthandler.dump_traceback_later(
+                    seconds + 2 * GRACE,
+                    exit=True,
+                )
+            stuck = None
+            backstop = self._backstop and faulthandler is not None
+            if backstop and result is not None:
+                stuck = threading.Timer(
+                    seconds + GRACE,
+                    self._stuck,
+                    args=(result,),
+                )
+                stuck.daemon = True
+                stuck.start()
+            try:
+                return self._interrupting(run, result)
+            finally:
+                if stuck is not None:
+                    stuck.cancel()
+                if faulthandler is not None:
+                    faulthandler.cancel_dump_traceback_later()
+
+        return limited
+
+    def _interrupting(self, run, result):
+        """
+        Run the test, interrupting it once it's out of time, if possible.
+        """
+        seconds = self._seconds
+        handler, interruptible = None, False
+        if hasattr(signal, "setitimer"):
+            # Only the main thread (of the main interpreter) may.
+            with suppress(ValueError):
+                handler = signal.signal(signal.SIGALRM, self._expired)
+                interruptible = True
+        if not interruptible:
+            if faulthandler is None:
+                raise _subinterpreters.Unsupported(
+                    "Tests can't be limited within subinterpreters.",
+                )
+            return run(result)
+
+        started = time.monotonic()
+        outer, _ = signal.setitimer(signal.ITIMER_REAL, seconds)
+        try:
+            return run(result)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, handler)
+            if outer:  # someone else's timer (e.g. a run within a test)
+                remaining = outer - (time.monotonic() - started)
+                signal.setitimer(
+                    signal.ITIMER_REAL,
+                    max(remaining, _RETRY),
+                )
+
+    def _stuck(self, result):
+        """
+        Give up on a test which couldn't be interrupted, and on the run.
+
+        The test errors, and the run is finished off (so that whatever
+        reports on it can) before exiting, as there's no way to go on.
+        """
+        error = TimedOut(
+            f"{self._case.id()} took longer than {self._seconds}s, and "
+            f"couldn't be interrupted.\n\n{stacks()}",
+        )
+        result.addError(self._case, (TimedOut, error, None))
+        result.stopTest(self._case)
+        getattr(result, "stopTestRun", lambda: None)()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(1)
+
+    def _expired(self, signum, frame):
+        if not self._inside:
+            signal.setitimer(signal.ITIMER_REAL, _RETRY)
+            return
+        # Give any cleanup which hangs the same amount of time.
+        signal.setitimer(signal.ITIMER_REAL, self._seconds)
+        raise TimedOut(
+            f"{self._case.id()} took longer than {self._seconds}s.\n\n"
+            f"{stacks()}",
+        )
+
+
+def limit(case, seconds, backstop=True):
+    """
+    Limit how long a test may take when it's run, if it's a test that can be.
+
+    Unless told not to back the limit up (say, because something else is
+    watching for stuck tests), a test which can't be interrupted ends the
+    run, as an error.
+    """
+    if seconds is not None and hasattr(case, "_callTestMethod"):
+        _Limit(case, seconds, backstop=backstop).apply()
@@ -0,0 +1,300 @@
+"""
+Watching source files, and forgetting the modules which change.
+
+Changes are noticed with inotify where it's available (i.e. on Linux), and
+otherwise by periodically checking each file's modification time.
+
+Once a file changes, its module is removed from `sys.modules`, along with
+any module which imported something from it (and so on), so that they're
+imported afresh the next time tests are located, while every other module
+(such as heavy dependencies) stays imported.
+"""
+
+from contextlib import suppress
+from pathlib import Path
+import ctypes
+import ctypes.util
+import importlib
+import os
+import select
+import struct
+import sys
+import time
+
+#: How long to wait for further changes after one is seen, so that e.g. an
+#: editor which writes a file in a few steps causes only one run
+_SETTLE = 0.05
+
+#: How often to check modification times when polling
+_INTERVAL = 0.5
+
+_IN_MODIFY = 0x2
+_IN_ATTRIB = 0x4
+_IN_CLOSE_WRITE = 0x8
+_IN_MOVED_FROM = 0x40
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_ISDIR = 0x40000000
+_MASK = (
+    _IN_MODIFY
+    | _IN_ATTRIB
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+)
+_EVENT = struct.Struct("iIII")
+
+#: The modules which are never forgotten, as they're running the tests
+_OURS = "virtue"
+
+
+def _directories(root):
+    """
+    The directories within a root which might contain source files.
+    """
+    for path, directories, _ in os.walk(root):
+        directories[:] = [
+            each
+            for each in directories
+            if not each.startswith(".") and each != "__pycache__"
+        ]
+        yield path
+
+
+class _Inotify:
+    """
+    Find out about changes to files as they happen, using inotify.
+    """
+
+    def __init__(self, roots):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._watched = {}
+        for root in roots:
+            for directory in _directories(root):
+                self._watch(directory)
+
+    def _watch(self, directory):
+        descriptor = self._add_watch(self._fd, os.fsencode(directory), _MASK)
+        if descriptor >= 0:
+            self._watched[descriptor] = directory
+
+    def close(self):
+        """
+        Stop watching.
+        """
+        os.close(self._fd)
+
+    def changes(self, timeout=None):
+        """
+        The paths which changed, waiting up to a timeout for any to.
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        data = os.read(self._fd, 64 * 1024)
+        changed, offset = set(), 0
+        while offset < len(data):
+            descriptor, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            directory = self._watched.get(descriptor)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))  # noqa: PTH118
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    for each in _directories(path):
+                        self._watch(each)
+                continue
+            changed.add(path)
+        return changed
+
+
+class _Poller:
+    """
+    Find out about changes to files by checking on them periodically.
+    """
+
+    def __init__(self, roots, interval=_INTERVAL):
+        self._roots = roots
+        self._interval = interval
+        self._seen = self._scan()
+
+    def _scan(self):
+        seen = {}
+        for root in self._roots:
+            for directory in _directories(root):
+                for path in Path(directory).glob("*.py"):
+                    with suppress(OSError):
+                        seen[str(path)] = path.stat().st_mtime_ns
+        return seen
+
+    def close(self):
+        """
+        Stop watching.
+        """
+
+    def changes(self, timeout=None):
+        """
+        The paths which changed, waiting up to a timeout for any to.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._interval
+            if deadline is not None:
+                wait = min(wait, max(deadline - time.monotonic(), 0))
+            time.sleep(wait)
+            seen, self._seen = self._seen, self._scan()
+            changed = {
+                path
+                for path in seen.keys() | self._seen.keys()
+                if seen.get(path) != self._seen.get(path)
+            }
+            if changed or (
+                deadline is not None and time.monotonic() >= deadline
+            ):
+                return changed
+
+
+def watch(roots):
+    """
+    Watch for changes to Python source files within some directories.
+
+    Yields the set of paths which changed each time any do, forever.
+    Hidden directories (like ``.git``) are ignored.
+    """
+    roots = [os.path.abspath(root) for root in roots]  # noqa: PTH100
+    try:
+        source = _Inotify(roots)
+    except (AttributeError, OSError):  # no inotify here
+        source = _Poller(roots)
+    try:
+        while True:
+            changed = source.changes()
+            while True:
+                more = source.changes(timeout=_SETTLE)
+                if not more:
+                    break
+                changed |= more
+            changed = {path for path in changed if path.endswith(".py")}
+            if changed:
+                yield changed
+    finally:
+        source.close()
+
+
+def _is_ours(name):
+    return name == _OURS or (
+        name.startswith(f"{_OURS}.") and not name.startswith(f"{_OURS}.tests")
+    )
+
+
+def _imports_from(module, names):
+    """
+    Whether the module imported any of the named modules, or anything in them.
+    """
+    packages = {name.rpartition(".")[0] for name in names}
+    for attribute, value in list(vars(module).items()):
+        if isinstance(value, type(sys)):
+            if value.__name__ == f"{module.__name__}.{attribute}":
+                continue  # a package's own submodule
+            # import a.b.c refers to a, from which c is found
+            name = value.__name__
+            if name in names or any(
+                each == name or each.startswith(f"{name}.")
+                for each in packages
+            ):
+                return True
+        elif getattr(value, "__module__", None) in names:
+            return True
+    return False
+
+
+def forget(paths, root=None):
+    """
+    Forget the modules whose source files changed, and those which use them.
+
+    Forgetting a package forgets its submodules too. Only modules within
+    the root directory (by default, the current one) are considered to use
+    others, so installed packages are never
+    forgotten, nor are our own modules (other than our tests).
+
+    Returns:
+
+        the names of the modules which were forgotten, and the paths which
+        were not the source of any imported module (such as new files)
+
+    """
+    root = os.path.join(os.path.abspath(root or os.curdir), "")  # noqa: PTH100, PTH118
+    local = {}
+    by_path = {}
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if path is None or _is_ours(name):
+            continue
+        path = os.path.abspath(path)  # noqa: PTH100
+        by_path[path] = name
+        if path.startswith(root):
+            local[name] = module
+
+    paths = {os.path.abspath(path) for path in paths}  # noqa: PTH100
+    forgotten = {by_path[path] for path in paths if path in by_path}
+    unknown = {path for path in paths if path not in by_path}
+
+    remaining = local.keys() - forgotten
+    while True:
+        using = {
+            name
+            for name in remaining
+            if _imports_from(local[name], forgotten)
+            or any(name.startswith(f"{each}.") for each in forgotten)
+        }
+        if not using:
+            break
+        forgotten |= using
+        remaining -= using
+
+    for name in forgotten:
+        module = sys.modules.pop(name, None)
+        parent, _, attribute = name.rpartition(".")
+        if getattr(sys.modules.get(parent), attribute, None) is module:
+            delattr(sys.modules[parent], attribute)
+    importlib.invalidate_caches()
+    return forgotten, unknown
+
+
+def affected(tests, forgotten, unknown):
+    """
+    Decide which of the given tests to run again, after modules changed.
+
+    Tests are run again if their module was forgotten (as are tests given
+    by path, rather than by name). If any file which wasn't the source of an
+    imported module changed (such as a new test module), every test is.
+    """
+    if unknown:
+        return list(tests)
+
+    rerun = []
+    for test in tests:
+        if ":" in test or os.sep in test or test.endswith(".py"):
+            rerun.append(test)  # a path, which is simplest to just run
+            continue
+        if any(
+            test == name or test.startswith(f"{name}.") for name in forgotten
+        ):
+            rerun.append(test)
+            continue
+        rerun.extend(
+            sorted(name for name in forgotten if name.startswith(f"{test}.")),
+        )
+    return rerun
@@ -4,16 +4,28 @@ Loaders take a named test case and load the test appropriately.
 
 from __future__ import annotations
 
+from functools import reduce
+from importlib import import_module
 from typing import TYPE_CHECKING
+from unittest.suite import _ErrorHolder  # type: ignore[attr-defined]
 import itertools
+import sys
+import time
+import unittest
+import warnings
 
 from attrs import field, frozen
 
+from virtue import _fork, _timeout
+from virtue._impact import Tracer
+
 if TYPE_CHECKING:
     import twisted.python.modules
 
     from virtue.locators import ObjectLocator
 
+_DEFAULT_SET_UP_CLASS = unittest.TestCase.setUpClass.__func__  # type: ignore[attr-defined]
+
 
 @frozen
 class AttributeLoader:
@@ -29,6 +41,14 @@ class AttributeLoader:
     cls: type
     attribute: str
 
+    @property
+    def id(self):
+        """
+        The fully qualified name of the test this loader loads.
+        """
+        cls = self.cls
+        return f"{cls.__module__}.{cls.__qualname__}.{self.attribute}"
+
     def load(self):
         """
         Load as a single test.
@@ -36,6 +56,40 @@ class AttributeLoader:
         return [self.cls(self.attribute)]
 
 
+@frozen
+class LazyAttributeLoader:
+    """
+    I load a test case by name, importing its class only once I'm loaded.
+
+    Otherwise I'm equivalent to an `AttributeLoader`.
+    """
+
+    module: str
+    cls: str
+    attribute: str
+
+    @property
+    def id(self):
+        """
+        The fully qualified name of the test this loader loads.
+        """
+        return f"{self.module}.{self.cls}.{self.attribute}"
+
+    def resolve(self):
+        """
+        Import the test's module, returning an equivalent `AttributeLoader`.
+        """
+        module = import_module(self.module)
+        cls = reduce(getattr, self.cls.split("."), module)
+        return AttributeLoader(cls=cls, attribute=self.attribute)
+
+    def load(self):
+        """
+        Import the test's module and load it as a single test.
+        """
+        return self.resolve().load()
+
+
 @frozen
 class ModuleLoader:
     """
@@ -45,11 +99,392 @@ class ModuleLoader:
     locator: ObjectLocator = field(repr=False)
     module: twisted.python.modules.PythonModule
 
+    def locate(self):
+        """
+        Locate (but do not load) all of the tests in the module.
+        """
+        return self.locator.locate_in_module(self.module.load())
+
     def load(self):
         """
         Load all test cases in the module.
         """
-        class_loaders = self.locator.locate_in_module(self.module.load())
         return itertools.chain.from_iterable(
-            class_loader.load() for class_loader in class_loaders
+            class_loader.load() for class_loader in self.locate()
+        )
+
+
+class _SkippedTest:
+    """
+    A stand-in for a test from a class which is skipped entirely.
+
+    It reports itself as skipped when run, just as the real test would,
+    but without the test's class being instantiated.
+    """
+
+    def __init__(self, cls, attribute):
+        self._cls = cls
+        self._testMethodName = attribute
+        self._testMethodDoc = getattr(cls, attribute).__doc__
+
+    @property  # type: ignore[misc]
+    def __class__(self):
+        return self._cls
+
+    def __eq__(self, other):
+        if not isinstance(other, _SkippedTest):
+            return NotImplemented
+        return (self._cls, self._testMethodName) == (
+            other._cls,
+            other._testMethodName,
+        )
+
+    def __hash__(self):
+        return hash((self._cls, self._testMethodName))
+
+    def __repr__(self):
+        return f"<{self.id()} (skipped)>"
+
+    __str__ = unittest.TestCase.__str__
+    id = unittest.TestCase.id
+    shortDescription = unittest.TestCase.shortDescription
+
+    def __call__(self, result):
+        return self.run(result)
+
+    def run(self, result):
+        """
+        Report this test as skipped.
+        """
+        result.startTest(self)
+        try:
+            reason = getattr(self._cls, "__unittest_skip_why__", "")
+            addSkip = getattr(result, "addSkip", None)
+            if addSkip is None:
+                warnings.warn(
+                    "TestResult has no addSkip method, skips not reported",
+                    RuntimeWarning,
+                    stacklevel=2,
+                )
+                result.addSuccess(self)
+            else:
+                addSkip(self, reason)
+        finally:
+            result.stopTest(self)
+        return result
+
+
+class _Unloadable:
+    """
+    A stand-in for the tests from a class which couldn't be loaded.
+
+    It reports the error when run, outside of any test, as a class fixture
+    error would be.
+    """
+
+    def __init__(self, name, exc_info):
+        self._name = name
+        self._exc_info = exc_info
+
+    def __repr__(self):
+        return f"<{self._name} (unloadable)>"
+
+    def id(self):
+        """
+        The fully qualified name of the class which couldn't be loaded.
+        """
+        return self._name
+
+    def __call__(self, result):
+        return self.run(result)
+
+    def run(self, result):
+        """
+        Report the error.
+        """
+        result.addError(_ErrorHolder(self._name), self._exc_info)
+        return result
+
+
+def _class_name(loader):
+    """
+    The fully qualified name of the class (or module) a loader loads from.
+
+    Returns None for other loaders, whose tests can't be named in advance.
+    """
+    if isinstance(loader, ModuleLoader):
+        return loader.module.name
+    id = getattr(loader, "id", None)
+    return None if id is None else id.rpartition(".")[0]
+
+
+def load_to_run(loader):
+    """
+    Load the tests from a loader, right before they're to be run.
+
+    Tests from classes which are skipped entirely (e.g. by `unittest.skip`)
+    are not loaded at all, only reported as skipped.
+    """
+    if isinstance(loader, LazyAttributeLoader):
+        loader = loader.resolve()
+    if isinstance(loader, AttributeLoader) and getattr(
+        loader.cls,
+        "__unittest_skip__",
+        False,
+    ):
+        return [_SkippedTest(cls=loader.cls, attribute=loader.attribute)]
+    return list(loader.load())
+
+
+class StreamingSuite(unittest.TestSuite):
+    """
+    I run the tests from some loaders, loading each right before it runs.
+
+    Unlike a normal suite, which holds on to every one of its tests from
+    the moment it's created, I load tests as I'm iterated over (and then
+    forget them), so I may only be run once.
+
+    Tests are loaded under whatever warning filters were in place when I
+    was created, even if I am then run under different ones.
+
+    If given a timeout, tests which take longer than it (or than their
+    own ``timeout`` attribute) are interrupted, and error. One which can't
+    be interrupted ends the run (see ``virtue._timeout``).
+
+    If given a concurrency of more than one, tests from classes with a true
+    ``concurrent`` attribute are run that many at a time, on an event loop
+    they share (see ``virtue._concurrent``), unless they have a time limit or
+    that isn't available here (before Python 3.11).
+
+    If asked to fork, each other test is run in a child process of its own,
+    forked once its module and class are set up (see ``virtue._fork``).
+
+    Tests which can't be loaded (say, because their module can't be
+    imported) error once for their class, which is otherwise skipped.
+    """
+
+    #: Whether to report tests which can't be loaded, rather than raising
+    _report_unloadable = True
+
+    #: Whether to end the run, reporting the test as an error, should a test
+    #: with a time limit not be interruptible
+    _report_stuck = True
+
+    def __init__(self, loaders, timeout=None, concurrency=1, fork=False):
+        super().__init__()
+        self._loaders = loaders
+        self._timeout = timeout
+        self._concurrent = None
+        if concurrency > 1:
+            from virtue import _concurrent  # noqa: PLC0415 (rarely needed)
+
+            if _concurrent.available():
+                self._concurrent = _concurrent
+        self._concurrency = concurrency
+        self._fork = fork
+        self._filters = warnings.filters[:]
+        self._add_phase_duration = None
+        self._add_called = None
+        self._tracer = None
+
+    def __iter__(self):
+        together = []
+        for case in self._load():
+            concurrent = (
+                self._concurrent is not None
+                and self._concurrent.eligible(case)
+                and _timeout.of(case, self._timeout) is None
+            )
+            if together and (
+                not concurrent or type(case) is not type(together[0])
+            ):
+                yield from self._run_together(together)
+                together = []
+            if concurrent:
+                together.append(case)
+            else:
+                yield case
+                self._attribute(case.id())
+        if together:
+            yield from self._run_together(together)
+
+    def _run_together(self, cases):
+        batch = self._concurrent.Batch(
+            cases=cases,
+            concurrency=self._concurrency,
         )
+        yield batch
+        self._attribute(batch.id())
+
+    def _load(self):
+        loaders = iter(self._loaders)
+        unloadable = set()
+        while True:
+            with warnings.catch_warnings():
+                warnings.filters[:] = self._filters
+                loader = next(loaders, None)
+                if loader is None:
+                    return
+                name = _class_name(loader)
+                if name in unloadable:
+                    continue
+                try:
+                    cases = load_to_run(loader)
+                except Exception:
+                    if name is None or not self._report_unloadable:
+                        raise
+                    unloadable.add(name)
+                    yield _Unloadable(name=name, exc_info=sys.exc_info())
+                    continue
+            if cases:  # importing the module may have called something
+                self._attribute(cases[0].__class__.__module__)
+            for case in cases:
+                if self._add_phase_duration is not None:
+                    _time_phases(case, self._add_phase_duration)
+                _timeout.limit(
+                    case,
+                    _timeout.of(case, self._timeout),
+                    backstop=self._report_stuck and not self._fork,
+                )
+                if self._fork:
+                    _fork.isolate(case)
+            yield from cases
+
+    def run(self, result, debug=False):
+        """
+        Run my tests.
+
+        If the result has an ``addPhaseDuration`` method, it's told how long
+        each test's ``setUp`` and ``tearDown`` took.
+
+        If it has an ``addCalled`` method, it's told which functions each
+        test called, as well as which ones each class or module fixture
+        called (under the class or module's name).
+        """
+        self._add_phase_duration = getattr(result, "addPhaseDuration", None)
+        self._add_called = getattr(result, "addCalled", None)
+        if self._add_called is None:
+            return super().run(result, debug)
+
+        self._tracer = Tracer()
+        self._tracer.start()
+        try:
+            return super().run(result, debug)
+        finally:
+            self._tracer.stop()
+            self._tracer = None
+
+    def _attribute(self, name):
+        """
+        Tell the result which functions were called since I last did so.
+        """
+        if self._tracer is None:
+            return
+        functions = self._tracer.take()
+        if functions:
+            self._add_called(name, functions)
+
+    def _removeTestAtIndex(self, index):
+        """
+        There's nothing to remove, I never held on to the test.
+        """
+
+    def _handleModuleFixture(self, test, result):
+        """
+        Set up the test's module, timing it if it has a fixture to set up.
+        """
+        name = test.__class__.__module__
+        if name == self._get_previous_module(result) or not hasattr(
+            sys.modules.get(name),
+            "setUpModule",
+        ):
+            super()._handleModuleFixture(test, result)
+            self._attribute(name)
+            return
+
+        # Tear down the previous module first, so it isn't timed too.
+        self._handleModuleTearDown(result)
+        result._previousTestClass = None
+        started = time.perf_counter()
+        super()._handleModuleFixture(test, result)
+        _add_fixture_duration(result, name, time.perf_counter() - started)
+        self._attribute(name)
+
+    def _handleModuleTearDown(self, result):
+        """
+        Tear down the previous module.
+        """
+        name = self._get_previous_module(result)
+        super()._handleModuleTearDown(result)
+        if name is not None:
+            self._attribute(name)
+
+    def _tearDownPreviousClass(self, test, result):
+        """
+        Tear down the previous class, if the test is from a different one.
+        """
+        cls = getattr(result, "_previousTestClass", None)
+        super()._tearDownPreviousClass(test, result)
+        if cls is not None and cls != test.__class__:
+            self._attribute(f"{cls.__module__}.{cls.__qualname__}")
+
+    def _handleClassSetUp(self, test, result):
+        """
+        Set up the test's class, timing it if it has a fixture to set up.
+        """
+        cls = test.__class__
+        if (
+            cls == getattr(result, "_previousTestClass", None)
+            or getattr(result, "_moduleSetUpFailed", False)
+            or getattr(cls, "__unittest_skip__", False)
+            or not has_class_fixture(cls)
+        ):
+            super()._handleClassSetUp(test, result)
+            self._attribute(f"{cls.__module__}.{cls.__qualname__}")
+            return
+
+        started = time.perf_counter()
+        super()._handleClassSetUp(test, result)
+        name = f"{cls.__module__}.{cls.__qualname__}"
+        _add_fixture_duration(result, name, time.perf_counter() - started)
+        self._attribute(name)
+
+
+def has_class_fixture(cls):
+    """
+    Whether the given test class overrides `unittest.TestCase.setUpClass`.
+    """
+    set_up = getattr(cls, "setUpClass", None)
+    return getattr(set_up, "__func__", set_up) is not _DEFAULT_SET_UP_CLASS
+
+
+def _time_phases(case, add_phase_duration):
+    """
+    Time how long a test's ``setUp`` and ``tearDown`` take when it's run.
+    """
+    for phase, attribute in (
+        ("setUp", "_callSetUp"),
+        ("tearDown", "_callTearDown"),
+    ):
+        call = getattr(case, attribute, None)
+        if call is None:
+            continue
+
+        def timed(call=call, phase=phase):
+            started = time.perf_counter()
+            try:
+                call()
+            finally:
+                elapsed = time.perf_counter() - started
+                add_phase_duration(case, phase, elapsed)
+
+        setattr(case, attribute, timed)
+
+
+def _add_fixture_duration(result, name, elapsed):
+    """
+    Tell the result how long a class or module took to set up, if it cares.
+    """
+    add = getattr(result, "addFixtureDuration", None)
+    if add is not None:
+        add(name, elapsed)
@@ -2,8 +2,15 @@
 Loaders find tests which are referenced by names, preparing them for running.
 """
 
+from fnmatch import fnmatchcase
+from importlib import import_module
+from operator import attrgetter
+from pathlib import Path
 from unittest import TestCase
 import inspect
+import os
+import re
+import sys
 
 try:
     from pkgutil import resolve_name
@@ -12,11 +19,14 @@ except ImportError:
         resolve_name,
     )
 
-from attrs import define, field
-from twisted.python.modules import getModule as get_module
+from attrs import define, field, frozen
+from twisted.python.filepath import FilePath
+from twisted.python.modules import PythonModule, getModule as get_module
 from twisted.python.reflect import fullyQualifiedName as fully_qualified_name
 from twisted.trial.runner import filenameToModule as filename_to_module
 
+from virtue import _cache, _discovery, _static
+from virtue._select import Selection
 from virtue.loaders import AttributeLoader, ModuleLoader
 
 
@@ -26,6 +36,24 @@ class UnableToLoad(Exception):
     """
 
 
+_MISSING = object()
+_EXTENSIONS = (".py", ".pyc")
+_WILDCARDS = re.compile(r"[*?[]")
+
+
+def _child(parent, name, attribute):
+    """
+    Resolve an attribute of an object, importing it if it's a submodule.
+    """
+    if getattr(parent, "__path__", None) is not None:
+        try:
+            return import_module(name)
+        except ModuleNotFoundError as error:
+            if error.name != name:
+                raise
+    return getattr(parent, attribute)
+
+
 def prefixed_by(prefix):
     """
     Make a callable returning True for names starting with the given prefix.
@@ -36,12 +64,115 @@ def prefixed_by(prefix):
     `ObjectLocator.is_test_method`.
 
     """
+    return _PrefixedBy(prefix=prefix)
+
+
+@frozen
+class _PrefixedBy:
+    prefix: str
+
+    def __call__(self, name, value=None):
+        return name.startswith(self.prefix)
+
+    def names_in(self, names):
+        """
+        Filter out the names which don't match, without a call per name.
+        """
+        prefix = self.prefix
+        return [name for name in names if name.startswith(prefix)]
+
+
+@frozen
+class _Matching:
+    pattern: re.Pattern
+
+    def __call__(self, name, value=None):
+        return self.pattern.match(name) is not None
+
+    def names_in(self, names):
+        """
+        Filter out the names which don't match, without a call per name.
+        """
+        return list(filter(self.pattern.match, names))
+
+
+def _name_of(cls):
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def _as_selection(select):
+    """
+    Parse a selection expression, if it hasn't been already.
+    """
+    if isinstance(select, str):
+        return Selection.parse(select)
+    return select
 
-    def prefixed_by_(name, value=None):
-        return name.startswith(prefix)
 
-    prefixed_by_.__name__ += prefix
-    return prefixed_by_
+def _as_predicate(predicate):
+    """
+    Turn a prefix or a compiled regular expression into a predicate.
+    """
+    if isinstance(predicate, str):
+        return _PrefixedBy(prefix=predicate)
+    if isinstance(predicate, re.Pattern):
+        return _Matching(pattern=predicate)
+    return predicate
+
+
+class _Memo(dict):
+    """
+    A dict which is emptied rather than copied when pickled.
+    """
+
+    def __reduce__(self):
+        return type(self), ()
+
+
+@frozen
+class _IsTestClass:
+    """
+    Only consider classes as test classes.
+    """
+
+    is_test_class = field()
+
+    def __call__(self, attr, cls):
+        return inspect.isclass(cls) and self.is_test_class(attr, cls)
+
+
+@frozen
+class _IsTestMethod:
+    """
+    Only consider callables as test methods.
+    """
+
+    is_test_method = field()
+
+    def __call__(self, attr, value):
+        return callable(value) and self.is_test_method(attr, value)
+
+    def names_in(self, cls):
+        """
+        The names of the test methods defined directly in a class.
+
+        Only the class' own namespace is scanned, but each value is looked
+        up on the class (as `inspect.getmembers` would), so that descriptors
+        like `functools.partialmethod` are resolved.
+        """
+        namespace = vars(cls)
+        names_in = getattr(self.is_test_method, "names_in", None)
+        if names_in is None:
+            return [
+                name
+                for name in namespace
+                if self(name, getattr(cls, name, None))
+            ]
+        return [
+            name
+            for name in names_in(namespace)
+            if callable(getattr(cls, name, None))
+        ]
 
 
 def inherits_from_TestCase(attr, cls):
@@ -51,6 +182,16 @@ def inherits_from_TestCase(attr, cls):
     return issubclass(cls, TestCase)
 
 
+def _describe(predicate):
+    """
+    Describe a predicate, such that changing it can invalidate a cache.
+    """
+    name = getattr(predicate, "__qualname__", None)
+    if name is None:
+        return repr(predicate)
+    return f"{getattr(predicate, '__module__', '')}.{name}"
+
+
 @define
 class ObjectLocator:
     """
@@ -77,6 +218,61 @@ class ObjectLocator:
             or not. By default, modules whose names start with
             ``test_`` are considered to be test modules.
 
+            Each of these three may also be a `str` prefix or a compiled
+            `re.Pattern`, in which case objects whose names start with the
+            prefix (or match the pattern) are considered tests. These are
+            faster than an equivalent callable.
+
+        static (bool):
+
+            whether to locate tests in packages by parsing test modules
+            rather than importing them, in which case each module is only
+            imported once one of its tests is loaded. Modules which do
+            something that can't be understood without running them
+            (e.g. creating test classes dynamically) are still imported.
+            Static discovery only supports the default ``is_test_class``,
+            and calls ``is_test_method`` with a placeholder function rather
+            than the real method.
+
+        cache (str):
+
+            a directory in which to remember the tests located within each
+            module in a package, such that modules (and the modules their
+            test classes inherit from) which haven't changed since the last
+            run needn't be imported or parsed again.
+
+        exclude (collections.abc.Iterable):
+
+            glob patterns (in the `fnmatch` sense) for the fully qualified
+            names of modules or packages which should not be searched for
+            tests when walking a package. Excluded packages are not
+            descended into at all.
+
+        include (collections.abc.Iterable):
+
+            glob patterns for the fully qualified names of the only modules
+            or packages which should be searched for tests when walking a
+            package. Modules within an included package are included.
+            Packages which can't contain anything matching a pattern are not
+            descended into. By default, everything is included.
+
+        jobs (int):
+
+            a number of worker processes across which to import the test
+            modules found in a package while locating tests in it, such that
+            the current process needn't import them (until their tests are
+            loaded). The locator (including its predicates) must be
+            picklable if worker processes aren't forked.
+
+        select (str):
+
+            an expression selecting which tests to locate, made up of
+            words combined with ``and``, ``or``, ``not`` and parentheses.
+            Words containing glob wildcards must match a test's whole ID,
+            while other words need only appear somewhere within it. Modules,
+            packages and classes whose tests can't be selected are skipped
+            without being looked at (or imported).
+
     """
 
     #: Whether an object is a test method or not
@@ -85,17 +281,50 @@ class ObjectLocator:
     is_test_class = field(default=inherits_from_TestCase, repr=False)
     #: Whether an object is a test module or not
     is_test_module = field(default=prefixed_by("test_"), repr=False)
+    #: Whether to locate tests in packages without importing them
+    static: bool = field(default=False)
+    #: A directory in which to cache located tests between runs
+    cache = field(default=None)
+    #: Patterns for names of modules and packages to skip when walking
+    exclude: tuple = field(default=(), converter=tuple)
+    #: Patterns for names of modules and packages to limit walking to
+    include: tuple = field(default=(), converter=tuple)
+    #: A number of worker processes to import test modules in
+    jobs: int = field(default=1)
+    #: An expression selecting which tests to locate
+    select: Selection | None = field(default=None, converter=_as_selection)
+
+    _fingerprint: str = field(init=False, repr=False, eq=False)
+    _namespaces: dict = field(factory=_Memo, init=False, repr=False, eq=False)
+    _test_methods: dict = field(
+        factory=_Memo,
+        init=False,
+        repr=False,
+        eq=False,
+    )
 
     def __attrs_post_init__(self):
-        is_cls, self.is_test_class = (
-            self.is_test_class,
-            lambda attr, cls: inspect.isclass(cls) and is_cls(attr, cls),
-        )
-        is_meth, self.is_test_method = (
-            self.is_test_method,
-            lambda attr, val: callable(val) and is_meth(attr, val),
+        self.is_test_method = _as_predicate(self.is_test_method)
+        self.is_test_class = _as_predicate(self.is_test_class)
+        self.is_test_module = _as_predicate(self.is_test_module)
+
+        if self.static and self.is_test_class is not inherits_from_TestCase:
+            raise ValueError(
+                "Static discovery only supports the default is_test_class.",
+            )
+
+        self._fingerprint = " ".join(
+            _describe(each)
+            for each in (
+                self.is_test_method,
+                self.is_test_class,
+                self.is_test_module,
+            )
         )
 
+        self.is_test_class = _IsTestClass(self.is_test_class)
+        self.is_test_method = _IsTestMethod(self.is_test_method)
+
     def locate_by_name(self, name):
         """
         Locate any tests found in the object referred to by the given name.
@@ -141,6 +370,53 @@ class ObjectLocator:
 
             raise
 
+    def locate_by_names(self, names):
+        """
+        Locate any tests found in the objects referred to by many names.
+
+        This is equivalent to calling `locate_by_name` on each name in turn,
+        but each module, class or other object along the way is resolved
+        only once no matter how many of the names share it, which makes it
+        suitable for long lists of individual test IDs.
+        """
+        resolved = {}
+
+        def resolve(name):
+            obj = resolved.get(name, _MISSING)
+            if obj is _MISSING:
+                parent_name, _, attribute = name.rpartition(".")
+                if not parent_name:
+                    obj = import_module(name)
+                else:
+                    obj = _child(resolve(parent_name), name, attribute)
+                resolved[name] = obj
+            return obj
+
+        for name in names:
+            if ":" in name or os.sep in name or name.endswith(".py"):
+                yield from self.locate_by_name(name)
+                continue
+
+            obj = resolve(name)
+            if inspect.ismodule(obj) or inspect.isclass(obj):
+                yield from self.locate_in(obj)
+                continue
+
+            parent_name, _, attribute = name.rpartition(".")
+            cls = resolved.get(parent_name)
+            if not inspect.isclass(cls):
+                # Aliased attributes
+                fqon = fully_qualified_name(obj)
+                parent_name, _, attribute = fqon.rpartition(".")
+                cls = resolve(parent_name) if parent_name else None
+                if not inspect.isclass(cls):
+                    raise UnableToLoad(
+                        f"Can't determine the appropriate way to load {obj!r}",
+                    )
+            loader = AttributeLoader(cls=cls, attribute=attribute)
+            if self._selects(loader):
+                yield loader
+
     def locate_in(self, obj):
         """
         Attempt to locate the test cases in the given object (of any kind).
@@ -163,23 +439,269 @@ class ObjectLocator:
         """
         Locate all of the test cases contained in the given package.
         """
-        for module in get_module(package.__name__).walkModules():
-            _, _, name = module.name.rpartition(".")
-            if self.is_test_module(name):
-                yield ModuleLoader(locator=self, module=module)
+        root, _, _ = package.__name__.partition(".")
+        analyzer = _static.Analyzer(
+            root=root,
+            is_test_method=self.is_test_method,
+        )
+        cache = None
+        if self.cache is not None:
+            cache = _cache.DiscoveryCache.in_directory(
+                self.cache,
+                fingerprint=self._fingerprint,
+            )
+
+        located = self._locate_in_python_modules(
+            modules=self._walk(package),
+            analyzer=analyzer,
+            cache=cache,
+        )
+        if self.jobs > 1:
+            located = _discovery.locate(
+                located=located,
+                locator=self,
+                root=root,
+                jobs=self.jobs,
+            )
+        elif cache is not None:
+            located = _discovery.locate_serially(located=located, root=root)
+
+        for module, loaders, dependencies in located:
+            if cache is not None and dependencies is not None:
+                cache.set(
+                    name=module.name,
+                    path=module.filePath.path,
+                    loaders=loaders,
+                    dependencies=dependencies,
+                )
+            for loader in loaders:
+                if isinstance(loader, ModuleLoader) or self._selects(loader):
+                    yield loader
+
+        if cache is not None:
+            cache.forget_missing()
+            cache.save()
+
+    def _locate_in_python_modules(self, modules, analyzer, cache):
+        """
+        Locate the tests in modules found by walking a package.
+
+        Yields each module along with loaders for its tests (or a single
+        `ModuleLoader` for modules which must be imported to find them) and
+        the paths of any other files its tests depend on (or None for tests
+        which came from the cache).
+        """
+        for module in modules:
+            path = module.filePath.path
+            if cache is not None:
+                loaders = cache.get(name=module.name, path=path)
+                if loaders is not None:
+                    yield module, loaders, None
+                    continue
+
+            if self.static:
+                try:
+                    loaders = analyzer.locate_in_module(
+                        name=module.name,
+                        path=path,
+                    )
+                except _static.Dynamic:
+                    pass
+                else:
+                    dependencies = analyzer.dependencies[module.name]
+                    yield module, loaders, dependencies
+                    continue
+
+            yield module, [ModuleLoader(locator=self, module=module)], set()
+
+    def _walk(self, package):
+        """
+        Find the test modules in a package, without importing anything.
+
+        Modules are found in the same order as by
+        `twisted.python.modules.PythonModule.walkModules`, but excluded
+        packages (and those with nothing included) aren't descended into.
+        """
+        name = package.__name__
+        included = self._is_included(name, within=False)
+        if included is None:
+            return ()
+        entry = get_module(name).pathEntry
+        return self._walk_package(
+            name=name,
+            init=getattr(package, "__file__", None),
+            paths=package.__path__,
+            entry=entry,
+            included=included,
+        )
+
+    def _walk_package(self, name, init, paths, entry, included):
+        if init is not None and included:
+            yield from self._test_module(name, init, entry)
+
+        seen = set()
+        for path in paths:
+            try:
+                with os.scandir(path) as scanned:
+                    children = sorted(scanned, key=attrgetter("name"))
+            except OSError:
+                continue
+
+            for child in children:
+                stem, dot, extension = child.name.rpartition(".")
+                if dot:
+                    if (
+                        f".{extension}" not in _EXTENSIONS
+                        or stem == "__init__"
+                        or not stem.isidentifier()
+                    ):
+                        continue
+                    child_name = f"{name}.{stem}"
+                    if child_name in seen:
+                        continue
+                    seen.add(child_name)
+                    child_included = self._is_included(child_name, included)
+                    if child_included:
+                        yield from self._test_module(
+                            child_name,
+                            child.path,
+                            entry,
+                        )
+                    continue
+
+                if not child.name.isidentifier() or not child.is_dir():
+                    continue
+                child_name = f"{name}.{child.name}"
+                if child_name in seen:
+                    continue
+                child_included = self._is_included(child_name, included)
+                if child_included is None:
+                    continue
+                for each in _EXTENSIONS:
+                    child_init = Path(child.path, f"__init__{each}")
+                    if child_init.is_file():
+                        break
+                else:
+                    continue
+                seen.add(child_name)
+
+                subpackage = sys.modules.get(child_name)
+                child_paths = getattr(subpackage, "__path__", [child.path])
+                yield from self._walk_package(
+                    name=child_name,
+                    init=str(child_init),
+                    paths=child_paths,
+                    entry=entry,
+                    included=child_included,
+                )
+
+    def _is_included(self, name, within):
+        """
+        Whether the module or package with the given name is included.
+
+        Returns None for things which are excluded, or for packages which
+        can't contain anything included, and False for packages which may
+        have included things within them. Everything within an included
+        package is included unless it is itself excluded.
+        """
+        if any(fnmatchcase(name, pattern) for pattern in self.exclude):
+            return None
+        if self._never_selects(name):
+            return None
+        if within or not self.include:
+            return True
+        if any(fnmatchcase(name, pattern) for pattern in self.include):
+            return True
+        prefix = f"{name}."
+        for pattern in self.include:
+            literal = _WILDCARDS.split(pattern, maxsplit=1)[0]
+            if literal.startswith(prefix) or prefix.startswith(literal):
+                return False
+        return None
+
+    def _test_module(self, name, path, entry):
+        """
+        The module at the given path, if it's a test module.
+        """
+        _, _, short_name = name.rpartition(".")
+        if self.is_test_module(short_name):
+            yield PythonModule(name, FilePath(path), entry)
 
     def locate_in_module(self, module):
         """
         Locate all of the test cases contained in the given module.
         """
-        for attribute, value in inspect.getmembers(module):
-            if self.is_test_class(attribute, value):
-                yield from self.locate_in_class(value)
+        return self._locate_in_module(module, selecting=True)
+
+    def _locate_in_module(self, module, selecting):
+        for attribute, value in sorted(vars(module).items()):
+            if not self.is_test_class(attribute, value):
+                continue
+            if selecting and self._never_selects(_name_of(value)):
+                continue
+            yield from self._locate_in_class(value, selecting=selecting)
 
     def locate_in_class(self, cls):
         """
         Locate the methods on the given class that are test cases.
         """
-        for attribute, value in inspect.getmembers(cls):
-            if self.is_test_method(attribute, value):
-                yield AttributeLoader(cls=cls, attribute=attribute)
+        return self._locate_in_class(cls, selecting=True)
+
+    def _locate_in_class(self, cls, selecting):
+        names = self._test_methods_of(cls)
+        if selecting and self.select is not None:
+            prefix = _name_of(cls)
+            within = self.select.within(prefix)
+            if within is False:
+                return
+            if within is None:
+                names = [
+                    name
+                    for name in names
+                    if self.select.matches(f"{prefix}.{name}")
+                ]
+        for attribute in names:
+            yield AttributeLoader(cls=cls, attribute=attribute)
+
+    def _never_selects(self, name):
+        """
+        Whether nothing within the module, package or class can be selected.
+        """
+        return self.select is not None and self.select.within(name) is False
+
+    def _selects(self, loader):
+        """
+        Whether the test loaded by the given loader is selected.
+        """
+        return self.select is None or self.select.matches(loader.id)
+
+    def _test_methods_of(self, cls):
+        """
+        The (sorted) names of the test methods of a class.
+
+        Rather than looking up each attribute of the class, the namespaces
+        of each class in its MRO are scanned (just once per class, however
+        many subclasses it has).
+        """
+        names = self._test_methods.get(cls)
+        if names is None:
+            resolved = {}
+            for base in reversed(cls.__mro__):
+                resolved.update(self._scan(base))
+            names = sorted(name for name, test in resolved.items() if test)
+            self._test_methods[cls] = names
+        return names
+
+    def _scan(self, cls):
+        """
+        Which names in a class' own namespace are test methods.
+        """
+        scanned = self._namespaces.get(cls)
+        if scanned is None:
+            namespace = vars(cls)
+            scanned = dict.fromkeys(namespace, False)
+            scanned.update(
+                dict.fromkeys(self.is_test_method.names_in(cls), True),
+            )
+            self._namespaces[cls] = scanned
+        return scanned
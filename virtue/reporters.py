@@ -12,6 +12,16 @@ from pyrsistent.typing import PMap, PVector
 import attrs
 
 
+def _format_exception(exc_info):
+    """
+    Format an exception, including ones which were raised in a worker process.
+    """
+    formatted = getattr(exc_info, "formatted", None)
+    if formatted is None:
+        formatted = "".join(format_exception(*exc_info))
+    return formatted
+
+
 @attrs.frozen
 class _DelayedMessage:
     """
@@ -108,6 +118,17 @@ class Outputter:
         yield "\n"
         yield "-" * self.line_width
 
+        # Only parallel runs say how long fixtures took, since only there
+        # can it be spread unevenly (across workers).
+        fixtures = recorder.fixture_durations
+        workers = sorted(each for each in fixtures if each is not None)
+        if workers:
+            total = sum(fixtures.values())
+            per_worker = ", ".join(
+                f"worker {each}: {fixtures[each]:.3f}s" for each in workers
+            )
+            yield f"\nSet up fixtures in {total:.3f}s ({per_worker})"
+
         count = recorder.testsRun
         tests = "tests" if count != 1 else "test"
 
@@ -174,7 +195,7 @@ class Outputter:
         """
         self._show_later(
             status=self.ERROR,
-            body="".join(format_exception(*exc_info)),
+            body=_format_exception(exc_info),
             subject=test,
         )
         return self._format_line(test, self._error)
@@ -185,7 +206,7 @@ class Outputter:
         """
         self._show_later(
             status=self.FAIL,
-            body="".join(format_exception(*exc_info)),
+            body=_format_exception(exc_info),
             subject=test,
         )
         return self._format_line(test, self._fail)
@@ -228,7 +249,7 @@ class Outputter:
         """
         self._show_later(
             status=self.FAIL,
-            body="".join(format_exception(*exc_info)),
+            body=_format_exception(exc_info),
             subject=subtest,
         )
         return self._format_subtest_result(test, subtest, self._fail)
@@ -239,13 +260,15 @@ class Outputter:
         """
         self._show_later(
             status=self.ERROR,
-            body="".join(format_exception(*exc_info)),
+            body=_format_exception(exc_info),
             subject=subtest,
         )
         return self._format_subtest_result(test, subtest, self._error)
 
     def _format_line(self, test, result):
-        before = f"{self.indent}{self.indent}{test._testMethodName} ..."
+        # errors in class or module fixtures happen outside of any test method
+        name = getattr(test, "_testMethodName", None) or test.id()
+        before = f"{self.indent}{self.indent}{name} ..."
         return self._pad_center(left=before, right=result) + "\n"
 
     def _format_subtest_result(self, test, subtest, result):
@@ -273,11 +296,13 @@ class Counter:
     expected_failures: int = 0
     unexpected_successes: int = 0
     successes: int = 0
+    skips: int = 0
 
     subtest_successes: int = 0
     subtest_failures: int = 0
     subtest_errors: int = 0
 
+    failfast = False
     shouldStop = False
 
     @property
@@ -307,6 +332,9 @@ class Counter:
     def addUnexpectedSuccess(self, test):  # noqa: D102
         self.unexpected_successes += 1
 
+    def addSkip(self, test, reason):  # noqa: D102
+        self.skips += 1
+
     def addSuccess(self, test):  # noqa: D102
         self.successes += 1
 
@@ -339,13 +367,19 @@ class Recorder:
     subtest_failures: PMap = m()
     subtest_errors: PMap = m()
 
+    #: How long setting up fixtures took in total, for each worker
+    fixture_durations: PMap = m()
+
+    failfast = False
     shouldStop = False
 
     @property
     def testsRun(self):  # noqa: D102
         fields = attrs.astuple(
             self,
-            filter=lambda f, _: not f.name.startswith("subtest_"),
+            filter=lambda f, _: (
+                not f.name.startswith(("subtest_", "fixture_"))
+            ),
         )
         # It seems addSuccess is called for tests with all passing subtests
         # but the reverse isn't true if a subtest fails...
@@ -400,6 +434,12 @@ class Recorder:
     def addDuration(self, test, elapsed):  # noqa: D102
         pass
 
+    def addFixtureDuration(self, name, elapsed, worker=None):  # noqa: D102
+        self.fixture_durations = self.fixture_durations.set(
+            worker,
+            self.fixture_durations.get(worker, 0) + elapsed,
+        )
+
     def addSubTest(self, test, subtest, outcome):  # noqa: D102
         if outcome is None:
             self.subtest_successes = self.subtest_successes.set(
@@ -500,6 +540,9 @@ class ComponentizedReporter:
     def addDuration(self, test, elapsed):  # noqa: D102
         self.recorder.addDuration(test, elapsed)
 
+    def addFixtureDuration(self, name, elapsed, worker=None):  # noqa: D102
+        self.recorder.addFixtureDuration(name, elapsed, worker=worker)
+
     def addSubTest(self, test, subtest, outcome):  # noqa: D102
         self.recorder.addSubTest(test, subtest, outcome)
         if outcome is None:
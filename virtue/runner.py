@@ -2,16 +2,144 @@
 Runners execute loaded tests.
 """
 
-import unittest
+import re
+import time
 import warnings
 
 import attr
 
+from virtue import _cache, _history, _impact, _parallel, _shard, _threads
+from virtue.loaders import ModuleLoader, StreamingSuite
 from virtue.locators import ObjectLocator
 from virtue.reporters import Counter
 
 
-def run(tests=(), reporter=None, stop_after=None):
+def collect(
+    tests=(),
+    locator=None,
+    *,
+    shard=None,
+    shard_durations=None,
+    cache=None,
+    affected_by=None,
+):
+    """
+    Locate each individual test loaded by each of the strings provided.
+
+    Arguments:
+
+        tests (collections.abc.Iterable):
+
+            the collection of tests (specified as `str` s) to locate
+
+        locator (virtue.locators.ObjectLocator):
+
+            the locator to use. If unprovided, a default one is used.
+
+        shard (tuple):
+
+            a shard (a 1-based index along with a count of shards) to
+            limit the located tests to
+
+        shard_durations (str):
+
+            a file of test durations from a past run (which should be the
+            same for every shard) used to balance shards by how long they
+            take, rather than by how many tests they have
+
+        cache (str):
+
+            a directory in which the impact of tests was recorded, needed
+            to find tests affected by changes
+
+        affected_by (collections.abc.Iterable):
+
+            the lines of a unified diff, or of a list of changed files, to
+            limit the located tests to those the changes may affect (going
+            by which functions each test called when recorded into the
+            cache directory)
+
+    Returns:
+
+        an iterable of loaders, each of which loads a single test
+
+    Each test is located only once, even if it's referred to by more than
+    one of the strings, or its class is found in more than one module (by
+    being imported into another). Tests are identified by where their class
+    is defined.
+
+    """
+    affected = None
+    if affected_by is not None:
+        affected = _affected(cache, affected_by)
+    return _collect(
+        tests=tests,
+        locator=locator,
+        shard=shard,
+        shard_durations=shard_durations,
+        affected=affected,
+    )
+
+
+def _affected(cache, affected_by):
+    if cache is None:
+        raise ValueError("Finding affected tests requires a cache directory.")
+    impact = _cache.Impact.in_directory(cache)
+    return impact.affected(_impact.changes_in(affected_by))
+
+
+def _collect(tests, locator, shard, shard_durations, affected=None):
+    loaders = _locate(tests=tests, locator=locator)
+    if affected is not None:
+        loaders = (loader for loader in loaders if affected(loader.id))
+    if shard is None:
+        return loaders
+    durations = None
+    if shard_durations is not None:
+        durations = _cache.Durations(path=shard_durations)
+    return _shard.select(loaders, shard=shard, durations=durations)
+
+
+def _locate(tests, locator):
+    if locator is None:
+        locator = ObjectLocator()
+    seen = set()
+    for loader in locator.locate_by_names(names=tests):
+        if isinstance(loader, ModuleLoader):
+            loaders = loader.locate()
+        else:
+            loaders = [loader]
+        for each in loaders:
+            id = each.id
+            if id not in seen:
+                seen.add(id)
+                yield each
+
+
+def run(
+    tests=(),
+    reporter=None,
+    stop_after=None,
+    jobs=1,
+    locator=None,
+    *,
+    shard=None,
+    shard_durations=None,
+    cache=None,
+    history=False,
+    failed_first=False,
+    last_failed=False,
+    record_impact=False,
+    affected_by=None,
+    timeout=None,
+    subinterpreters=False,
+    threads=1,
+    concurrency=1,
+    recycle_after=None,
+    max_rss=None,
+    memory_limit=None,
+    fork=False,
+):
     """
     Run the tests that are loaded by each of the strings provided.
 
@@ -30,27 +158,249 @@ def run(tests=(), reporter=None, stop_after=None):
         stop_after (int):
 
             a number of non-successful tests to allow before stopping the run.
+            In parallel runs, they're counted across all workers as soon as
+            they happen, and once there have been enough, tests still
+            running are interrupted and only those which finished are
+            reported.
+
+        jobs (int):
+
+            a number of worker processes to run tests across. Results from
+            each worker are reported in the same order (and produce the
+            same output) as they would have been in a serial run.
+
+        locator (virtue.locators.ObjectLocator):
+
+            the locator to use to find tests. If unprovided, a default one
+            is used.
+
+        shard (tuple):
+
+            a shard (a 1-based index along with a count of shards) to limit
+            the run to. Each of the tests is in exactly one of the shards,
+            and tests which share a class or module fixture share a shard.
+
+        shard_durations (str):
+
+            a file of test durations from a past run (say, a
+            ``durations.json`` from a cache directory) used to balance
+            shards to take equally long. It should be the same file for
+            every shard, so without one shards are instead balanced by how
+            many tests they have, whatever each machine has cached.
+
+        cache (str):
+
+            a directory in which to remember how long each test took, so
+            that parallel runs can start the tests which take longest first.
+
+        history (bool):
+
+            whether to also record the outcome and duration of each test
+            in a history database within the cache directory.
+
+        failed_first (bool):
+
+            whether to run the tests which failed (or errored) the last
+            time they ran before any others. Failures are remembered
+            within the cache directory.
+
+        last_failed (bool):
+
+            whether to run only the tests which failed (or errored) the
+            last time they ran, or every test if none did.
+
+        record_impact (bool):
+
+            whether to note down which functions each test calls (as well
+            as those which each class or module fixture calls), within the
+            cache directory, so that later runs can be limited to the tests
+            affected by a change.
+
+        affected_by (collections.abc.Iterable):
+
+            the lines of a unified diff (such as from ``git diff``), or of a
+            list of changed files, to limit the run to the tests the changes
+            may affect. Tests which have never been recorded (see
+            ``record_impact``) are always run, and changes whose effect
+            can't be known (say, to a file no recorded test called anything
+            in) affect every test.
+
+        timeout (float):
+
+            how many seconds each test may take before it's interrupted and
+            errors (with the stacks of every thread shown). Tests (or their
+            classes) with a ``timeout`` attribute may take that long instead.
+            In parallel runs, a worker whose test can't be interrupted is
+            replaced, and the rest of the run carries on, while serial runs
+            report it, finish reporting on the run, and exit unsuccessfully.
+
+        subinterpreters (bool):
+
+            whether parallel runs should use subinterpreters (which are
+            cheaper to start, and share a process) rather than processes
+            as workers, where they're available (on Python 3.13 and later).
+            Tests which need an extension module that can't be imported
+            within a subinterpreter are run by processes anyhow, as are all
+            tests if there's a timeout.
+
+        threads (int):
+
+            a number of threads to run tests across, on free-threaded builds
+            of Python (from 3.14 on). Tests from classes with a true
+            ``thread_unsafe`` attribute are run on their own. Elsewhere, as
+            well as when there's a timeout or impact is being recorded
+            (neither of which can be done for tests in separate threads),
+            tests are run one at a time. Can't be combined with ``jobs``.
+
+        concurrency (int):
+
+            how many tests from classes with a true ``concurrent`` attribute
+            to run at once (within each worker, for parallel runs), on an
+            event loop they share. Coroutines (and Deferreds) returned
+            by their test methods, fixtures and cleanups are awaited. Before
+            Python 3.11, tests are run one at a time regardless.
+
+        recycle_after (int):
+
+            a number of modules after which to replace a worker process with
+            a fresh one (before it runs tests from another), so that whatever
+            tests leave behind (say, in caches) doesn't build up. Given this
+            (or either of the below), tests are always run by worker
+            processes (one, unless ``jobs`` says otherwise), and a worker
+            which crashes is reported as an error on the test it was running
+            before the run carries on.
+
+        max_rss (int):
+
+            a number of bytes of memory after using more than which (as of
+            finishing a class' tests) a worker process is replaced.
+
+        memory_limit (int):
+
+            a number of bytes of address space to limit each worker process
+            to, past which tests fail to allocate memory (where the platform
+            enforces it). Limits above the hard limit already in place are
+            lowered to it.
+
+        fork (bool):
+
+            whether to run each test in a child process of its own, forked
+            off once its module and class fixtures are set up (only once),
+            so that whatever it changes is gone once it's done. Tests run
+            concurrently aren't forked, nor is anything where there's no
+            forking (on Windows). Can't be combined with ``threads`` or
+            with recording impact.
 
     """
+    recycled = any(
+        each is not None for each in (recycle_after, max_rss, memory_limit)
+    )
+    if threads > 1 and (jobs > 1 or recycled or fork):
+        raise ValueError(
+            "Tests can't be run across both processes and threads.",
+        )
+    if fork and record_impact:
+        raise ValueError("Impact can't be recorded for forked tests.")
     if reporter is None:
         reporter = Counter()
     if stop_after is not None:
         reporter = _StopAfterWrapper(reporter=reporter, limit=stop_after)
+    result = reporter
+
+    durations = failures = None
+    if cache is not None:
+        durations = _cache.Durations.in_directory(cache)
+        reporter = _DurationRecorder(reporter=reporter, durations=durations)
+        failures = _cache.LastFailed.in_directory(cache)
+        reporter = _FailureRecorder(reporter=reporter, failures=failures)
+    elif failed_first or last_failed:
+        raise ValueError("Running failed tests requires a cache directory.")
+    if history:
+        if cache is None:
+            raise ValueError("Recording history requires a cache directory.")
+        reporter = _HistoryRecorder(
+            reporter=reporter,
+            history=_history.History.in_directory(cache),
+        )
+    impact = None
+    if record_impact:
+        if cache is None:
+            raise ValueError("Recording impact requires a cache directory.")
+        impact = _cache.Impact.in_directory(cache)
+        reporter = _ImpactRecorder(reporter=reporter, impact=impact)
 
-    locator = ObjectLocator()
-    cases = (
-        case
-        for test in tests
-        for loader in locator.locate_by_name(name=test)
-        for case in loader.load()
+    affected = None
+    if affected_by is not None:
+        affected = _affected(cache, affected_by)
+    loaders = _collect(
+        tests=tests,
+        locator=locator,
+        shard=shard,
+        shard_durations=shard_durations,
+        affected=affected,
     )
-    suite = unittest.TestSuite(cases)
+    first = frozenset()
+    if failed_first or last_failed:
+        loaders, first = _failed_first(loaders, failures, only=last_failed)
+
+    threaded = (
+        threads > 1
+        and timeout is None
+        and impact is None
+        and _threads.available()
+    )
+
     getattr(reporter, "startTestRun", lambda: None)()
-    with warnings.catch_warnings():
-        warnings.simplefilter("error")
-        suite.run(reporter)
+    if jobs > 1 or threaded or recycled:
+        _parallel.run(
+            loaders=loaders,
+            reporter=reporter,
+            jobs=threads if threaded else jobs,
+            durations=durations,
+            first=first,
+            timeout=timeout,
+            stop_after=stop_after,
+            subinterpreters=subinterpreters,
+            threads=threaded,
+            concurrency=concurrency,
+            recycle_after=recycle_after,
+            max_rss=max_rss,
+            memory_limit=memory_limit,
+            fork=fork,
+        )
+    else:
+        suite = StreamingSuite(
+            loaders=loaders,
+            timeout=timeout,
+            concurrency=concurrency,
+            fork=fork,
+        )
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            suite.run(reporter)
     getattr(reporter, "stopTestRun", lambda: None)()
-    return reporter
+    if cache is not None:
+        durations.save()
+        failures.save()
+    if impact is not None:
+        impact.save()
+    return result
+
+
+def _failed_first(loaders, failures, only):
+    """
+    Move the tests which failed last time they ran in front of the others.
+
+    Returns the reordered loaders along with the IDs of the failed tests.
+    If only failed tests are wanted, but none failed, all are kept.
+    """
+    failed, passed = [], []
+    for loader in loaders:
+        (failed if failures.failed(loader.id) else passed).append(loader)
+    first = frozenset(loader.id for loader in failed)
+    if only and failed:
+        return failed, first
+    return failed + passed, first
 
 
 @attr.s(eq=False)
@@ -90,3 +440,222 @@ class _StopAfterWrapper:  # noqa: PLW1641
         self._seen += 1
         if self._seen == self._limit:
             self.shouldStop = True
+
+
+@attr.s(eq=False)
+class _DurationRecorder:
+    """
+    Wrap a reporter to remember how long each test takes.
+
+    Tests are timed from when they start until they stop, unless `unittest`
+    reports how long they took (which it does on Python 3.12 and later).
+    """
+
+    _durations = attr.ib()
+    _reporter = attr.ib()
+
+    _started: dict = attr.ib(factory=dict)
+
+    def __getattr__(self, attr):
+        return getattr(self._reporter, attr)
+
+    def startTest(self, test):
+        self._started[id(test)] = time.perf_counter()
+        self._reporter.startTest(test)
+
+    def stopTest(self, test):
+        started = self._started.pop(id(test), None)
+        if started is not None:
+            self._durations.record(test.id(), time.perf_counter() - started)
+        self._reporter.stopTest(test)
+
+    def addDuration(self, test, elapsed):
+        self._started.pop(id(test), None)
+        self._durations.record(test.id(), elapsed)
+        addDuration = getattr(self._reporter, "addDuration", None)
+        if addDuration is not None:
+            addDuration(test, elapsed)
+
+    def addFixtureDuration(self, name, elapsed, worker=None):
+        self._durations.record_fixture(name, elapsed)
+        add = getattr(self._reporter, "addFixtureDuration", None)
+        if add is not None:
+            add(name, elapsed, worker=worker)
+
+
+@attr.s(eq=False)
+class _HistoryRecorder:
+    """
+    Wrap a reporter to record the outcome of each test in the run history.
+
+    Each test is recorded as soon as it stops.
+    """
+
+    _history = attr.ib()
+    _reporter = attr.ib()
+
+    _run = attr.ib(default=None)
+    _current: dict = attr.ib(factory=dict)
+
+    def __getattr__(self, attr):
+        return getattr(self._reporter, attr)
+
+    def startTestRun(self):
+        self._run = self._history.start_run()
+        getattr(self._reporter, "startTestRun", lambda: None)()
+
+    def stopTestRun(self):
+        getattr(self._reporter, "stopTestRun", lambda: None)()
+        self._history.finish_run(self._run)
+        self._history.close()
+
+    def startTest(self, test):
+        self._current[id(test)] = dict(
+            started=time.perf_counter(),
+            outcome=None,
+            duration=None,
+            setUp=None,
+            tearDown=None,
+        )
+        self._reporter.startTest(test)
+
+    def stopTest(self, test):
+        current = self._current.pop(id(test), None)
+        if current is not None and current["outcome"] is not None:
+            duration = current["duration"]
+            if duration is None:
+                duration = time.perf_counter() - current["started"]
+            self._history.record(
+                run=self._run,
+                name=test.id(),
+                outcome=current["outcome"],
+                duration=duration,
+                set_up=current["setUp"],
+                tear_down=current["tearDown"],
+            )
+        self._reporter.stopTest(test)
+
+    def _see(self, test, **kwargs):
+        current = self._current.get(id(test))
+        if current is not None:
+            current.update(kwargs)
+
+    def addError(self, test, exc_info):
+        self._see(test, outcome="error")
+        self._reporter.addError(test, exc_info)
+
+    def addFailure(self, test, exc_info):
+        self._see(test, outcome="failure")
+        self._reporter.addFailure(test, exc_info)
+
+    def addSkip(self, test, reason):
+        self._see(test, outcome="skip")
+        self._reporter.addSkip(test, reason)
+
+    def addExpectedFailure(self, test, exc_info):
+        self._see(test, outcome="expected failure")
+        self._reporter.addExpectedFailure(test, exc_info)
+
+    def addUnexpectedSuccess(self, test):
+        self._see(test, outcome="unexpected success")
+        self._reporter.addUnexpectedSuccess(test)
+
+    def addSuccess(self, test):
+        self._see(test, outcome="success")
+        self._reporter.addSuccess(test)
+
+    def addSubTest(self, test, subtest, outcome):
+        if outcome is not None:
+            failed = issubclass(outcome[0], test.failureException)
+            self._see(test, outcome="failure" if failed else "error")
+        self._reporter.addSubTest(test, subtest, outcome)
+
+    def addDuration(self, test, elapsed):
+        self._see(test, duration=elapsed)
+        addDuration = getattr(self._reporter, "addDuration", None)
+        if addDuration is not None:
+            addDuration(test, elapsed)
+
+    def addPhaseDuration(self, test, phase, elapsed):
+        self._see(test, **{phase: elapsed})
+        add = getattr(self._reporter, "addPhaseDuration", None)
+        if add is not None:
+            add(test, phase, elapsed)
+
+
+@attr.s(eq=False)
+class _ImpactRecorder:
+    """
+    Wrap a reporter to remember which functions each test called.
+    """
+
+    _impact = attr.ib()
+    _reporter = attr.ib()
+
+    def __getattr__(self, attr):
+        return getattr(self._reporter, attr)
+
+    def addCalled(self, name, functions):
+        self._impact.record(name, functions)
+        add = getattr(self._reporter, "addCalled", None)
+        if add is not None:
+            add(name, functions)
+
+
+#: The IDs given to errors in class or module fixtures, e.g. setUpClass
+_FIXTURE_ERROR = re.compile(r"^\w+ \((?P<parent>[\w.]+)\)$")
+
+
+@attr.s(eq=False)
+class _FailureRecorder:
+    """
+    Wrap a reporter to remember which tests failed (or errored).
+
+    Errors in class or module fixtures (which happen outside of any test)
+    are remembered as failures of the class or module.
+    """
+
+    _failures = attr.ib()
+    _reporter = attr.ib()
+
+    _running: dict = attr.ib(factory=dict)
+
+    def __getattr__(self, attr):
+        return getattr(self._reporter, attr)
+
+    def startTest(self, test):
+        self._running[id(test)] = False
+        self._reporter.startTest(test)
+
+    def stopTest(self, test):
+        failed = self._running.pop(id(test), None)
+        if failed:
+            self._failures.add(test.id())
+        elif failed is not None:
+            self._failures.passed(test.id())
+        self._reporter.stopTest(test)
+
+    def _fail(self, test):
+        if id(test) in self._running:
+            self._running[id(test)] = True
+            return
+        match = _FIXTURE_ERROR.match(test.id())
+        if match is not None:
+            self._failures.add(match.group("parent"))
+
+    def addError(self, test, exc_info):
+        self._fail(test)
+        self._reporter.addError(test, exc_info)
+
+    def addFailure(self, test, exc_info):
+        self._fail(test)
+        self._reporter.addFailure(test, exc_info)
+
+    def addUnexpectedSuccess(self, test):
+        self._fail(test)
+        self._reporter.addUnexpectedSuccess(test)
+
+    def addSubTest(self, test, subtest, outcome):
+        if outcome is not None:
+            self._fail(test)
+        self._reporter.addSubTest(test, subtest, outcome)
@@ -0,0 +1,68 @@
+from unittest import IsolatedAsyncioTestCase, TestCase, expectedFailure, skip
+import asyncio
+
+from twisted.internet.defer import Deferred
+
+
+class Together(IsolatedAsyncioTestCase):
+    concurrent = True
+
+    @classmethod
+    def setUpClass(cls):
+        cls.together = asyncio.Barrier(3)
+
+    async def test_one(self):
+        await asyncio.wait_for(self.together.wait(), timeout=1)
+
+    async def test_two(self):
+        await asyncio.wait_for(self.together.wait(), timeout=1)
+
+    async def test_three(self):
+        await asyncio.wait_for(self.together.wait(), timeout=1)
+
+
+class Outcomes(IsolatedAsyncioTestCase):
+    concurrent = True
+
+    async def asyncSetUp(self):
+        self.cleaned = []
+        self.addAsyncCleanup(self.clean_up)
+
+    async def clean_up(self):
+        await asyncio.sleep(0)
+        self.cleaned.append(True)
+
+    async def test_succeeds(self):
+        await asyncio.sleep(0.01)
+
+    async def test_fails(self):
+        await asyncio.sleep(0)
+        self.fail("Failed!")
+
+    async def test_errors(self):
+        await asyncio.sleep(0)
+        raise ZeroDivisionError
+
+    @skip("Skipped!")
+    async def test_skipped(self):
+        pass  # pragma: no cover
+
+    @expectedFailure
+    async def test_expected_failure(self):
+        await asyncio.sleep(0)
+        self.fail("Expected.")
+
+    async def test_subtests(self):
+        for i in range(3):
+            with self.subTest(i=i):
+                await asyncio.sleep(0)
+                self.assertEqual(i % 2, 0)
+
+
+class Deferreds(TestCase):
+    concurrent = True
+
+    def test_fires(self):
+        deferred = Deferred()
+        asyncio.get_running_loop().call_soon(deferred.callback, None)
+        return deferred
@@ -0,0 +1,16 @@
+from unittest import TestCase
+import multiprocessing
+import os
+
+
+class Midway(TestCase):
+    def test_a(self):
+        pass
+
+    def test_b(self):
+        # Only die when run within a worker process, not the main one.
+        if multiprocessing.parent_process() is not None:
+            os._exit(3)
+
+    def test_c(self):
+        pass
@@ -0,0 +1,15 @@
+from unittest import TestCase
+
+
+class Foo(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        raise Exception("Boom!")
+
+    def test_foo(self):
+        pass
+
+
+class Bar(TestCase):
+    def test_bar(self):
+        pass
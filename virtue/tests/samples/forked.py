@@ -0,0 +1,36 @@
+from unittest import TestCase
+import os
+
+#: How many times the class below was set up
+set_up: list[int] = []
+
+#: Changed by each test, which pass only if they don't see each other's changes
+state: list[int] = []
+
+
+class Mutating(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        set_up.append(os.getpid())
+
+    def test_one(self):
+        state.append(1)
+        self.assertEqual(state, [1])
+
+    def test_two(self):
+        state.append(2)
+        self.assertEqual(state, [2])
+
+
+class Crashing(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pid = os.getpid()
+
+    def test_exits(self):
+        # Only die when forked off, not in whatever set up the class.
+        if os.getpid() != self.pid:
+            os._exit(3)
+
+    def test_passes(self):
+        pass
@@ -0,0 +1,27 @@
+from unittest import TestCase
+import signal
+import time
+
+
+class Hanging(TestCase):
+    def test_sleeps(self):
+        time.sleep(30)
+
+    def test_then_more(self):
+        pass
+
+
+class Overridden(TestCase):
+    timeout = 0.1
+
+    def test_sleeps(self):
+        time.sleep(30)
+
+
+class Uninterruptible(TestCase):
+    def test_blocks_signals(self):
+        signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGALRM})
+        time.sleep(30)
+
+    def test_then_more(self):
+        pass
@@ -0,0 +1,30 @@
+from unittest import TestCase
+
+
+def double(x):
+    return x * 2
+
+
+def square(x):
+    return x * x
+
+
+def prepared():
+    return {}
+
+
+class Doubling(TestCase):
+    def test_double(self):
+        self.assertEqual(double(2), 4)
+
+
+class Squaring(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.prepared = prepared()
+
+    def test_square(self):
+        self.assertEqual(square(3), 9)
+
+    def test_nothing(self):
+        pass
@@ -0,0 +1,23 @@
+from unittest import TestCase
+import gc
+import weakref
+
+
+class Foo(TestCase):
+    alive: weakref.WeakSet[TestCase] = weakref.WeakSet()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.alive.add(self)
+
+    def test_foo(self):
+        gc.collect()
+        self.assertEqual(len(self.alive), 1)
+
+    def test_bar(self):
+        gc.collect()
+        self.assertEqual(len(self.alive), 1)
+
+    def test_baz(self):
+        gc.collect()
+        self.assertEqual(len(self.alive), 1)
@@ -0,0 +1,16 @@
+from unittest import TestCase
+import os
+
+#: What tests have left behind
+leaked: list[bytes] = []
+
+
+class Leaky(TestCase):
+    def test_leaks(self):
+        leaked.append(b"x" * 64 * 2**20)
+        self.fail(os.getpid())
+
+
+class Greedy(TestCase):
+    def test_allocates(self):
+        bytearray(2**30)
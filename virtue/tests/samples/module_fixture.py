@@ -0,0 +1,19 @@
+from unittest import TestCase
+
+
+def setUpModule():
+    pass
+
+
+class Foo(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    def test_foo(self):
+        pass
+
+
+class Bar(TestCase):
+    def test_bar(self):
+        pass
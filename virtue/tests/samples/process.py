@@ -0,0 +1,7 @@
+from unittest import TestCase
+import os
+
+
+class Foo(TestCase):
+    def test_pid(self):
+        self.fail(os.getpid())
@@ -0,0 +1 @@
+from virtue.tests.samples.one_successful_test import Foo  # noqa: F401
@@ -0,0 +1,16 @@
+from unittest import TestCase, skip
+
+
+@skip("Not today.")
+class Foo(TestCase):
+    instances = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        type(self).instances += 1
+
+    def test_foo(self):
+        pass
+
+    def test_bar(self):
+        pass
@@ -0,0 +1,33 @@
+from threading import Barrier
+from unittest import TestCase
+import time
+
+#: Passed only if the first two classes' tests run at the same time
+together = Barrier(2, timeout=5)
+
+#: The tests which are running right now
+running: list[TestCase] = []
+
+
+class First(TestCase):
+    def test_waits(self):
+        together.wait()
+
+
+class Second(TestCase):
+    def test_waits(self):
+        together.wait()
+
+
+class Slow(TestCase):
+    def test_sleeps(self):
+        running.append(self)
+        time.sleep(0.2)
+        running.remove(self)
+
+
+class Unsafe(TestCase):
+    thread_unsafe = True
+
+    def test_alone(self):
+        self.assertEqual(running, [])
@@ -0,0 +1,34 @@
+from twisted.internet.defer import Deferred
+from twisted.trial.unittest import TestCase
+
+
+class Together(TestCase):
+    concurrent = True
+
+    @classmethod
+    def setUpClass(cls):
+        cls.waiting = []
+
+    def together(self, then=0):
+        # The reactor is imported only once one's been installed.
+        from twisted.internet import reactor, task
+
+        deferred = Deferred()
+        deferred.addTimeout(1, reactor)
+        self.waiting.append(deferred)
+        if len(self.waiting) == 3:
+            for each in self.waiting:
+                each.callback(None)
+        deferred.addCallback(
+            lambda _: task.deferLater(reactor, then, lambda: None),
+        )
+        return deferred
+
+    def test_one(self):
+        return self.together(then=0.1)
+
+    def test_two(self):
+        return self.together(then=0.05)
+
+    def test_three(self):
+        return self.together()
@@ -0,0 +1,12 @@
+from unittest import TestCase
+
+
+class Foo(TestCase):
+    def test_foo(self):
+        pass
+
+    def test_bar(self):
+        pass
+
+
+raise ZeroDivisionError("Whoops!")
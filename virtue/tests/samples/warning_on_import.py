@@ -0,0 +1,9 @@
+from unittest import TestCase
+import warnings
+
+warnings.warn("Importing me warns.", stacklevel=1)
+
+
+class Foo(TestCase):
+    def test_foo(self):
+        pass
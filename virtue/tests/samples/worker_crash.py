@@ -0,0 +1,20 @@
+from unittest import TestCase
+import multiprocessing
+import os
+
+
+class Foo(TestCase):
+    def test_foo(self):
+        pass
+
+
+class Bar(TestCase):
+    def test_bar(self):
+        # Only die when run within a worker process, not the main one.
+        if multiprocessing.parent_process() is not None:
+            os._exit(3)
+
+
+class Baz(TestCase):
+    def test_baz(self):
+        pass
@@ -1,9 +1,14 @@
+from textwrap import dedent
 from unittest import TestCase
 import os
+import shutil
+import tempfile
 
 from twisted.trial.reporter import TreeReporter
+import click
 
 from virtue import _cli
+from virtue._select import Selection
 
 
 def DumbReporter():
@@ -42,6 +47,134 @@ class TestParser(TestCase):
             (1, ["bar", "baz"]),
         )
 
+    def test_jobs(self):
+        arguments = self.parse_args(["-j", "4", "bar"])
+        self.assertEqual(arguments["jobs"], 4)
+
+    def test_jobs_default(self):
+        arguments = self.parse_args(["bar"])
+        self.assertEqual(arguments["jobs"], 1)
+
+    def test_select(self):
+        arguments = self.parse_args(["-k", "foo and not bar", "baz"])
+        self.assertEqual(
+            arguments["select"],
+            Selection.parse("foo and not bar"),
+        )
+
+    def test_invalid_select(self):
+        with self.assertRaises(click.BadParameter):
+            self.parse_args(["-k", "foo and", "baz"])
+
+    def test_shard(self):
+        arguments = self.parse_args(["--shard", "2/3", "bar"])
+        self.assertEqual(arguments["shard"], (2, 3))
+
+    def test_shard_durations(self):
+        arguments = self.parse_args(
+            ["--shard", "1/2", "--shard-durations", os.devnull, "bar"],
+        )
+        self.assertEqual(arguments["shard_durations"], os.devnull)
+
+    def test_invalid_shard(self):
+        with self.assertRaises(click.BadParameter):
+            self.parse_args(["--shard", "4/3", "bar"])
+
+    def test_discovery_jobs(self):
+        arguments = self.parse_args(["--discovery-jobs", "4", "bar"])
+        self.assertEqual(arguments["discovery_jobs"], 4)
+
+    def test_static(self):
+        arguments = self.parse_args(["--static", "bar"])
+        self.assertTrue(arguments["static"])
+
+    def test_exclude_and_include(self):
+        arguments = self.parse_args(
+            ["--exclude", "*.foo", "--exclude", "*.bar", "--include", "baz"],
+        )
+        self.assertEqual(
+            (arguments["exclude"], arguments["include"]),
+            (("*.foo", "*.bar"), ("baz",)),
+        )
+
+    def test_cache_discovery(self):
+        arguments = self.parse_args(
+            ["--cache-discovery", "--cache-dir", "foo", "bar"],
+        )
+        self.assertEqual(
+            (arguments["cache_discovery"], arguments["cache_dir"]),
+            (True, "foo"),
+        )
+
+    def test_history(self):
+        arguments = self.parse_args(["--history", "bar"])
+        self.assertTrue(arguments["record_history"])
+
+    def test_failed_first_and_last_failed(self):
+        arguments = self.parse_args(["--failed-first", "--last-failed", "bar"])
+        self.assertEqual(
+            (arguments["failed_first"], arguments["last_failed"]),
+            (True, True),
+        )
+
+    def test_impact(self):
+        arguments = self.parse_args(
+            ["--record-impact", "--affected-by", os.devnull, "bar"],
+        )
+        self.addCleanup(arguments["affected_by"].close)
+        self.assertEqual(
+            (arguments["record_impact"], arguments["affected_by"].name),
+            (True, os.devnull),
+        )
+
+    def test_watch(self):
+        arguments = self.parse_args(["--watch", "bar"])
+        self.assertTrue(arguments["watch"])
+
+    def test_subinterpreters(self):
+        arguments = self.parse_args(["-j", "2", "--subinterpreters", "bar"])
+        self.assertTrue(arguments["subinterpreters"])
+
+    def test_threads(self):
+        arguments = self.parse_args(["--threads", "4", "bar"])
+        self.assertEqual(arguments["threads"], 4)
+
+    def test_concurrency(self):
+        arguments = self.parse_args(["--concurrency", "8", "bar"])
+        self.assertEqual(arguments["concurrency"], 8)
+
+    def test_memory_in_megabytes(self):
+        arguments = self.parse_args(
+            ["--max-rss", "100", "--memory-limit", "200", "bar"],
+        )
+        self.assertEqual(
+            (arguments["max_rss"], arguments["memory_limit"]),
+            (100 * 2**20, 200 * 2**20),
+        )
+
+    def test_fork(self):
+        arguments = self.parse_args(["--fork", "bar"])
+        self.assertTrue(arguments["fork"])
+
+    def test_timeout(self):
+        arguments = self.parse_args(["--timeout", "2.5", "bar"])
+        self.assertEqual(arguments["timeout"], 2.5)
+
+    def test_invalid_timeout(self):
+        with self.assertRaises(click.BadParameter):
+            self.parse_args(["--timeout", "0", "bar"])
+
+    def test_cache_dir_default(self):
+        arguments = self.parse_args(["bar"])
+        self.assertEqual(
+            (arguments["cache_discovery"], arguments["cache_dir"]),
+            (False, ".virtue_cache"),
+        )
+
+    def test_no_cache(self):
+        arguments = self.parse_args(["--no-cache", "bar"])
+        self.assertTrue(arguments["no_cache"])
+
 
 class TestMain(TestCase):
     # TODO: these write to stdout
@@ -78,6 +211,128 @@ class TestMain(TestCase):
             )
         self.assertNotEqual(e.exception.code, os.EX_OK)
 
+    def test_threads_and_jobs(self):
+        with self.assertRaises(SystemExit) as e:
+            _cli.main(
+                [
+                    "--jobs",
+                    "2",
+                    "--threads",
+                    "2",
+                    "virtue.tests.samples.one_successful_test",
+                ],
+            )
+        self.assertNotEqual(e.exception.code, os.EX_OK)
+
+    def test_collect(self):
+        with self.assertRaises(SystemExit) as e:
+            _cli.main(
+                ["--collect", "virtue.tests.samples.one_successful_test"],
+            )
+        self.assertEqual(e.exception.code, os.EX_OK)
+
+    def test_collect_nothing(self):
+        with self.assertRaises(SystemExit) as e:
+            _cli.main(["--collect", "virtue.tests.samples.no_tests"])
+        self.assertNotEqual(e.exception.code, os.EX_OK)
+
+    def test_tests_from(self):
+        path = self.write_tests(
+            """
+            # some tests
+            virtue.tests.samples.one_successful_test.Foo.test_foo
+
+            """,
+        )
+        with self.assertRaises(SystemExit) as e:
+            _cli.main(["--reporter", "summary", "--tests-from", path])
+        self.assertEqual(e.exception.code, os.EX_OK)
+
+    def test_tests_from_with_only_comments(self):
+        path = self.write_tests("# nothing to see here\n")
+        with self.assertRaises(SystemExit) as e:
+            _cli.main(["--collect", "--tests-from", path])
+        self.assertNotEqual(e.exception.code, os.EX_OK)
+
+    def write_tests(self, contents):
+        fd, path = tempfile.mkstemp()
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, "w") as file:
+            file.write(dedent(contents))
+        return path
+
+    def test_history(self):
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache)
+        with self.assertRaises(SystemExit) as e:
+            _cli.main(
+                [
+                    "--reporter",
+                    "summary",
+                    "--history",
+                    "--cache-dir",
+                    cache,
+                    "virtue.tests.samples.one_successful_test",
+                ],
+            )
+        self.assertEqual(e.exception.code, os.EX_OK)
+
+        with self.assertRaises(SystemExit) as e:
+            _cli.main(["history", "--cache-dir", cache, "slowest"])
+        self.assertEqual(e.exception.code, os.EX_OK)
+
+    def test_no_cache_with_an_option_needing_one(self):
+        with self.assertRaises(SystemExit) as e:
+            _cli.main(
+                [
+                    "--no-cache",
+                    "--last-failed",
+                    "virtue.tests.samples.one_successful_test",
+                ],
+            )
+        self.assertNotEqual(e.exception.code, os.EX_OK)
+
+    def test_default_cache_dir_is_not_created(self):
+        cwd = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cwd)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(cwd)
+        with self.assertRaises(SystemExit) as e:
+            _cli.main(
+                [
+                    "--reporter",
+                    "summary",
+                    "virtue.tests.samples.one_successful_test",
+                ],
+            )
+        self.assertEqual(e.exception.code, os.EX_OK)
+        self.assertEqual(os.listdir(cwd), [])
+
+    def test_explicit_cache_dir_is_created_and_ignored(self):
+        parent = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, parent)
+        cache = os.path.join(parent, "cache")
+        with self.assertRaises(SystemExit) as e:
+            _cli.main(
+                [
+                    "--reporter",
+                    "summary",
+                    "--cache-dir",
+                    cache,
+                    "virtue.tests.samples.one_successful_test",
+                ],
+            )
+        self.assertEqual(e.exception.code, os.EX_OK)
+        with open(os.path.join(cache, ".gitignore")) as file:
+            self.assertIn("*", file.read().splitlines())
+
+    def test_history_without_any(self):
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache)
+        with self.assertRaises(SystemExit) as e:
+            _cli.main(["history", "--cache-dir", cache])
+        self.assertNotEqual(e.exception.code, os.EX_OK)
+
     def test_it_exits_unsuccessfully_when_no_tests_ran(self):
         with self.assertRaises(SystemExit) as e:
             _cli.main(["virtue.tests.samples.no_tests"])
@@ -0,0 +1,87 @@
+from unittest import TestCase
+import shutil
+import tempfile
+
+from virtue._history import History
+
+
+class TestHistory(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.history = History.in_directory(directory)
+        self.addCleanup(self.history.close)
+
+    def record_runs(self, *runs):
+        for results in runs:
+            run = self.history.start_run()
+            for name, outcome, duration in results:
+                self.history.record(
+                    run=run,
+                    name=name,
+                    outcome=outcome,
+                    duration=duration,
+                    set_up=duration / 10,
+                    tear_down=0,
+                )
+            self.history.finish_run(run)
+
+    def test_slowest(self):
+        self.record_runs(
+            [("a", "success", 1), ("b", "success", 3), ("c", "success", 2)],
+            [("a", "success", 1), ("b", "failure", 5), ("c", "success", 2)],
+        )
+        self.assertEqual(
+            self.history.slowest(limit=2),
+            [("b", 4, 0.4, 0), ("c", 2, 0.2, 0)],
+        )
+
+    def test_slowest_only_considers_recent_runs(self):
+        self.record_runs(
+            [("a", "success", 100)],
+            [("a", "success", 1), ("b", "success", 2)],
+        )
+        self.assertEqual(
+            [name for name, *_ in self.history.slowest(runs=1)],
+            ["b", "a"],
+        )
+
+    def test_slowing(self):
+        self.record_runs(
+            [("a", "success", 1), ("b", "success", 1), ("c", "success", 2)],
+            [("a", "success", 1), ("b", "success", 1), ("c", "success", 2)],
+            [("a", "success", 2), ("b", "success", 3), ("c", "success", 1)],
+            [("a", "success", 2), ("b", "success", 3), ("c", "success", 1)],
+        )
+        self.assertEqual(
+            self.history.slowing(runs=4),
+            [("b", 1, 3), ("a", 1, 2)],
+        )
+
+    def test_flaky(self):
+        self.record_runs(
+            [("a", "success", 1), ("b", "failure", 1), ("c", "error", 1)],
+            [("a", "failure", 1), ("b", "failure", 1), ("c", "success", 1)],
+            [("a", "success", 1), ("b", "failure", 1), ("c", "success", 1)],
+            [("a", "error", 1), ("b", "failure", 1), ("c", "skip", 1)],
+        )
+        self.assertEqual(self.history.flaky(), [("a", 0.5), ("c", 1 / 3)])
+
+    def test_skips_are_not_flakiness(self):
+        self.record_runs(
+            [("a", "success", 1), ("b", "failure", 1)],
+            [("a", "skip", 1), ("b", "skip", 1)],
+            [("a", "success", 1), ("b", "failure", 1)],
+        )
+        self.assertEqual(self.history.flaky(), [])
+
+    def test_test_ids_are_interned(self):
+        self.record_runs([("a", "success", 1)], [("a", "success", 1)])
+        history = History(path=self.history.path)
+        self.addCleanup(history.close)
+        self.record_runs([("a", "success", 1)])
+        history.record(run=1, name="a", outcome="success")
+        self.assertEqual(
+            history._db.execute("SELECT COUNT(*) FROM tests").fetchone(),
+            (1,),
+        )
@@ -0,0 +1,234 @@
+from textwrap import dedent
+from unittest import TestCase, skipUnless
+import os
+import sys
+import tempfile
+
+from virtue import _cache, _impact
+
+
+def diff(text):
+    return dedent(text).splitlines(keepends=True)
+
+
+class TestChangesIn(TestCase):
+    def test_file_list(self):
+        changes = _impact.changes_in(["foo.py\n", "\n", "# bar.py\n", "b/c\n"])
+        self.assertEqual(changes, {"foo.py": None, "b/c": None})
+
+    def test_absolute_paths_are_made_relative(self):
+        path = os.path.join(os.getcwd(), "foo", "bar.py")
+        self.assertEqual(_impact.changes_in([path]), {"foo/bar.py": None})
+
+    def test_diff(self):
+        changes = _impact.changes_in(
+            diff(
+                """\
+                diff --git a/foo.py b/foo.py
+                --- a/foo.py
+                +++ b/foo.py
+                @@ -3,4 +3,4 @@ def foo():
+                     a = 1
+                -    b = 2
+                +    b = 3
+                     c = 4
+                     d = 5
+                @@ -20,2 +20,3 @@ def bar():
+                     e = 6
+                +    f = 7
+                     g = 8
+                """,
+            ),
+        )
+        self.assertEqual(changes, {"foo.py": {4, 20, 21}})
+
+    def test_new_and_deleted_files(self):
+        changes = _impact.changes_in(
+            diff(
+                """\
+                --- /dev/null
+                +++ b/new.py
+                @@ -0,0 +1,2 @@
+                +--- a/not/a/file
+                +x = 1
+                --- a/old.py
+                +++ /dev/null
+                @@ -1,2 +0,0 @@
+                -y = 1
+                -z = 2
+                """,
+            ),
+        )
+        self.assertEqual(changes, {"new.py": None, "old.py": {1, 2}})
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+
+def called():
+    return 12
+
+
+class TestTracer(TestCase):
+    def test_it_notes_down_calls_until_taken(self):
+        tracer = _impact.Tracer(root=ROOT)
+        tracer.start()
+        try:
+            tracer.take()
+            called()
+            first = tracer.take()
+            called()
+            second = tracer.take()
+        finally:
+            tracer.stop()
+
+        function = (
+            "virtue/tests/test_impact.py",
+            called.__code__.co_firstlineno,
+            called.__code__.co_firstlineno + 1,
+        )
+        self.assertEqual(
+            (function in first, function in second),
+            (True, True),
+        )
+
+    def test_it_ignores_code_elsewhere(self):
+        tracer = _impact.Tracer(root=tempfile.gettempdir())
+        tracer.start()
+        try:
+            called()
+            functions = tracer.take()
+        finally:
+            tracer.stop()
+        self.assertEqual(functions, [])
+
+    @skipUnless(hasattr(sys, "monitoring"), "sys.monitoring is needed.")
+    def test_it_leaves_other_tools_events_disabled(self):
+        monitoring = sys.monitoring
+        other = monitoring.PROFILER_ID
+        started = []
+
+        def other_started(code, offset):
+            started.append(code)
+            return monitoring.DISABLE
+
+        monitoring.use_tool_id(other, "other")
+        self.addCleanup(monitoring.free_tool_id, other)
+        monitoring.register_callback(
+            other,
+            monitoring.events.PY_START,
+            other_started,
+        )
+        self.addCleanup(
+            monitoring.register_callback,
+            other,
+            monitoring.events.PY_START,
+            None,
+        )
+        monitoring.set_events(other, monitoring.events.PY_START)
+        self.addCleanup(monitoring.set_events, other, 0)
+
+        tracer = _impact.Tracer(root=ROOT)
+        tracer.start()
+        try:
+            called()
+            tracer.take()
+            called()
+        finally:
+            tracer.stop()
+        self.assertEqual(started.count(called.__code__), 1)
+
+    def test_it_stops(self):
+        profile = sys.getprofile()
+        tracer = _impact.Tracer(root=ROOT)
+        tracer.start()
+        tracer.stop()
+        called()
+        self.assertEqual(
+            (tracer.take(), sys.getprofile()),
+            ([], profile),
+        )
+
+
+class TestImpact(TestCase):
+    def impact(self):
+        impact = _cache.Impact(path=os.devnull)
+        impact.record("a.Foo", [("a.py", 1, 5)])
+        impact.record("a.Foo.test_one", [("a.py", 10, 15), ("b.py", 1, 3)])
+        impact.record("a.Foo.test_two", [("b.py", 5, 8)])
+        impact.record("a.Bar.test_one", [("b.py", 5, 8)])
+        return impact
+
+    def affected(self, changes):
+        affected = self.impact().affected(changes)
+        return [
+            id
+            for id in [
+                "a.Foo.test_one",
+                "a.Foo.test_two",
+                "a.Bar.test_one",
+                "a.Bar.test_new",
+            ]
+            if affected(id)
+        ]
+
+    def test_changed_function(self):
+        self.assertEqual(
+            self.affected({"b.py": {2}}),
+            ["a.Foo.test_one", "a.Bar.test_new"],
+        )
+
+    def test_changed_fixture(self):
+        self.assertEqual(
+            self.affected({"a.py": {3}}),
+            ["a.Foo.test_one", "a.Foo.test_two", "a.Bar.test_new"],
+        )
+
+    def test_change_outside_functions(self):
+        self.assertEqual(
+            self.affected({"b.py": {4}}),
+            [
+                "a.Foo.test_one",
+                "a.Foo.test_two",
+                "a.Bar.test_one",
+                "a.Bar.test_new",
+            ],
+        )
+
+    def test_changed_file(self):
+        self.assertEqual(
+            self.affected({"a.py": None}),
+            ["a.Foo.test_one", "a.Foo.test_two", "a.Bar.test_new"],
+        )
+
+    def test_change_to_an_unknown_file(self):
+        self.assertEqual(
+            self.affected({"c.py": {1}, "a.py": {12}}),
+            [
+                "a.Foo.test_one",
+                "a.Foo.test_two",
+                "a.Bar.test_one",
+                "a.Bar.test_new",
+            ],
+        )
+
+    def test_calls_are_added_to_within_a_run_but_replaced_across_them(self):
+        impact = self.impact()
+        impact.record("a.Foo.test_two", [("c.py", 1, 2)])
+        self.assertTrue(impact.affected({"b.py": {6}})("a.Foo.test_two"))
+
+        later = _cache.Impact(path=os.devnull, called=impact._entries())
+        later.record("a.Foo.test_two", [("c.py", 1, 2)])
+        self.assertFalse(later.affected({"b.py": {6}})("a.Foo.test_two"))
+
+    def test_save(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(os.rmdir, directory)
+        impact = self.impact()
+        impact.path = os.path.join(directory, "impact.json")
+        self.addCleanup(os.remove, impact.path)
+        impact.save()
+        self.assertEqual(
+            _cache.Impact(path=impact.path)._entries(),
+            impact._entries(),
+        )
@@ -38,6 +38,37 @@ class TestAttributeLoader(TestCase):
         )
 
 
+class TestLazyAttributeLoader(TestCase):
+    def test_it_loads_attributes(self):
+        attr = "test_it_loads_attributes"
+        loader = loaders.LazyAttributeLoader(
+            module=__name__,
+            cls="TestLazyAttributeLoader",
+            attribute=attr,
+        )
+        self.assertEqual(list(loader.load()), [self.__class__(attr)])
+
+    def test_id(self):
+        loader = loaders.LazyAttributeLoader(
+            module="foo.bar",
+            cls="Baz",
+            attribute="test_quux",
+        )
+        self.assertEqual(loader.id, "foo.bar.Baz.test_quux")
+
+    def test_it_has_the_same_id_as_an_attribute_loader(self):
+        lazy = loaders.LazyAttributeLoader(
+            module=__name__,
+            cls="TestLazyAttributeLoader",
+            attribute="test_id",
+        )
+        loader = loaders.AttributeLoader(
+            cls=self.__class__,
+            attribute="test_id",
+        )
+        self.assertEqual(lazy.id, loader.id)
+
+
 class TestModuleLoader(TestCase):
     locator = locators.ObjectLocator()
 
@@ -74,3 +105,22 @@ class TestModuleLoader(TestCase):
             repr(loader),
             "ModuleLoader(module=PythonModule<'virtue'>)",
         )
+
+
+class TestStreamingSuite(TestCase):
+    def test_it_loads_tests_only_when_iterated_over(self):
+        loaded = []
+
+        class Loader:
+            def __init__(self, name):
+                self.name = name
+
+            def load(self):
+                loaded.append(self.name)
+                return [TestCase()]
+
+        suite = loaders.StreamingSuite(loaders=[Loader("foo"), Loader("bar")])
+        self.assertEqual(loaded, [])
+
+        tests = iter(suite)
+        self.assertEqual((next(tests), loaded), (TestCase(), ["foo"]))
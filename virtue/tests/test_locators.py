@@ -1,12 +1,19 @@
+from functools import partialmethod
+from importlib import import_module
 from operator import attrgetter
+from textwrap import dedent
 from unittest import TestCase
+import re
 import shutil
+import sys
+import tempfile
 
 from twisted.python.filepath import FilePath
+from twisted.python.modules import getModule as get_module
 from twisted.python.reflect import fullyQualifiedName
 
 from virtue import locators
-from virtue.loaders import AttributeLoader
+from virtue.loaders import AttributeLoader, LazyAttributeLoader, ModuleLoader
 
 
 class TestObjectLocator(TestCase):
@@ -103,6 +110,113 @@ class TestObjectLocator(TestCase):
             ],
         )
 
+    def test_it_accepts_prefixes(self):
+        locator = locators.ObjectLocator(is_test_method="check")
+
+        class ASampleTestCase(TestCase):
+            check_foo = 12
+
+            def check_bar(self):
+                pass
+
+            def test_baz(self):
+                pass
+
+        self.assertEqual(
+            list(locator.locate_in(ASampleTestCase)),
+            [AttributeLoader(cls=ASampleTestCase, attribute="check_bar")],
+        )
+
+    def test_it_accepts_regular_expressions(self):
+        locator = locators.ObjectLocator(
+            is_test_method=re.compile(r"test_\d"),
+        )
+
+        class ASampleTestCase(TestCase):
+            def test_1(self):
+                pass
+
+            def test_foo(self):
+                pass
+
+            def test_2(self):
+                pass
+
+        self.assertEqual(
+            list(locator.locate_in(ASampleTestCase)),
+            [
+                AttributeLoader(cls=ASampleTestCase, attribute="test_1"),
+                AttributeLoader(cls=ASampleTestCase, attribute="test_2"),
+            ],
+        )
+
+    def test_it_ignores_descriptors_which_raise_attribute_errors(self):
+        locator = locators.ObjectLocator()
+
+        class Explosive:
+            def __get__(self, instance, owner):
+                raise AttributeError()
+
+        class ASampleTestCase(TestCase):
+            test_foo = Explosive()
+
+            def test_bar(self):
+                pass
+
+        self.assertEqual(
+            list(locator.locate_in(ASampleTestCase)),
+            [AttributeLoader(cls=ASampleTestCase, attribute="test_bar")],
+        )
+
+    def test_subclasses_can_hide_inherited_test_methods(self):
+        locator = locators.ObjectLocator()
+
+        class Base(TestCase):
+            def test_foo(self):
+                pass
+
+            def test_bar(self):
+                pass
+
+        class Mixin:
+            @staticmethod
+            def test_baz():
+                pass
+
+        class ASampleTestCase(Mixin, Base):
+            test_foo = None
+
+        self.assertEqual(
+            (
+                list(locator.locate_in(ASampleTestCase)),
+                list(locator.locate_in(Base)),
+            ),
+            (
+                [
+                    AttributeLoader(cls=ASampleTestCase, attribute="test_bar"),
+                    AttributeLoader(cls=ASampleTestCase, attribute="test_baz"),
+                ],
+                [
+                    AttributeLoader(cls=Base, attribute="test_bar"),
+                    AttributeLoader(cls=Base, attribute="test_foo"),
+                ],
+            ),
+        )
+
+    def test_it_finds_partialmethod_test_methods(self):
+        locator = locators.ObjectLocator()
+
+        class ASampleTestCase(TestCase):
+            def check(self, expected):
+                pass
+
+            test_foo = partialmethod(check, 12)
+
+        self.assertEqual(
+            list(locator.locate_in(ASampleTestCase)),
+            [AttributeLoader(cls=ASampleTestCase, attribute="test_foo")],
+        )
+
     def test_it_loads_methods_from_dynamically_created_test_case_classes(self):
         locator = locators.ObjectLocator()
         from virtue.tests.samples.dynamic_test import TestFoo
@@ -203,6 +317,720 @@ class TestObjectLocator(TestCase):
         return package
 
 
+class TestLocatingByNames(TestCase):
+    locator = locators.ObjectLocator()
+
+    def test_it_is_the_same_as_locating_each_name(self):
+        names = [
+            "virtue.tests.samples.one_successful_test",
+            "virtue.tests.samples.one_successful_test.Foo",
+            "virtue.tests.samples.one_successful_test.Foo.test_foo",
+            "virtue.tests.samples.subtests.Foo.test_no_subtests",
+            "virtue.tests.samples",
+            f"{__name__}.TestObjectLocator.test_it_finds_methods_on_test_cases",
+            f"{__name__}.aliased",
+        ]
+        self.assertEqual(
+            list(self.locator.locate_by_names(names)),
+            [
+                loader
+                for name in names
+                for loader in self.locator.locate_by_name(name)
+            ],
+        )
+
+    def test_it_resolves_each_class_once(self):
+        resolved = []
+
+        class Module:
+            def __getattr__(self, name):
+                if name != "Foo":
+                    raise AttributeError(name)
+                resolved.append(name)
+                return TestLocatingByNames
+
+        sys.modules["virtue.tests.samples.fake"] = Module()
+        self.addCleanup(sys.modules.pop, "virtue.tests.samples.fake")
+        attributes = [
+            "test_it_is_the_same_as_locating_each_name",
+            "test_it_resolves_each_class_once",
+            "test_it_does_not_find_missing_objects",
+        ]
+        names = [
+            f"virtue.tests.samples.fake.Foo.{each}" for each in attributes
+        ]
+        self.assertEqual(
+            (list(self.locator.locate_by_names(names)), resolved),
+            (
+                [
+                    AttributeLoader(cls=TestLocatingByNames, attribute=each)
+                    for each in attributes
+                ],
+                ["Foo"],
+            ),
+        )
+
+    def test_it_does_not_find_missing_objects(self):
+        with self.assertRaises(AttributeError):
+            list(
+                self.locator.locate_by_names(
+                    ["virtue.tests.samples.one_successful_test.Bar"],
+                ),
+            )
+
+    def test_it_does_not_find_missing_modules(self):
+        with self.assertRaises(AttributeError):
+            list(self.locator.locate_by_names(["virtue.tests.nope.Foo"]))
+
+    def test_it_refuses_to_load_other_objects(self):
+        with self.assertRaises(locators.UnableToLoad):
+            list(self.locator.locate_by_names([f"{__name__}.dedent"]))
+
+
+class TestStaticLocating(TestCase):
+    def setUp(self):
+        self.locator = locators.ObjectLocator(static=True)
+
+    def test_it_finds_tests_without_importing_them(self):
+        package = self.create_package(
+            test_foo="""
+            from unittest import TestCase
+
+            class TestFoo(TestCase):
+                def test_bar(self):
+                    pass
+
+                def test_baz(self):
+                    pass
+
+                def not_a_test(self):
+                    pass
+
+            class NotATestCase:
+                def test_quux(self):
+                    pass
+            """,
+        )
+        self.assertEqual(
+            list(self.locator.locate_in(package)),
+            [
+                LazyAttributeLoader(
+                    module="virtue.tests.temp.test_foo",
+                    cls="TestFoo",
+                    attribute="test_bar",
+                ),
+                LazyAttributeLoader(
+                    module="virtue.tests.temp.test_foo",
+                    cls="TestFoo",
+                    attribute="test_baz",
+                ),
+            ],
+        )
+        self.assertNotIn("virtue.tests.temp.test_foo", sys.modules)
+
+    def test_it_follows_mixins_and_bases_in_other_modules(self):
+        package = self.create_package(
+            base="""
+            import unittest
+
+            class Mixin:
+                def test_from_mixin(self):
+                    pass
+
+            class Base(unittest.TestCase):
+                def test_from_base(self):
+                    pass
+            """,
+            test_foo="""
+            from . import base
+
+            class TestFoo(base.Mixin, base.Base):
+                def test_foo(self):
+                    pass
+            """,
+        )
+        self.assertEqual(
+            [loader.id for loader in self.locator.locate_in(package)],
+            [
+                "virtue.tests.temp.test_foo.TestFoo.test_foo",
+                "virtue.tests.temp.test_foo.TestFoo.test_from_base",
+                "virtue.tests.temp.test_foo.TestFoo.test_from_mixin",
+            ],
+        )
+        self.assertNotIn("virtue.tests.temp.base", sys.modules)
+        self.assertNotIn("virtue.tests.temp.test_foo", sys.modules)
+
+    def test_it_imports_modules_it_does_not_understand(self):
+        package = self.create_package(
+            test_foo="""
+            from unittest import TestCase
+
+            def create():
+                return type("TestFoo", (TestCase,), {"test_foo": print})
+
+            TestFoo = create()
+            """,
+        )
+        loaders = list(self.locator.locate_in(package))
+        self.assertEqual(
+            [loader.module.name for loader in loaders],
+            ["virtue.tests.temp.test_foo"],
+        )
+        self.assertIsInstance(loaders[0], ModuleLoader)
+
+    def test_it_imports_only_bases_from_elsewhere(self):
+        self.create_path_entry(
+            elsewhere="""
+            from unittest import TestCase
+
+            class Helper:
+                pass
+
+            class TestElsewhere(TestCase):
+                def test_elsewhere(self):
+                    pass
+            """,
+        )
+        package = self.create_package(
+            test_foo="""
+            from unittest import TestCase
+            from elsewhere import Helper, TestElsewhere
+
+            class TestFoo(TestCase):
+                def test_foo(self):
+                    pass
+            """,
+        )
+        self.assertEqual(
+            [loader.id for loader in self.locator.locate_in(package)],
+            ["virtue.tests.temp.test_foo.TestFoo.test_foo"],
+        )
+        self.assertNotIn("elsewhere", sys.modules)
+
+    def test_it_parses_other_local_packages(self):
+        self.create_path_entry(
+            **{
+                "root/__init__.py": "",
+                "root/test_foo.py": """
+                from sibling.base import Base
+
+                class TestFoo(Base):
+                    def test_foo(self):
+                        pass
+                """,
+                "sibling/__init__.py": "",
+                "sibling/base.py": """
+                import unittest
+
+                class Base(unittest.TestCase):
+                    def test_from_base(self):
+                        pass
+                """,
+            },
+        )
+        self.assertEqual(
+            [
+                loader.id
+                for loader in self.locator.locate_in(import_module("root"))
+            ],
+            [
+                "sibling.base.Base.test_from_base",
+                "root.test_foo.TestFoo.test_foo",
+                "root.test_foo.TestFoo.test_from_base",
+            ],
+        )
+        self.assertNotIn("sibling", sys.modules)
+
+    def test_the_default_is_test_class_is_required(self):
+        with self.assertRaises(ValueError):
+            locators.ObjectLocator(static=True, is_test_class=lambda *_: 1)
+
+    def test_lazily_loaded_tests_are_the_same_as_imported_ones(self):
+        import virtue.tests.samples
+
+        static = locators.ObjectLocator(
+            static=True,
+            is_test_module=lambda name: name == "mixin",
+        )
+        imported = locators.ObjectLocator(
+            is_test_module=lambda name: name == "mixin",
+        )
+        (module_loader,) = imported.locate_in(virtue.tests.samples)
+        self.assertEqual(
+            [
+                case
+                for loader in static.locate_in(virtue.tests.samples)
+                for case in loader.load()
+            ],
+            list(module_loader.load()),
+        )
+
+    def create_package(self, **modules):
+        package_path = FilePath(__file__).sibling(b"temp")
+        package_path.makedirs()
+        self.addCleanup(shutil.rmtree, package_path.path)
+        self.addCleanup(
+            lambda: [
+                sys.modules.pop(name)
+                for name in list(sys.modules)
+                if name.startswith("virtue.tests.temp")
+            ],
+        )
+
+        package_path.child(b"__init__.py").setContent(b"")
+        for name, source in modules.items():
+            path = package_path.preauthChild(f"{name}.py".encode())
+            path.parent().makedirs(ignoreExistingDirectory=True)
+            path.setContent(dedent(source).encode())
+
+        return import_module("virtue.tests.temp")
+
+    def create_path_entry(self, **modules):
+        path_entry = FilePath(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, path_entry.path)
+        sys.path.insert(0, path_entry.path)
+        self.addCleanup(sys.path.remove, path_entry.path)
+        names = {name.partition("/")[0].partition(".")[0] for name in modules}
+        self.addCleanup(
+            lambda: [
+                sys.modules.pop(name)
+                for name in list(sys.modules)
+                if name.partition(".")[0] in names
+            ],
+        )
+
+        for name, source in modules.items():
+            if "/" not in name:
+                name = f"{name}.py"
+            path = path_entry.preauthChild(name.encode())
+            path.parent().makedirs(ignoreExistingDirectory=True)
+            path.setContent(dedent(source).encode())
+
+
+class TestSelectiveLocating(TestCase):
+    create_package = TestStaticLocating.create_package
+
+    def test_it_skips_modules_which_cannot_be_selected(self):
+        package = self.create_package(
+            test_foo="""
+            from unittest import TestCase
+
+            class TestFoo(TestCase):
+                def test_foo(self):
+                    pass
+
+                def test_bar(self):
+                    pass
+            """,
+            test_bar="raise ZeroDivisionError()",
+        )
+        locator = locators.ObjectLocator(select="virtue.tests.temp.test_foo.*")
+        self.assertEqual(
+            [
+                loader.id
+                for module_loader in locator.locate_in(package)
+                for loader in module_loader.locate()
+            ],
+            [
+                "virtue.tests.temp.test_foo.TestFoo.test_bar",
+                "virtue.tests.temp.test_foo.TestFoo.test_foo",
+            ],
+        )
+
+    def test_it_filters_tests_within_classes(self):
+        locator = locators.ObjectLocator(select="foo and not bar")
+
+        class ASampleTestCase(TestCase):
+            def test_foo(self):
+                pass
+
+            def test_foo_bar(self):
+                pass
+
+            def test_baz(self):
+                pass
+
+        self.assertEqual(
+            list(locator.locate_in(ASampleTestCase)),
+            [AttributeLoader(cls=ASampleTestCase, attribute="test_foo")],
+        )
+
+    def test_it_filters_named_tests(self):
+        locator = locators.ObjectLocator(select="not test_foo")
+        self.assertEqual(
+            list(
+                locator.locate_by_names(
+                    ["virtue.tests.samples.one_successful_test.Foo.test_foo"],
+                ),
+            ),
+            [],
+        )
+
+    def test_it_filters_cached_and_parallel_located_tests(self):
+        package = self.create_package(
+            test_foo="""
+            from unittest import TestCase
+
+            class TestFoo(TestCase):
+                def test_foo(self):
+                    pass
+
+                def test_bar(self):
+                    pass
+            """,
+        )
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache)
+
+        selected = locators.ObjectLocator(cache=cache, jobs=2, select="bar")
+        everything = locators.ObjectLocator(cache=cache)
+        self.assertEqual(
+            (
+                [loader.id for loader in selected.locate_in(package)],
+                [loader.id for loader in everything.locate_in(package)],
+            ),
+            (
+                ["virtue.tests.temp.test_foo.TestFoo.test_bar"],
+                [
+                    "virtue.tests.temp.test_foo.TestFoo.test_bar",
+                    "virtue.tests.temp.test_foo.TestFoo.test_foo",
+                ],
+            ),
+        )
+
+
+class TestWalkingPackages(TestCase):
+    create_package = TestStaticLocating.create_package
+
+    def test_it_finds_the_same_modules_as_twisted(self):
+        import virtue
+
+        locator = locators.ObjectLocator(is_test_module=lambda _: True)
+        self.assertEqual(
+            [
+                (loader.module.name, loader.module.filePath)
+                for loader in locator.locate_in(virtue)
+            ],
+            [
+                (module.name, module.filePath)
+                for module in get_module("virtue").walkModules()
+            ],
+        )
+
+    def test_it_does_not_import_packages(self):
+        package = self.create_package(
+            **{
+                "sub/__init__": "raise ZeroDivisionError()",
+                "sub/test_foo": "",
+                "data/test_bar": "",
+            },
+        )
+        locator = locators.ObjectLocator()
+        self.assertEqual(
+            [loader.module.name for loader in locator.locate_in(package)],
+            ["virtue.tests.temp.sub.test_foo"],
+        )
+
+    def test_excluded_packages_are_skipped(self):
+        package = self.create_package(
+            **{
+                "sub/__init__": "",
+                "sub/test_foo": "",
+                "vendored/__init__": "",
+                "vendored/test_bar": "",
+                "vendored/inner/__init__": "",
+                "vendored/inner/test_baz": "",
+                "test_quux": "",
+            },
+        )
+        locator = locators.ObjectLocator(exclude=["*.vendored", "*.test_foo"])
+        self.assertEqual(
+            [loader.module.name for loader in locator.locate_in(package)],
+            ["virtue.tests.temp.test_quux"],
+        )
+
+    def test_only_included_modules_are_found(self):
+        package = self.create_package(
+            **{
+                "sub/__init__": "",
+                "sub/test_foo": "",
+                "sub/inner/__init__": "",
+                "sub/inner/test_bar": "",
+                "other/__init__": "",
+                "other/test_baz": "",
+                "test_quux": "",
+            },
+        )
+        locator = locators.ObjectLocator(
+            include=["virtue.tests.temp.sub.inner", "*.test_quux"],
+        )
+        self.assertEqual(
+            [loader.module.name for loader in locator.locate_in(package)],
+            [
+                "virtue.tests.temp.sub.inner.test_bar",
+                "virtue.tests.temp.test_quux",
+            ],
+        )
+
+    def test_exclusions_apply_within_inclusions(self):
+        package = self.create_package(
+            **{
+                "sub/__init__": "",
+                "sub/test_foo": "",
+                "sub/test_bar": "",
+            },
+        )
+        locator = locators.ObjectLocator(
+            include=["*.sub"],
+            exclude=["*.test_bar"],
+        )
+        self.assertEqual(
+            [loader.module.name for loader in locator.locate_in(package)],
+            ["virtue.tests.temp.sub.test_foo"],
+        )
+
+
+class TestParallelLocating(TestCase):
+    create_package = TestStaticLocating.create_package
+
+    def test_it_finds_the_same_tests(self):
+        import virtue.tests.samples
+
+        def is_test_module(name):
+            return name not in {
+                "module_with_exception",
+                "unimportable",
+                "warning_on_import",
+            }
+
+        serial = locators.ObjectLocator(is_test_module=is_test_module)
+        parallel = locators.ObjectLocator(
+            jobs=2,
+            is_test_module=is_test_module,
+        )
+        self.assertEqual(
+            [loader.id for loader in parallel.locate_in(virtue.tests.samples)],
+            [
+                loader.id
+                for module_loader in serial.locate_in(virtue.tests.samples)
+                for loader in module_loader.locate()
+            ],
+        )
+
+    def test_it_does_not_import_test_modules(self):
+        package = self.create_package(
+            test_foo="""
+            from unittest import TestCase
+
+            class TestFoo(TestCase):
+                def test_foo(self):
+                    pass
+            """,
+        )
+        locator = locators.ObjectLocator(jobs=2)
+        self.assertEqual(
+            (
+                list(locator.locate_in(package)),
+                "virtue.tests.temp.test_foo" in sys.modules,
+            ),
+            (
+                [
+                    LazyAttributeLoader(
+                        module="virtue.tests.temp.test_foo",
+                        cls="TestFoo",
+                        attribute="test_foo",
+                    ),
+                ],
+                False,
+            ),
+        )
+
+    def test_unreachable_classes_are_located_by_importing(self):
+        package = self.create_package(
+            test_foo="""
+            from unittest import TestCase
+
+            def create():
+                class TestFoo(TestCase):
+                    def test_foo(self):
+                        pass
+                return TestFoo
+
+            TestBar = create()
+            """,
+        )
+        locator = locators.ObjectLocator(jobs=2)
+        (loader,) = locator.locate_in(package)
+        self.assertIsInstance(loader, AttributeLoader)
+        self.assertEqual(loader.cls.__module__, "virtue.tests.temp.test_foo")
+
+    def test_import_errors_happen_here(self):
+        package = self.create_package(test_foo="1 / 0")
+        locator = locators.ObjectLocator(jobs=2)
+        with self.assertRaises(ZeroDivisionError):
+            list(locator.locate_in(package))
+
+
+class TestCachedLocating(TestCase):
+    def setUp(self):
+        self.cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache)
+        self.locator = locators.ObjectLocator(cache=self.cache)
+
+    create_package = TestStaticLocating.create_package
+
+    def forget(self, package):
+        for name in list(sys.modules):
+            if name.startswith(f"{package.__name__}."):
+                del sys.modules[name]
+                vars(package).pop(name.rpartition(".")[2], None)
+
+    def test_unchanged_modules_are_not_imported_again(self):
+        package = self.create_package(
+            test_foo="""
+            from unittest import TestCase
+
+            class TestFoo(TestCase):
+                def test_foo(self):
+                    pass
+            """,
+        )
+        first = [loader.id for loader in self.locator.locate_in(package)]
+        self.forget(package)
+
+        loaders = list(self.locator.locate_in(package))
+        self.assertEqual(
+            (loaders, "virtue.tests.temp.test_foo" in sys.modules),
+            (
+                [
+                    LazyAttributeLoader(
+                        module="virtue.tests.temp.test_foo",
+                        cls="TestFoo",
+                        attribute="test_foo",
+                    ),
+                ],
+                False,
+            ),
+        )
+        self.assertEqual([loader.id for loader in loaders], first)
+
+    def test_changed_modules_are_located_again(self):
+        package = self.create_package(
+            test_foo="""
+            from unittest import TestCase
+
+            class TestFoo(TestCase):
+                def test_foo(self):
+                    pass
+            """,
+        )
+        list(self.locator.locate_in(package))
+        self.forget(package)
+
+        path = FilePath(package.__file__).sibling(b"test_foo.py")
+        path.setContent(
+            dedent(
+                """
+                from unittest import TestCase
+
+                class TestFoo(TestCase):
+                    def test_bar(self):
+                        pass
+                """,
+            ).encode(),
+        )
+        self.assertEqual(
+            [loader.id for loader in self.locator.locate_in(package)],
+            ["virtue.tests.temp.test_foo.TestFoo.test_bar"],
+        )
+
+    def test_changed_base_classes_invalidate_their_subclasses(self):
+        package = self.create_package(
+            base="""
+            from unittest import TestCase
+
+            class Base(TestCase):
+                def test_base(self):
+                    pass
+            """,
+            test_foo="""
+            from . import base
+
+            class TestFoo(base.Base):
+                pass
+            """,
+        )
+        list(self.locator.locate_in(package))
+        self.forget(package)
+
+        path = FilePath(package.__file__).sibling(b"base.py")
+        path.setContent(
+            dedent(
+                """
+                from unittest import TestCase
+
+                class Base(TestCase):
+                    def test_changed(self):
+                        pass
+                """,
+            ).encode(),
+        )
+        self.assertEqual(
+            [loader.id for loader in self.locator.locate_in(package)],
+            ["virtue.tests.temp.test_foo.TestFoo.test_changed"],
+        )
+
+    def test_the_static_locator_records_dependencies(self):
+        locator = locators.ObjectLocator(cache=self.cache, static=True)
+        package = self.create_package(
+            base="""
+            from unittest import TestCase
+
+            class Base(TestCase):
+                def test_base(self):
+                    pass
+            """,
+            test_foo="""
+            from . import base
+
+            class TestFoo(base.Base):
+                pass
+            """,
+        )
+        list(locator.locate_in(package))
+
+        path = FilePath(package.__file__).sibling(b"base.py")
+        path.setContent(path.getContent().replace(b"_base", b"_changed"))
+        self.assertEqual(
+            [loader.id for loader in locator.locate_in(package)],
+            ["virtue.tests.temp.test_foo.TestFoo.test_changed"],
+        )
+
+    def test_a_differently_configured_locator_ignores_the_cache(self):
+        package = self.create_package(
+            test_foo="""
+            from unittest import TestCase
+
+            class TestFoo(TestCase):
+                def test_foo(self):
+                    pass
+
+                def check_foo(self):
+                    pass
+            """,
+        )
+        list(self.locator.locate_in(package))
+
+        locator = locators.ObjectLocator(
+            cache=self.cache,
+            is_test_method=lambda attr, _: attr.startswith("check"),
+        )
+        self.assertEqual(
+            [loader.id for loader in locator.locate_in(package)],
+            ["virtue.tests.temp.test_foo.TestFoo.check_foo"],
+        )
+
+
 # Used to check that we locate or blow up properly on unbound methods
 aliased_attr = "test_it_can_locate_aliased_methods_directly_by_name"
 aliased = getattr(TestObjectLocator, aliased_attr)
@@ -1,4 +1,7 @@
 from unittest import TestCase
+import unittest
+
+from pyrsistent import v
 
 from virtue import reporters
 
@@ -39,3 +42,30 @@ class TestRecorder(TestCase):
         self.recorder.addSuccess(test=test)
         self.recorder.addUnexpectedSuccess(test=test)
         self.assertEqual(self.recorder.testsRun, 5)
+
+    def test_it_records_failing_subtests_as_subtest_failures(self):
+        _failing_subtest().run(self.recorder)
+        self.assertEqual(
+            (self.recorder.errors, len(self.recorder.subtest_failures)),
+            (v(), 1),
+        )
+
+
+class TestCounter(TestCase):
+    def test_it_counts_failing_subtests_as_subtest_failures(self):
+        counter = reporters.Counter()
+        _failing_subtest().run(counter)
+        self.assertEqual(
+            counter,
+            reporters.Counter(subtest_successes=1, subtest_failures=1),
+        )
+
+
+def _failing_subtest():
+    class FailingSubtest(unittest.TestCase):
+        def test_it(self):
+            for i in range(2):
+                with self.subTest(i=i):
+                    self.assertEqual(i, 0)
+
+    return FailingSubtest("test_it")
@@ -3,11 +3,31 @@ from io import StringIO
 from textwrap import dedent
 import os
 import re
+import shutil
+import subprocess
+import sys
+import tempfile
 import unittest
+import warnings
 
 from pyrsistent import v
 
-from virtue import runner
+try:
+    from twisted.internet import asyncioreactor
+except ImportError:
+    asyncioreactor = None  # type: ignore[assignment]
+
+from virtue import (
+    _cache,
+    _concurrent,
+    _history,
+    _parallel,
+    _subinterpreters,
+    _timeout,
+    locators,
+    runner,
+)
+from virtue.loaders import AttributeLoader, LazyAttributeLoader
 from virtue.reporters import (
     ComponentizedReporter,
     Counter,
@@ -15,6 +35,34 @@ from virtue.reporters import (
     Recorder,
 )
 
+# Recorded impact is relative to the current directory, so tests of it run
+# from the root of the repository (see chdir_to_root), whatever it was.
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+IMPACT_SAMPLE = "virtue/tests/samples/impact.py"
+SQUARE_CHANGED = [
+    f"--- a/{IMPACT_SAMPLE}\n",
+    f"+++ b/{IMPACT_SAMPLE}\n",
+    "@@ -9 +9 @@ def square(x):\n",
+    "-    return x * x\n",
+    "+    return x ** 2\n",
+]
+
+
+def chdir_to_root(test):
+    test.addCleanup(os.chdir, os.getcwd())
+    os.chdir(ROOT)
+
+
+def recorded_history(cache):
+    history = _history.History.in_directory(cache)
+    try:
+        return history._db.execute(
+            "SELECT name, outcome, set_up IS NOT NULL FROM results "
+            "JOIN tests ON tests.id = results.test ORDER BY name",
+        ).fetchall()
+    finally:
+        history.close()
+
 
 class TestRun(unittest.TestCase):
     def test_it_runs_tests(self):
@@ -47,9 +95,9 @@ class TestRun(unittest.TestCase):
             result,
             Counter(
                 subtest_failures=1,
-                subtest_successes=4,
+                subtest_successes=5,
+                subtest_errors=1,
                 successes=3,
-                errors=1,
             ),
         )
 
@@ -100,6 +148,507 @@ class TestRun(unittest.TestCase):
         )
         self.assertEqual(result, Counter(errors=1, successes=1))
 
+    def test_warnings_while_loading_tests_are_not_errors(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            result = runner.run(
+                tests=["virtue.tests.samples.warning_on_import"],
+            )
+        self.assertEqual(result, Counter(successes=1))
+
+    def test_tests_are_loaded_only_as_they_are_run(self):
+        result = runner.run(tests=["virtue.tests.samples.instances"])
+        self.assertEqual(result, Counter(successes=3))
+
+    def test_skipped_classes_are_not_instantiated(self):
+        from virtue.tests.samples.skipped_class import Foo
+
+        result = runner.run(tests=["virtue.tests.samples.skipped_class"])
+        self.assertEqual((result, Foo.instances), (Counter(skips=2), 0))
+
+    def test_overlapping_names_run_tests_once(self):
+        result = runner.run(
+            tests=[
+                "virtue.tests.samples.one_successful_test",
+                "virtue.tests.samples.one_successful_test.Foo",
+                "virtue.tests.samples.one_successful_test.Foo.test_foo",
+            ],
+        )
+        self.assertEqual(result, Counter(successes=1))
+
+    def test_reexported_classes_run_tests_once(self):
+        result = runner.run(
+            tests=[
+                "virtue.tests.samples.reexported_test",
+                "virtue.tests.samples.one_successful_test",
+            ],
+        )
+        self.assertEqual(result, Counter(successes=1))
+
+    def test_durations_are_remembered(self):
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache)
+        result = runner.run(
+            tests=["virtue.tests.samples.two_unsuccessful_tests.Foo"],
+            cache=cache,
+        )
+        durations = _cache.Durations.in_directory(cache)
+        self.assertEqual(
+            (
+                result,
+                [
+                    durations.get(f"virtue.tests.samples.{name}") is not None
+                    for name in [
+                        "two_unsuccessful_tests.Foo.test_foo",
+                        "two_unsuccessful_tests.Foo.test_bar",
+                        "two_unsuccessful_tests.Bar.test_foo",
+                    ]
+                ],
+            ),
+            (Counter(successes=1, failures=1), [True, True, False]),
+        )
+
+    def test_unwritable_caches_are_warned_about(self):
+        fd, not_a_directory = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, not_a_directory)
+        with self.assertWarns(RuntimeWarning):
+            result = runner.run(
+                tests=["virtue.tests.samples.two_unsuccessful_tests.Foo"],
+                cache=os.path.join(not_a_directory, "cache"),
+            )
+        self.assertEqual(result, Counter(successes=1, failures=1))
+
+    def test_history(self):
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache)
+        runner.run(
+            tests=["virtue.tests.samples.two_unsuccessful_tests.Foo"],
+            cache=cache,
+            history=True,
+        )
+        self.assertEqual(
+            recorded_history(cache),
+            [
+                (
+                    "virtue.tests.samples.two_unsuccessful_tests.Foo.test_bar",
+                    1,
+                    1,
+                ),
+                (
+                    "virtue.tests.samples.two_unsuccessful_tests.Foo.test_foo",
+                    0,
+                    1,
+                ),
+            ],
+        )
+
+    def test_history_requires_a_cache(self):
+        with self.assertRaises(ValueError):
+            runner.run(tests=["virtue.tests.samples.no_tests"], history=True)
+
+    def test_last_failed(self):
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache)
+        tests = ["virtue.tests.samples.two_unsuccessful_tests"]
+        first = runner.run(tests=tests, cache=cache)
+        second = runner.run(tests=tests, cache=cache, last_failed=True)
+        self.assertEqual(
+            (first, second),
+            (Counter(successes=2, failures=2), Counter(failures=2)),
+        )
+
+    def test_last_failed_without_failures_runs_everything(self):
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache)
+        tests = ["virtue.tests.samples.one_successful_test"]
+        runner.run(tests=tests, cache=cache)
+        result = runner.run(tests=tests, cache=cache, last_failed=True)
+        self.assertEqual(result, Counter(successes=1))
+
+    def test_last_failed_forgets_tests_which_pass(self):
+        failures = _cache.LastFailed(path=os.devnull)
+        failures.add("a.B")
+        failures.add("a.C.test_d")
+        before = failures.failed("a.B.test_e"), failures.failed("a.C.test_d")
+        failures.passed("a.B.test_e")
+        failures.passed("a.C.test_d")
+        self.assertEqual(
+            (before, bool(failures)),
+            ((True, True), False),
+        )
+
+    def test_last_failed_fixtures(self):
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache)
+        tests = ["virtue.tests.samples.failing_class_fixture"]
+        first = runner.run(tests=tests, cache=cache)
+        second = runner.run(tests=tests, cache=cache, last_failed=True)
+        self.assertEqual(
+            (first, second),
+            (Counter(errors=1, successes=1), Counter(errors=1)),
+        )
+
+    def test_failed_first(self):
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache)
+        tests = [
+            "virtue.tests.samples.one_successful_test",
+            "virtue.tests.samples.one_unsuccessful_test",
+        ]
+        runner.run(tests=tests, cache=cache)
+        result = runner.run(
+            tests=tests,
+            cache=cache,
+            failed_first=True,
+            stop_after=1,
+        )
+        self.assertEqual(result, Counter(failures=1))
+
+    def test_failed_tests_require_a_cache(self):
+        with self.assertRaises(ValueError):
+            runner.run(
+                tests=["virtue.tests.samples.no_tests"],
+                last_failed=True,
+            )
+
+    def test_shards(self):
+        results = [
+            runner.run(
+                tests=["virtue.tests.samples.two_unsuccessful_tests"],
+                shard=(index, 2),
+            )
+            for index in (1, 2)
+        ]
+        self.assertEqual(
+            [result.testsRun for result in results],
+            [2, 2],
+        )
+
+    def test_shards_are_balanced_by_durations_only_if_given(self):
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache)
+        durations = _cache.Durations.in_directory(cache)
+        samples = "virtue.tests.samples"
+        durations.record(f"{samples}.two_unsuccessful_tests.Foo.test_foo", 9)
+        durations.record(f"{samples}.two_unsuccessful_tests.Foo.test_bar", 9)
+        durations.record(f"{samples}.two_unsuccessful_tests.Bar.test_foo", 1)
+        durations.record(f"{samples}.two_unsuccessful_tests.Bar.test_bar", 1)
+        durations.record(f"{samples}.one_successful_test.Foo.test_foo", 1)
+        durations.save()
+
+        tests = [
+            f"{samples}.two_unsuccessful_tests",
+            f"{samples}.one_successful_test",
+        ]
+        cached = runner.collect(tests=tests, shard=(1, 2), cache=cache)
+        shared = runner.collect(
+            tests=tests,
+            shard=(1, 2),
+            shard_durations=durations.path,
+        )
+        self.assertEqual((len(list(cached)), len(list(shared))), (3, 2))
+
+    def test_fixture_durations(self):
+        result = Recorder()
+        runner.run(
+            tests=["virtue.tests.samples.module_fixture"],
+            reporter=result,
+        )
+        self.assertEqual(
+            (result.testsRun, list(result.fixture_durations)),
+            (2, [None]),
+        )
+
+    def test_impact(self):
+        chdir_to_root(self)
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache)
+        tests = ["virtue.tests.samples.impact"]
+        runner.run(tests=tests, cache=cache, record_impact=True)
+
+        result = Recorder()
+        runner.run(
+            tests=tests,
+            reporter=result,
+            cache=cache,
+            affected_by=SQUARE_CHANGED,
+        )
+        self.assertEqual(
+            [test.id() for test in result.successes],
+            ["virtue.tests.samples.impact.Squaring.test_square"],
+        )
+
+    def test_impact_of_fixtures(self):
+        chdir_to_root(self)
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache)
+        tests = ["virtue.tests.samples.impact"]
+        runner.run(tests=tests, cache=cache, record_impact=True)
+        collected = runner.collect(
+            tests=tests,
+            cache=cache,
+            affected_by=[IMPACT_SAMPLE],
+        )
+        self.assertEqual(len(list(collected)), 3)
+
+        changed = [*SQUARE_CHANGED[:2], "@@ -13 +13 @@\n", "-x\n", "+y\n"]
+        collected = runner.collect(
+            tests=tests,
+            cache=cache,
+            affected_by=changed,
+        )
+        self.assertEqual(
+            [loader.id for loader in collected],
+            [
+                "virtue.tests.samples.impact.Squaring.test_nothing",
+                "virtue.tests.samples.impact.Squaring.test_square",
+            ],
+        )
+
+    def test_impact_requires_a_cache(self):
+        with self.assertRaises(ValueError):
+            runner.run(
+                tests=["virtue.tests.samples.no_tests"],
+                affected_by=[],
+            )
+
+    def test_timeout(self):
+        result = Recorder()
+        runner.run(
+            tests=["virtue.tests.samples.hanging.Hanging"],
+            reporter=result,
+            timeout=0.1,
+        )
+        [(test, (_, error, _))] = result.errors
+        self.assertEqual(
+            (
+                test.id(),
+                "took longer than 0.1s" in str(error),
+                "test_sleeps" in str(error),
+                len(result.successes),
+            ),
+            (
+                "virtue.tests.samples.hanging.Hanging.test_sleeps",
+                True,
+                True,
+                1,
+            ),
+        )
+
+    def test_uninterruptible_tests_end_the_run(self):
+        code = """
+        from virtue import _cli, _timeout
+        _timeout.GRACE = 0.5  # comfortably more than the time taken to dump
+        _cli.main(
+            [
+                "--no-cache",
+                "--timeout",
+                "0.1",
+                "virtue.tests.samples.hanging.Uninterruptible",
+            ],
+        )
+        """
+        ran = subprocess.run(
+            [sys.executable, "-c", dedent(code)],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        self.assertEqual(
+            (
+                ran.returncode,
+                "couldn't be interrupted" in ran.stdout,
+                "test_blocks_signals" in ran.stdout,
+                "errors=1" in ran.stdout,
+            ),
+            (1, True, True, True),
+        )
+
+    def test_timeout_attribute(self):
+        result = runner.run(tests=["virtue.tests.samples.hanging.Overridden"])
+        self.assertEqual(result, Counter(errors=1))
+
+    @unittest.skipUnless(
+        _concurrent.available(),
+        "Running tests concurrently isn't available.",
+    )
+    def test_concurrency(self):
+        result = runner.run(
+            tests=["virtue.tests.samples.concurrent.Together"],
+            concurrency=3,
+        )
+        self.assertEqual(result, Counter(successes=3))
+
+    def test_concurrency_reports_the_same_results(self):
+        result = Recorder()
+        runner.run(
+            tests=["virtue.tests.samples.concurrent.Outcomes"],
+            reporter=result,
+            concurrency=3,
+        )
+        expected = Recorder()
+        runner.run(
+            tests=["virtue.tests.samples.concurrent.Outcomes"],
+            reporter=expected,
+        )
+        self.assertEqual(
+            [
+                (test.id(), [each.params for each in subtests])
+                for test, subtests in result.subtest_successes.items()
+            ],
+            [
+                (test.id(), [each.params for each in subtests])
+                for test, subtests in expected.subtest_successes.items()
+            ],
+        )
+        self.assertEqual(
+            (
+                [test.id() for test in result.successes],
+                [test.id() for test, _ in result.failures],
+                [test.id() for test, _ in result.errors],
+                [test.id() for test in result.skips],
+                [test.id() for test, _ in result.expected_failures],
+            ),
+            (
+                [test.id() for test in expected.successes],
+                [test.id() for test, _ in expected.failures],
+                [test.id() for test, _ in expected.errors],
+                [test.id() for test in expected.skips],
+                [test.id() for test, _ in expected.expected_failures],
+            ),
+        )
+
+    @unittest.skipUnless(
+        _concurrent.available(),
+        "Running tests concurrently isn't available.",
+    )
+    def test_concurrent_deferreds(self):
+        result = runner.run(
+            tests=["virtue.tests.samples.concurrent.Deferreds"],
+            concurrency=2,
+        )
+        self.assertEqual(result, Counter(successes=1))
+
+    @unittest.skipUnless(
+        _concurrent.available() and asyncioreactor is not None,
+        "Running trial's tests concurrently isn't available.",
+    )
+    def test_concurrent_trial_tests(self):
+        # Installing a reactor is for good, so it's done elsewhere.
+        code = """
+        from twisted.internet import asyncioreactor
+        asyncioreactor.install()
+        from virtue import runner
+        from virtue.reporters import Recorder
+        result = Recorder()
+        runner.run(
+            tests=["virtue.tests.samples.trial_deferreds"],
+            reporter=result,
+            concurrency=3,
+        )
+        print([test.id() for test in result.successes])
+        print(len(result.errors), len(result.failures))
+        """
+        ran = subprocess.run(
+            [sys.executable, "-c", dedent(code)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        together = "virtue.tests.samples.trial_deferreds.Together"
+        self.assertEqual(
+            ran.stdout.splitlines(),
+            [
+                str(
+                    [
+                        f"{together}.test_one",
+                        f"{together}.test_three",
+                        f"{together}.test_two",
+                    ],
+                ),
+                "0 0",
+            ],
+        )
+
+    def test_fork(self):
+        from virtue.tests.samples import forked
+
+        self.addCleanup(forked.set_up.clear)
+        result = runner.run(
+            tests=["virtue.tests.samples.forked.Mutating"],
+            fork=True,
+        )
+        self.assertEqual(
+            (result, forked.set_up, forked.state),
+            (Counter(successes=2), [os.getpid()], []),
+        )
+
+    def test_fork_reports_the_same_results(self):
+        tests = [
+            "virtue.tests.samples.failures_and_errors",
+            "virtue.tests.samples.subtests",
+            "virtue.tests.samples.hanging.Overridden",
+        ]
+        result = runner.run(tests=tests, fork=True)
+        expected = runner.run(tests=tests)
+        self.assertEqual(result, expected)
+
+    def test_forked_crashes_are_errors(self):
+        result = Recorder()
+        runner.run(
+            tests=["virtue.tests.samples.forked.Crashing"],
+            reporter=result,
+            fork=True,
+        )
+        [(test, (_, error, _))] = result.errors
+        self.assertEqual(
+            (test.id(), str(error), len(result.successes)),
+            (
+                "virtue.tests.samples.forked.Crashing.test_exits",
+                "Test process exited unexpectedly (exit code 3).",
+                1,
+            ),
+        )
+
+    def test_fork_and_impact(self):
+        with self.assertRaises(ValueError):
+            runner.run(
+                tests=["virtue.tests.samples.one_successful_test"],
+                fork=True,
+                record_impact=True,
+            )
+
+    def test_unimportable_modules_located_statically(self):
+        def run(**kwargs):
+            result = Recorder()
+            runner.run(
+                tests=["virtue.tests.samples"],
+                locator=locators.ObjectLocator(
+                    static=True,
+                    is_test_module=lambda name: name == "unimportable",
+                ),
+                reporter=result,
+                **kwargs,
+            )
+            return [
+                (test.id(), type(error))
+                for test, (_, error, _) in result.errors
+            ]
+
+        self.assertEqual(
+            (run(), run(jobs=2)),
+            (
+                [
+                    (
+                        "virtue.tests.samples.unimportable.Foo",
+                        ZeroDivisionError,
+                    ),
+                ],
+            )
+            * 2,
+        )
+
     def test_it_runs_tests_by_path_if_you_insist(self):
         import virtue.tests.samples
 
@@ -144,6 +693,502 @@ class TestRun(unittest.TestCase):
         )
 
 
+class TestParallelRun(unittest.TestCase):
+    def test_it_runs_tests(self):
+        result = runner.run(
+            tests=[
+                "virtue.tests.samples.one_successful_test",
+                "virtue.tests.samples.two_unsuccessful_tests",
+            ],
+            jobs=2,
+        )
+        self.assertEqual(result, Counter(successes=3, failures=2))
+
+    def test_it_runs_subtests(self):
+        result = runner.run(tests=["virtue.tests.samples.subtests"], jobs=2)
+        self.assertEqual(
+            result,
+            Counter(
+                subtest_failures=1,
+                subtest_successes=5,
+                subtest_errors=1,
+                successes=3,
+            ),
+        )
+
+    def test_warnings_become_errors_by_default(self):
+        result = runner.run(
+            tests=["virtue.tests.samples.success_and_warning"],
+            jobs=2,
+        )
+        self.assertEqual(result, Counter(errors=1, successes=1))
+
+    def test_it_can_stop_short(self):
+        result = runner.run(
+            tests=["virtue.tests.samples.failures_and_errors"],
+            stop_after=3,
+            jobs=2,
+        )
+        self.assertEqual(result.failures + result.errors, 3)
+
+    def test_stopping_short_interrupts_other_workers(self):
+        result = Recorder()
+        runner.run(
+            tests=[
+                "virtue.tests.samples.hanging.Hanging",
+                "virtue.tests.samples.one_unsuccessful_test",
+            ],
+            reporter=result,
+            stop_after=1,
+            jobs=2,
+        )
+        self.assertEqual(
+            (
+                [test.id() for test, _ in result.failures],
+                result.successes,
+                result.testsRun,
+            ),
+            (
+                ["virtue.tests.samples.one_unsuccessful_test.Foo.test_foo"],
+                [],
+                1,
+            ),
+        )
+
+    def test_subinterpreters(self):
+        result = runner.run(
+            tests=[
+                "virtue.tests.samples.failures_and_errors",
+                "virtue.tests.samples.subtests",
+            ],
+            jobs=2,
+            subinterpreters=True,
+        )
+        expected = runner.run(
+            tests=[
+                "virtue.tests.samples.failures_and_errors",
+                "virtue.tests.samples.subtests",
+            ],
+        )
+        self.assertEqual(result, expected)
+
+    @unittest.skipUnless(
+        _subinterpreters.available(),
+        "Subinterpreters aren't available.",
+    )
+    def test_subinterpreters_share_our_process(self):
+        result = Recorder()
+        runner.run(
+            tests=["virtue.tests.samples.process"],
+            reporter=result,
+            jobs=2,
+            subinterpreters=True,
+        )
+        [(_, (_, error, _))] = result.failures
+        self.assertEqual(str(error), str(os.getpid()))
+
+    def test_unsupported_tests_fall_back_to_processes(self):
+        result = runner.run(
+            tests=[
+                "virtue.tests.samples.hanging.Overridden",
+                "virtue.tests.samples.one_successful_test",
+            ],
+            jobs=2,
+            subinterpreters=True,
+        )
+        self.assertEqual(result, Counter(errors=1, successes=1))
+
+    def test_threads(self):
+        result = runner.run(
+            tests=[
+                "virtue.tests.samples.failures_and_errors",
+                "virtue.tests.samples.subtests",
+            ],
+            threads=2,
+        )
+        expected = runner.run(
+            tests=[
+                "virtue.tests.samples.failures_and_errors",
+                "virtue.tests.samples.subtests",
+            ],
+        )
+        self.assertEqual(result, expected)
+
+    def test_threads_run_tests_at_once(self):
+        result = Counter()
+        _parallel.run(
+            loaders=runner._locate(
+                tests=["virtue.tests.samples.threads"],
+                locator=None,
+            ),
+            reporter=result,
+            jobs=3,
+            threads=True,
+        )
+        self.assertEqual(result, Counter(successes=4))
+
+    def test_tests_with_limits_are_interrupted_in_the_main_thread(self):
+        result = Counter()
+        _parallel.run(
+            loaders=runner._locate(
+                tests=[
+                    "virtue.tests.samples.hanging.Overridden",
+                    "virtue.tests.samples.one_successful_test",
+                ],
+                locator=None,
+            ),
+            reporter=result,
+            jobs=2,
+            threads=True,
+        )
+        self.assertEqual(result, Counter(errors=1, successes=1))
+
+    def test_threads_and_jobs(self):
+        with self.assertRaises(ValueError):
+            runner.run(
+                tests=["virtue.tests.samples.one_successful_test"],
+                jobs=2,
+                threads=2,
+            )
+
+    def test_concurrency(self):
+        result = runner.run(
+            tests=["virtue.tests.samples.concurrent"],
+            jobs=2,
+            concurrency=3,
+        )
+        expected = runner.run(
+            tests=["virtue.tests.samples.concurrent"],
+            concurrency=3,
+        )
+        self.assertEqual(result, expected)
+
+    def test_fork(self):
+        result = runner.run(
+            tests=["virtue.tests.samples.forked"],
+            jobs=2,
+            fork=True,
+        )
+        self.assertEqual(result, Counter(errors=1, successes=3))
+
+    def test_Recorder(self):
+        result = Recorder()
+        runner.run(
+            tests=["virtue.tests.samples.one_successful_test"],
+            reporter=result,
+            jobs=2,
+        )
+        import virtue.tests.samples.one_successful_test
+
+        self.assertEqual(
+            result,
+            Recorder(
+                successes=v(
+                    virtue.tests.samples.one_successful_test.Foo("test_foo"),
+                ),
+            ),
+        )
+
+    def test_tests_are_loaded_only_as_they_are_run(self):
+        result = runner.run(tests=["virtue.tests.samples.instances"], jobs=2)
+        self.assertEqual(result, Counter(successes=3))
+
+    def test_skipped_classes(self):
+        result = runner.run(
+            tests=["virtue.tests.samples.skipped_class"],
+            jobs=2,
+        )
+        self.assertEqual(result, Counter(skips=2))
+
+    def test_durations_are_remembered(self):
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache)
+        result = runner.run(
+            tests=["virtue.tests.samples.two_unsuccessful_tests"],
+            jobs=2,
+            cache=cache,
+        )
+        durations = _cache.Durations.in_directory(cache)
+        self.assertEqual(
+            (result, len(durations.known())),
+            (Counter(successes=2, failures=2), 4),
+        )
+
+    def test_longest_units_are_run_first(self):
+        def unit(cls, *attributes):
+            return [
+                LazyAttributeLoader(module="foo", cls=cls, attribute=each)
+                for each in attributes
+            ]
+
+        durations = _cache.Durations(path=os.devnull)
+        durations.record("foo.Fast.test_one", 1.0)
+        durations.record("foo.Slow.test_one", 3.0)
+        units = [
+            unit("Fast", "test_one"),
+            unit("Unknown", "test_one", "test_two"),
+            unit("Slow", "test_one"),
+        ]
+        self.assertEqual(_parallel._longest_first(units, durations), [1, 2, 0])
+
+    def test_units_stay_in_order_without_durations(self):
+        durations = _cache.Durations(path=os.devnull)
+        units = [
+            [LazyAttributeLoader(module="foo", cls="Bar", attribute="test_a")],
+            [LazyAttributeLoader(module="foo", cls="Baz", attribute="test_a")],
+        ]
+        self.assertEqual(_parallel._longest_first(units, durations), [0, 1])
+
+    def test_history(self):
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache)
+        runner.run(
+            tests=["virtue.tests.samples.two_unsuccessful_tests"],
+            jobs=2,
+            cache=cache,
+            history=True,
+        )
+        self.assertEqual(
+            recorded_history(cache),
+            [
+                (
+                    "virtue.tests.samples.two_unsuccessful_tests.Bar.test_bar",
+                    0,
+                    1,
+                ),
+                (
+                    "virtue.tests.samples.two_unsuccessful_tests.Bar.test_foo",
+                    1,
+                    1,
+                ),
+                (
+                    "virtue.tests.samples.two_unsuccessful_tests.Foo.test_bar",
+                    1,
+                    1,
+                ),
+                (
+                    "virtue.tests.samples.two_unsuccessful_tests.Foo.test_foo",
+                    0,
+                    1,
+                ),
+            ],
+        )
+
+    def test_impact(self):
+        chdir_to_root(self)
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache)
+        tests = ["virtue.tests.samples.impact"]
+        runner.run(tests=tests, cache=cache, record_impact=True, jobs=2)
+        serial = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, serial)
+        runner.run(tests=tests, cache=serial, record_impact=True)
+        self.assertEqual(
+            _cache.Impact.in_directory(cache)._entries(),
+            _cache.Impact.in_directory(serial)._entries(),
+        )
+
+    def test_failed_first(self):
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache)
+        tests = [
+            "virtue.tests.samples.one_successful_test",
+            "virtue.tests.samples.one_unsuccessful_test",
+        ]
+        runner.run(tests=tests, cache=cache, jobs=2)
+        result = Recorder()
+        runner.run(
+            tests=tests,
+            reporter=result,
+            cache=cache,
+            jobs=2,
+            last_failed=True,
+        )
+        self.assertEqual(
+            [test.id() for test, _ in result.failures],
+            ["virtue.tests.samples.one_unsuccessful_test.Foo.test_foo"],
+        )
+
+    def test_modules_with_fixtures_are_set_up_in_one_worker(self):
+        result = Recorder()
+        runner.run(
+            tests=["virtue.tests.samples.module_fixture"],
+            reporter=result,
+            jobs=2,
+        )
+        self.assertEqual(
+            (result.testsRun, list(result.fixture_durations)),
+            (2, [1]),
+        )
+
+    def test_giant_classes_with_cheap_fixtures_are_split(self):
+        from virtue.tests.samples.two_unsuccessful_tests import Bar, Foo
+
+        durations = _cache.Durations(path=os.devnull)
+        durations.record(f"{__name__}.TestRun.test_Recorder", 0.1)
+        durations.record(f"{__name__}.TestRun.test_it_runs_tests", 0.1)
+        for cls in Foo, Bar:
+            for name in "test_foo", "test_bar":
+                durations.record(f"{cls.__module__}.{cls.__name__}.{name}", 5)
+        durations.record_fixture(f"{Foo.__module__}.Foo", 0.5)
+        durations.record_fixture(f"{Bar.__module__}.Bar", 5)
+
+        loaders = [
+            AttributeLoader(cls=TestRun, attribute="test_Recorder"),
+            AttributeLoader(cls=TestRun, attribute="test_it_runs_tests"),
+            AttributeLoader(cls=Foo, attribute="test_foo"),
+            AttributeLoader(cls=Foo, attribute="test_bar"),
+            AttributeLoader(cls=Bar, attribute="test_foo"),
+            AttributeLoader(cls=Bar, attribute="test_bar"),
+        ]
+        units = _parallel._units_of(loaders, durations=durations, jobs=3)
+        self.assertEqual(
+            list(units),
+            [loaders[:2], loaders[2:3], loaders[3:4], loaders[4:]],
+        )
+
+    def test_timeout(self):
+        result = Recorder()
+        runner.run(
+            tests=["virtue.tests.samples.hanging.Hanging"],
+            reporter=result,
+            timeout=0.1,
+            jobs=2,
+        )
+        [(test, (_, error, _))] = result.errors
+        self.assertEqual(
+            (
+                test.id(),
+                "took longer than" in str(error),
+                len(result.successes),
+            ),
+            ("virtue.tests.samples.hanging.Hanging.test_sleeps", True, 1),
+        )
+
+    def test_stuck_workers_are_replaced(self):
+        self.addCleanup(setattr, _timeout, "GRACE", _timeout.GRACE)
+        _timeout.GRACE = 0.5  # comfortably more than the time taken to dump
+        result = Recorder()
+        runner.run(
+            tests=["virtue.tests.samples.hanging.Uninterruptible"],
+            reporter=result,
+            timeout=0.1,
+            jobs=2,
+        )
+        [(test, (_, error, _))] = result.errors
+        self.assertEqual(
+            (
+                test.id(),
+                "worker was replaced" in str(error),
+                "test_blocks_signals" in str(error),
+                [each.id() for each in result.successes],
+            ),
+            (
+                "virtue.tests.samples.hanging.Uninterruptible.test_blocks_signals",
+                True,
+                True,
+                [
+                    "virtue.tests.samples.hanging.Uninterruptible.test_then_more",
+                ],
+            ),
+        )
+
+    def test_crashed_workers_are_errors(self):
+        result = runner.run(
+            tests=["virtue.tests.samples.worker_crash"],
+            jobs=2,
+        )
+        self.assertEqual(result, Counter(errors=1, successes=2))
+
+    def test_crashes_are_errors_in_the_test_which_was_running(self):
+        result = Recorder()
+        runner.run(
+            tests=["virtue.tests.samples.crash_midway"],
+            reporter=result,
+            jobs=2,
+        )
+        self.assertEqual(
+            (
+                [test.id() for test in result.successes],
+                [test.id() for test, _ in result.errors],
+            ),
+            (
+                [
+                    "virtue.tests.samples.crash_midway.Midway.test_a",
+                    "virtue.tests.samples.crash_midway.Midway.test_c",
+                ],
+                ["virtue.tests.samples.crash_midway.Midway.test_b"],
+            ),
+        )
+
+    def pids(self, **kwargs):
+        result = Recorder()
+        runner.run(
+            tests=[
+                "virtue.tests.samples.leaky.Leaky",
+                "virtue.tests.samples.process",
+            ],
+            reporter=result,
+            **kwargs,
+        )
+        return {str(error) for _, (_, error, _) in result.failures}
+
+    def test_recycle_after(self):
+        self.assertEqual(
+            (len(self.pids(recycle_after=2)), len(self.pids(recycle_after=1))),
+            (1, 2),
+        )
+
+    def test_max_rss(self):
+        self.assertEqual(
+            (len(self.pids(max_rss=2**30)), len(self.pids(max_rss=2**25))),
+            (1, 2),
+        )
+
+    @unittest.skipUnless(
+        sys.platform == "linux",
+        "Address space limits aren't enforced everywhere.",
+    )
+    def test_memory_limit(self):
+        result = runner.run(
+            tests=["virtue.tests.samples.leaky.Greedy"],
+            memory_limit=2**29,
+        )
+        self.assertEqual(result, Counter(errors=1))
+
+    @unittest.skipUnless(
+        sys.platform == "linux",
+        "Address space limits aren't enforced everywhere.",
+    )
+    def test_memory_limit_above_the_hard_limit(self):
+        code = """
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (2**34, 2**34))
+        from virtue import runner
+        print(
+            runner.run(
+                tests=["virtue.tests.samples.one_successful_test"],
+                memory_limit=2**40,
+            ),
+        )
+        """
+        ran = subprocess.run(
+            [sys.executable, "-c", dedent(code)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertEqual(ran.stdout, f"{Counter(successes=1)}\n")
+
+    def test_recycling_with_threads(self):
+        with self.assertRaises(ValueError):
+            runner.run(
+                tests=["virtue.tests.samples.one_successful_test"],
+                recycle_after=1,
+                threads=2,
+            )
+
+
 class TestRunOutput(unittest.TestCase):
     def assertOutputIs(self, expected, **kwargs):
         reporter = ComponentizedReporter(
@@ -215,6 +1260,91 @@ class TestRunOutput(unittest.TestCase):
             """,  # noqa: E501
         )
 
+    def test_fixtures(self):
+        self.assertOutputIs(
+            tests=["virtue.tests.samples.module_fixture"],
+            expected="""
+            virtue.tests.samples.module_fixture
+              Bar
+                test_bar ...                    [OK]
+              Foo
+                test_foo ...                    [OK]
+
+            ----------------------------------------
+            Ran 2 tests in 0.000s
+
+            PASSED (successes=2)
+            """,
+        )
+
+    def test_rest_of_a_crashed_unit_is_output_in_place(self):
+        self.assertOutputIs(
+            tests=[
+                "virtue.tests.samples.crash_midway",
+                "virtue.tests.samples.one_successful_test",
+            ],
+            jobs=2,
+            recycle_after=100,
+            expected="""
+            virtue.tests.samples.crash_midway
+              Midway
+                test_a ...                      [OK]
+                test_b ...                   [ERROR]
+                test_c ...                      [OK]
+            virtue.tests.samples.one_successful_test
+              Foo
+                test_foo ...                    [OK]
+
+            ========================================
+            [ERROR]
+            RuntimeError: Worker process exited unexpectedly (exit code 3).
+
+            virtue.tests.samples.crash_midway.Midway.test_b
+            ----------------------------------------
+            Ran 4 tests in 0.000s
+
+            FAILED (successes=3, errors=1)
+            """,
+        )
+
+    def test_parallel_fixtures(self):
+        self.assertOutputIs(
+            tests=["virtue.tests.samples.module_fixture"],
+            jobs=2,
+            expected="""
+            ----------------------------------------
+            Set up fixtures in •s (worker •: •s)
+            Ran 2 tests in 0.000s
+            """,
+        )
+
+    def test_parallel_run(self):
+        tests = [
+            "virtue.tests.samples.one_successful_test",
+            "virtue.tests.samples.two_unsuccessful_tests",
+            "virtue.tests.samples.subtests",
+        ]
+        serial = StringIO()
+        runner.run(
+            tests=tests,
+            reporter=ComponentizedReporter(
+                outputter=Outputter(colored=False),
+                stream=serial,
+                time=lambda: 0,
+            ),
+        )
+        parallel = StringIO()
+        runner.run(
+            tests=tests,
+            reporter=ComponentizedReporter(
+                outputter=Outputter(colored=False),
+                stream=parallel,
+                time=lambda: 0,
+            ),
+            jobs=3,
+        )
+        self.assertEqual(parallel.getvalue(), serial.getvalue())
+
     def test_single_test(self):
         self.assertOutputIs(
             tests=["virtue.tests.samples.one_successful_test"],
@@ -0,0 +1,89 @@
+from unittest import TestCase
+
+from virtue._select import Selection
+
+
+class TestSelection(TestCase):
+    def test_substrings(self):
+        selection = Selection.parse("foo")
+        self.assertEqual(
+            [selection.matches("a.foo.b"), selection.matches("a.bar.b")],
+            [True, False],
+        )
+
+    def test_globs_match_the_whole_id(self):
+        selection = Selection.parse("a.*.test_foo")
+        self.assertEqual(
+            [
+                selection.matches("a.B.test_foo"),
+                selection.matches("a.B.test_foobar"),
+                selection.matches("b.a.B.test_foo"),
+            ],
+            [True, False, False],
+        )
+
+    def test_and_or_not(self):
+        selection = Selection.parse("foo and not (bar or baz)")
+        self.assertEqual(
+            [
+                selection.matches("a.foo"),
+                selection.matches("a.foo.bar"),
+                selection.matches("a.foo.baz"),
+                selection.matches("a.quux"),
+            ],
+            [True, False, False, False],
+        )
+
+    def test_and_binds_more_tightly_than_or(self):
+        selection = Selection.parse("foo or bar and baz")
+        self.assertEqual(
+            [
+                selection.matches("foo"),
+                selection.matches("bar"),
+                selection.matches("bar.baz"),
+            ],
+            [True, False, True],
+        )
+
+    def test_within_substrings(self):
+        selection = Selection.parse("foo")
+        self.assertEqual(
+            [selection.within("a.foo"), selection.within("a.bar")],
+            [True, None],
+        )
+
+    def test_within_globs(self):
+        selection = Selection.parse("a.b.*")
+        self.assertEqual(
+            [
+                selection.within("a"),
+                selection.within("a.b"),
+                selection.within("a.b.C"),
+                selection.within("a.c"),
+            ],
+            [None, True, True, False],
+        )
+
+    def test_within_not(self):
+        selection = Selection.parse("not slow")
+        self.assertEqual(
+            [selection.within("a.slow"), selection.within("a.fast")],
+            [False, None],
+        )
+
+    def test_within_and_or(self):
+        selection = Selection.parse("(a.b.* and not slow) or a.c.test_*")
+        self.assertEqual(
+            [
+                selection.within("a.b.slow"),
+                selection.within("a.b.C"),
+                selection.within("a.c"),
+                selection.within("a.d"),
+            ],
+            [False, None, None, False],
+        )
+
+    def test_invalid(self):
+        for source in ["", "foo and", "(foo", "foo)", "or foo", "not"]:
+            with self.subTest(source=source), self.assertRaises(ValueError):
+                Selection.parse(source)
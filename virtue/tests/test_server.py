@@ -0,0 +1,104 @@
+from pathlib import Path
+from unittest import TestCase
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from virtue import _client
+
+FORWARD = """
+import sys
+from virtue import _client
+print(_client.forward(sys.argv[1:]))
+"""
+
+
+class TestServer(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.socket = os.path.join(directory, "server.sock")
+        self.environ = dict(os.environ, VIRTUE_SERVER=self.socket)
+
+        self.server = subprocess.Popen(
+            [sys.executable, "-m", "virtue", "serve"],
+            env=self.environ,
+            stderr=subprocess.PIPE,
+        )
+        self.addCleanup(self.stop)
+        deadline = time.monotonic() + 10
+        while not Path(self.socket).exists():
+            if time.monotonic() > deadline:
+                self.fail("The server never started listening.")
+            time.sleep(0.01)
+
+    def stop(self):
+        self.server.send_signal(signal.SIGINT)
+        self.server.communicate(timeout=10)
+
+    def virtue(self, *args):
+        return subprocess.run(
+            [sys.executable, "-m", "virtue", *args],
+            env=self.environ,
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+
+    def forward(self, *args):
+        forwarded = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                FORWARD,
+                *args,
+            ],
+            env=self.environ,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        *output, status = forwarded.stdout.splitlines()
+        return status, "\n".join(output)
+
+    def test_runs_are_forwarded(self):
+        successful, output = self.forward(
+            "virtue.tests.samples.one_successful_test",
+        )
+        unsuccessful, _ = self.forward(
+            "virtue.tests.samples.one_unsuccessful_test",
+        )
+        self.assertEqual(
+            (successful, "PASSED" in output, unsuccessful),
+            ("0", True, "1"),
+        )
+
+    def test_the_command_line_forwards_runs(self):
+        result = self.virtue("virtue.tests.samples.one_unsuccessful_test")
+        self.assertEqual(
+            (result.returncode, "FAILED" in result.stdout),
+            (1, True),
+        )
+
+    def test_only_one_server_listens(self):
+        second = self.virtue("serve")
+        self.assertEqual(
+            (second.returncode, "already listening" in second.stderr),
+            (2, True),
+        )
+
+    def test_the_socket_is_removed_on_exit(self):
+        self.stop()
+        self.assertFalse(Path(self.socket).exists())
+
+
+class TestForward(TestCase):
+    def test_no_server(self):
+        self.assertIsNone(_client.forward([], path=os.devnull))
+
+    def test_missing_socket(self):
+        self.assertIsNone(_client.forward([], path="/does/not/exist.sock"))
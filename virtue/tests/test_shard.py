@@ -0,0 +1,125 @@
+from importlib import import_module
+from unittest import TestCase
+import os
+import sys
+
+from virtue import _cache, _shard
+from virtue.loaders import LazyAttributeLoader
+
+
+def loaders(*ids):
+    return [
+        LazyAttributeLoader(module=module, cls=cls, attribute=attribute)
+        for module, cls, attribute in (id.split(".") for id in ids)
+    ]
+
+
+class TestParse(TestCase):
+    def test_parse(self):
+        self.assertEqual(_shard.parse("3/12"), (3, 12))
+
+    def test_invalid(self):
+        for each in "3", "0/2", "3/2", "a/b", "1/2/3", "-1/2":
+            with self.subTest(each=each), self.assertRaises(ValueError):
+                _shard.parse(each)
+
+
+class TestSelect(TestCase):
+    TESTS = loaders(
+        "a.Foo.test_one",
+        "a.Foo.test_two",
+        "a.Bar.test_one",
+        "b.Baz.test_one",
+        "b.Baz.test_two",
+        "b.Quux.test_one",
+        "c.Spam.test_one",
+    )
+
+    def shards(self, count, durations=None, tests=TESTS):
+        return [
+            [
+                loader.id
+                for loader in _shard.select(
+                    tests,
+                    shard=(index, count),
+                    durations=durations,
+                )
+            ]
+            for index in range(1, count + 1)
+        ]
+
+    def test_each_test_is_in_exactly_one_shard(self):
+        shards = self.shards(3)
+        self.assertEqual(
+            sorted(id for shard in shards for id in shard),
+            sorted(loader.id for loader in self.TESTS),
+        )
+
+    def test_classes_stay_together(self):
+        for shard in self.shards(4):
+            with self.subTest(shard=shard):
+                self.assertEqual(
+                    "a.Foo.test_one" in shard,
+                    "a.Foo.test_two" in shard,
+                )
+
+    def test_shards_are_deterministic(self):
+        self.assertEqual(self.shards(3), self.shards(3))
+
+    def test_balanced_by_count(self):
+        self.assertEqual(
+            self.shards(2),
+            [
+                [
+                    "a.Foo.test_one",
+                    "a.Foo.test_two",
+                    "a.Bar.test_one",
+                    "c.Spam.test_one",
+                ],
+                ["b.Baz.test_one", "b.Baz.test_two", "b.Quux.test_one"],
+            ],
+        )
+
+    def test_independent_of_test_order(self):
+        tests = self.TESTS[::-1]
+        self.assertEqual(
+            [sorted(shard) for shard in self.shards(3, tests=tests)],
+            [sorted(shard) for shard in self.shards(3)],
+        )
+
+    def test_balanced_by_duration(self):
+        durations = _cache.Durations(path=os.devnull)
+        durations.record("a.Foo.test_one", 5)
+        durations.record("a.Foo.test_two", 5)
+        durations.record("a.Bar.test_one", 4)
+        durations.record("b.Baz.test_one", 3)
+        durations.record("b.Baz.test_two", 3)
+        durations.record("b.Quux.test_one", 2)
+        durations.record("c.Spam.test_one", 8)
+        self.assertEqual(
+            self.shards(2, durations=durations),
+            [
+                [
+                    "a.Foo.test_one",
+                    "a.Foo.test_two",
+                    "a.Bar.test_one",
+                    "b.Quux.test_one",
+                ],
+                ["b.Baz.test_one", "b.Baz.test_two", "c.Spam.test_one"],
+            ],
+        )
+
+    def test_module_fixtures_are_found_whether_imported_or_not(self):
+        module = "virtue.tests.samples.module_fixture"
+        tests = [
+            LazyAttributeLoader(module=module, cls=cls, attribute=attribute)
+            for cls, attribute in [("Foo", "test_foo"), ("Bar", "test_bar")]
+        ]
+        sys.modules.pop(module, None)
+        cold = self.shards(8, tests=tests)
+        import_module(module)
+        warm = self.shards(8, tests=tests)
+        self.assertEqual(
+            (cold, [len(shard) for shard in warm if shard]),
+            (warm, [2]),
+        )
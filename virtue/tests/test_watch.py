@@ -0,0 +1,151 @@
+from pathlib import Path
+from unittest import TestCase
+import os
+import shutil
+import sys
+import tempfile
+import types
+
+from virtue import _watch
+
+
+class TestForget(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def module(self, name, **attributes):
+        module = types.ModuleType(name)
+        module.__file__ = os.path.join(self.root, f"{name}.py")
+        vars(module).update(attributes)
+        sys.modules[name] = module
+        self.addCleanup(sys.modules.pop, name, None)
+        return module
+
+    def test_changed_modules_and_their_users_are_forgotten(self):
+        lib = self.module("virtue_watch_lib")
+
+        def f():
+            pass
+
+        f.__module__ = lib.__name__
+        self.module("virtue_watch_from", f=f)
+        self.module("virtue_watch_import", lib=lib)
+        self.module("virtue_watch_other")
+
+        forgotten, unknown = _watch.forget([lib.__file__], root=self.root)
+        self.assertEqual(
+            (forgotten, unknown),
+            (
+                {
+                    "virtue_watch_lib",
+                    "virtue_watch_from",
+                    "virtue_watch_import",
+                },
+                set(),
+            ),
+        )
+        self.assertIn("virtue_watch_other", sys.modules)
+        self.assertNotIn("virtue_watch_lib", sys.modules)
+
+    def test_submodules(self):
+        package = self.module("virtue_watch_package")
+        child = self.module("virtue_watch_package.child")
+        package.child = child
+        forgotten, _ = _watch.forget([package.__file__], root=self.root)
+        self.assertEqual(
+            forgotten,
+            {"virtue_watch_package", "virtue_watch_package.child"},
+        )
+
+    def test_a_package_does_not_use_its_submodules(self):
+        package = self.module("virtue_watch_package")
+        child = self.module("virtue_watch_package.child")
+        package.child = child
+        forgotten, _ = _watch.forget([child.__file__], root=self.root)
+        self.assertEqual(forgotten, {"virtue_watch_package.child"})
+        self.assertFalse(hasattr(package, "child"))
+
+    def test_modules_elsewhere_are_not_forgotten(self):
+        lib = self.module("virtue_watch_lib")
+        self.module("virtue_watch_import", lib=lib)
+        forgotten, _ = _watch.forget([lib.__file__], root=os.devnull)
+        self.assertEqual(forgotten, {"virtue_watch_lib"})
+
+    def test_unknown_files(self):
+        path = os.path.join(self.root, "new.py")
+        self.assertEqual(
+            _watch.forget([path], root=self.root),
+            (set(), {path}),
+        )
+
+
+class TestAffected(TestCase):
+    def test_tests_in_forgotten_modules(self):
+        self.assertEqual(
+            _watch.affected(
+                tests=["a.test_b.C", "a.test_d", "e"],
+                forgotten={"a.test_b", "a.lib", "e.test_f"},
+                unknown=set(),
+            ),
+            ["a.test_b.C", "e.test_f"],
+        )
+
+    def test_unknown_files_rerun_everything(self):
+        self.assertEqual(
+            _watch.affected(
+                tests=["a", "b"],
+                forgotten=set(),
+                unknown={"new.py"},
+            ),
+            ["a", "b"],
+        )
+
+    def test_paths_are_always_rerun(self):
+        self.assertEqual(
+            _watch.affected(
+                tests=["a/test_b.py"],
+                forgotten={"c"},
+                unknown=set(),
+            ),
+            ["a/test_b.py"],
+        )
+
+
+class WatcherMixin:
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.path = Path(self.root) / "foo.py"
+        self.path.write_text("")
+
+    def test_changes(self):
+        watcher = self.watcher([self.root])
+        self.addCleanup(watcher.close)
+        self.assertEqual(watcher.changes(timeout=0), set())
+
+        os.utime(self.path, ns=(0, 0))
+        self.assertIn(str(self.path), watcher.changes(timeout=5))
+
+    def test_new_directories(self):
+        watcher = self.watcher([self.root])
+        self.addCleanup(watcher.close)
+        (Path(self.root) / "bar").mkdir()
+        watcher.changes(timeout=0.1)
+
+        new = Path(self.root) / "bar" / "baz.py"
+        new.write_text("")
+        self.assertIn(str(new), watcher.changes(timeout=5))
+
+
+class TestInotify(WatcherMixin, TestCase):
+    def watcher(self, roots):
+        try:
+            return _watch._Inotify(roots)
+        except (AttributeError, OSError):
+            self.skipTest("inotify is unavailable")
+
+
+class TestPoller(WatcherMixin, TestCase):
+    def watcher(self, roots):
+        return _watch._Poller(roots, interval=0.01)